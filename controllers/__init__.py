@@ -4,9 +4,21 @@ Exposes the main controller classes for easy imports.
 """
 
 from .pid import PIDController
+from .cascade import CascadedPIDController
 from .mpc import MPCController
+from .async_mpc import AsyncMPCController
+from .batch_mpc import BatchMPCController
+from .nmpc import RTIMPCController
+from .mppi import MPPIController
+from .tube_mpc import TubeMPCController
 
 __all__ = [
     "PIDController",
+    "CascadedPIDController",
     "MPCController",
+    "AsyncMPCController",
+    "BatchMPCController",
+    "RTIMPCController",
+    "MPPIController",
+    "TubeMPCController",
 ]
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Asynchronous MPC: solves run on a background thread, setpoints never wait.
+
+The control loop posts the newest state estimate with `update` and asks for
+the input to send with `get_input`, both non-blocking. The worker thread
+always solves for the most recent measurement only. Before solving, it
+predicts that state forward by the expected solve plus link latency, so the
+finished plan starts at the moment its first input can actually reach the
+drone. `get_input` then reads the input of the latest finished plan at the
+current time.
+
+A thread (not a process) keeps the model and solver state shared without
+serialization; the solve itself is short and the sender only needs the GIL
+briefly to read the published plan.
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# A finished plan: inputs u[k] apply from t0 + k * dt.
+Plan = namedtuple("Plan", ["t0", "dt", "u", "x"])
+
+
+def plan_input(plan, t):
+    """Input of `plan` at time `t`, holding the first/last input outside it."""
+    k = int((t - plan.t0) // plan.dt)
+    return plan.u[min(max(k, 0), len(plan.u) - 1)]
+
+
+class AsyncMPCController:
+    """
+    Runs an `MPCController` on a background thread with delay compensation.
+
+    `link_latency` is the radio delay between sending a setpoint and the drone
+    acting on it, in seconds. The solve time is estimated online as an
+    exponential moving average (weight `smoothing`). `reference` passed to
+    `update` may be a setpoint, a horizon trajectory or a callable
+    `reference(t)` that is evaluated at the plan start time.
+
+    A solve that raises, or that falls back to the previous plan in anytime
+    mode, leaves the published plan as it is: `failures` counts those ticks
+    and `last_error` keeps the latest exception (None for a fallback). The
+    worker keeps serving later states either way.
+    """
+
+    def __init__(self, controller, link_latency=0.0, smoothing=0.1, clock=time.monotonic):
+        self.controller = controller
+        self.link_latency = float(link_latency)
+        self.smoothing = float(smoothing)
+        self.clock = clock
+        self.solve_estimate = controller.dt
+
+        self.plan = None
+        self.solves = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_error = None
+
+        self._pending = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    @property
+    def latency_estimate(self):
+        """Expected time from measurement to the plan's first input taking effect."""
+        return self.solve_estimate + self.link_latency
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mpc-solver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def update(self, state, reference, timestamp=None):
+        """Post the newest state estimate; an unsolved older one is dropped."""
+        timestamp = self.clock() if timestamp is None else timestamp
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = (np.array(state, dtype=float), reference, timestamp)
+            self._cond.notify()
+
+    def get_input(self, timestamp=None):
+        """Input of the latest finished plan at `timestamp` (hover if none yet)."""
+        plan = self.plan
+        if plan is None:
+            return np.zeros(self.controller.nu)
+        return plan_input(plan, self.clock() if timestamp is None else timestamp).copy()
+
+    def predict(self, state, timestamp, latency):
+        """Propagate `state` by `latency` seconds under the inputs already committed."""
+        plan = self.plan
+        model = self.controller.model
+        steps = max(1, math.ceil(latency / self.controller.dt))
+        h = latency / steps
+        x = state
+        for i in range(steps):
+            u = np.zeros(self.controller.nu) if plan is None \
+                else plan_input(plan, timestamp + i * h)
+            x = model.step(x, u, h)
+        return x
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                state, reference, timestamp = self._pending
+                self._pending = None
+
+            start = self.clock()
+            latency = self.latency_estimate + (start - timestamp)
+            t0 = timestamp + latency
+            predicted = self.predict(state, timestamp, latency) if latency > 0 else state
+            ctrl = self.controller
+            fallbacks = getattr(ctrl, "fallbacks", 0)
+            try:
+                if callable(reference):
+                    reference = reference(t0)
+                ctrl.compute(predicted, reference)
+            except Exception as error:
+                self.failures += 1
+                self.last_error = error
+                continue
+            finally:
+                elapsed = self.clock() - start
+                self.solve_estimate += self.smoothing * (elapsed - self.solve_estimate)
+
+            # A fallback shifted the controller's old plan; the published one
+            # is already indexed by time, so keep it.
+            if getattr(ctrl, "fallbacks", 0) != fallbacks:
+                self.failures += 1
+                continue
+            self.plan = Plan(t0, ctrl.dt, ctrl.u_plan.copy(), ctrl.x_plan.copy())
+            self.solves += 1
@@ -0,0 +1,161 @@
+"""
+Offline PID autotuning by closed-loop simulation.
+
+Candidate gains for the cascaded PID are drawn log-uniformly from
+`SEARCH_SPACE` and flown through a simulated take-off and lateral step. A
+chunk of candidates is simulated at once: a `CascadedPIDController` with a
+batch axis gives every candidate its own gains and the model integrates all
+of them in one vectorized step. Chunks run in parallel joblib worker
+processes. Every candidate is scored on rise time, overshoot and RMS
+position error; `tune` returns the candidates ranked by score.
+
+Gain schedules are left out: tuning is done at the nominal operating point,
+and the schedule's factors stay relative to the tuned gains.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from joblib import Parallel, cpu_count, delayed
+
+from utils import step_response
+
+from .cascade import STAGES, CascadedPIDController
+from .quadrotor import QuadrotorModel
+
+# "loop.gain.axes" -> (low, high). "xy" sets the x and y gains together,
+# "z" the vertical one; the attitude loop has a single roll/pitch gain.
+SEARCH_SPACE = {
+    "position.kp.xy": (0.5, 6.0),
+    "position.kp.z": (0.5, 6.0),
+    "velocity.kp.xy": (1.0, 15.0),
+    "velocity.kp.z": (1.0, 15.0),
+    "velocity.ki.xy": (0.05, 5.0),
+    "velocity.ki.z": (0.05, 5.0),
+    "attitude.kp": (0.2, 6.0),
+}
+
+AXES = {"xy": [0, 1], "z": [2]}
+
+# Score weights: RMS error [m] + RISE_WEIGHT * rise time [s] + OVERSHOOT_WEIGHT * overshoot [-].
+RISE_WEIGHT = 0.1
+OVERSHOOT_WEIGHT = 1.0
+
+TuningResult = namedtuple("TuningResult", ["params", "gains", "rise_time", "overshoot",
+                                           "rms_error", "score"])
+
+
+def default_episode(height=0.7, step=0.5, duration=4.0):
+    """Take-off to `height` combined with a lateral `step` in x, from rest at the origin."""
+    target = np.zeros(8)
+    target[0], target[2] = step, height
+    return {"target": target, "duration": duration}
+
+
+def sample_candidates(n, space=None, seed=None):
+    """`n` log-uniform draws from `space`; returns (names, (n, len(names)) parameters)."""
+    space = SEARCH_SPACE if space is None else space
+    names = list(space)
+    low, high = np.log(np.array([space[name] for name in names])).T
+    rng = np.random.default_rng(seed)
+    return names, np.exp(rng.uniform(low, high, size=(n, len(names))))
+
+
+def candidate_gains(names, params, base=None):
+    """
+    Per-loop gain dicts for the candidates `params` (n, len(names)) on top
+    of the `base` gains (a cascade config's ``gains``): arrays of shape (n, 3)
+    or (n, 2) for the tuned gains, without any ``schedule``.
+    """
+    params = np.atleast_2d(params)
+    n = len(params)
+    gains = {name: {key: value for key, value in (base or {}).get(name, {}).items()
+                    if key != "schedule"} for name in STAGES}
+    for j, name in enumerate(names):
+        loop, gain, *axes = name.split(".")
+        channels = 2 if loop == "attitude" else 3
+        current = np.broadcast_to(np.asarray(gains[loop].get(gain, 0.0), dtype=float),
+                                  (n, channels)).copy()
+        columns = AXES[axes[0]] if axes else slice(None)
+        current[:, columns] = params[:, j, None]
+        gains[loop][gain] = current
+    return gains
+
+
+def params_from_gains(names, gains):
+    """Parameter vector for `names` read from per-loop gain dicts (e.g. a config's gains)."""
+    values = []
+    for name in names:
+        loop, gain, *axes = name.split(".")
+        channels = 2 if loop == "attitude" else 3
+        current = np.broadcast_to(np.asarray(gains.get(loop, {}).get(gain, 0.0), dtype=float),
+                                  (channels,))
+        values.append(current[AXES[axes[0]][0] if axes else 0])
+    return np.array(values)
+
+
+def step_metrics(positions, target, dt):
+    """
+    Rise time (10-90 %), overshoot (fraction of the step) and RMS error per
+    run for positions (steps + 1, n, 3) flown from the origin to `target`;
+    the worst stepped axis counts. Runs that never rise get an infinite
+    rise time.
+    """
+    stepped = np.flatnonzero(target[:3])
+    # (n, stepped axes, samples) for the vectorized metrics.
+    response = np.moveaxis(positions[..., stepped], 0, -1)
+    metrics = step_response.step_metrics(response, target[stepped], dt, initial=0.0)
+    rise = np.nan_to_num(metrics.rise_time, nan=np.inf).max(axis=-1)
+    overshoot = metrics.overshoot.max(axis=-1)
+    rms = np.sqrt(np.mean(np.sum((positions - target[:3]) ** 2, axis=-1), axis=0))
+    return rise, overshoot, rms
+
+
+def evaluate(names, params, cascade=None, model=None, episode=None, substeps=1):
+    """
+    Fly all candidates `params` (n, len(names)) at once; returns the rise
+    time, overshoot, RMS error and score arrays (n,). Diverging candidates
+    score infinity.
+    """
+    cascade = dict(cascade or {})
+    episode = default_episode() if episode is None else episode
+    model = model if model is not None else QuadrotorModel()
+    n = len(params)
+    gains = candidate_gains(names, params, cascade.pop("gains", None))
+    ctrl = CascadedPIDController(model=model, gains=gains, batch_shape=(n,), **cascade)
+    target = episode["target"]
+    steps = int(round(episode["duration"] / ctrl.dt))
+    h = ctrl.dt / substeps
+
+    x = np.zeros((n, 8))
+    positions = np.empty((steps + 1, n, 3))
+    positions[0] = x[:, :3]
+    with np.errstate(all="ignore"):
+        for k in range(steps):
+            u = ctrl.compute(x, target)
+            for _ in range(substeps):
+                x = model.step(x, u, h)
+            positions[k + 1] = x[:, :3]
+        rise, overshoot, rms = step_metrics(positions, target, ctrl.dt)
+        score = rms + RISE_WEIGHT * rise + OVERSHOOT_WEIGHT * overshoot
+    score[~np.isfinite(score)] = np.inf
+    return rise, overshoot, rms, score
+
+
+def tune(n_candidates=2000, space=None, cascade=None, model=None, episode=None,
+         chunk_size=250, n_jobs=None, seed=None):
+    """
+    Evaluate `n_candidates` random candidates in chunks on joblib workers
+    (`n_jobs` defaults to the number of physical cores); returns
+    TuningResults sorted by score, best first.
+    """
+    names, params = sample_candidates(n_candidates, space, seed)
+    chunks = [params[i:i + chunk_size] for i in range(0, n_candidates, chunk_size)]
+    n_jobs = cpu_count(only_physical_cores=True) if n_jobs is None else n_jobs
+    metrics = Parallel(n_jobs=n_jobs)(delayed(evaluate)(names, chunk, cascade, model, episode)
+                                      for chunk in chunks)
+    rise, overshoot, rms, score = (np.concatenate(column) for column in zip(*metrics))
+    base = (cascade or {}).get("gains")
+    return [TuningResult(dict(zip(names, params[i])), candidate_gains(names, params[i], base),
+                         rise[i], overshoot[i], rms[i], score[i])
+            for i in np.argsort(score, kind="stable")]
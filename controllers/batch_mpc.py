@@ -0,0 +1,100 @@
+"""
+Batched MPC for several drones, solved in parallel on a process pool.
+
+Each drone's QP is independent, so a tick splits the drones into one chunk
+per worker and solves the chunks concurrently. Every chunk is pinned to its
+own worker process: a single-worker loky executor (the executor behind
+joblib's loky backend) whose initializer hands it the controller settings
+once. The worker builds the controllers of its drones on the first tick and
+keeps them, so afterwards a task carries only states and references and
+every drone's warm starts and fallback plans come from its previous tick.
+Closing the controller shuts the workers down, and their controllers with
+them.
+
+Dispatching a tick costs about a millisecond (joblib's `Parallel` call
+alone takes several), so batching only pays off when a chunk's solves take
+well over that and every worker has a physical core to itself:
+`scripts/benchmark_batch_mpc.py` prints the dispatch cost next to the
+serial and batched tick times.
+"""
+
+import numpy as np
+from joblib import effective_n_jobs
+from joblib.externals.loky import ProcessPoolExecutor
+
+from .mpc import MPCController
+
+# Set in every worker process by `_init_worker`: the MPCController keyword
+# arguments of its batch and the controllers built so far, keyed by drone.
+_WORKER_KWARGS = None
+_WORKER_CONTROLLERS = {}
+
+
+def _init_worker(controller_kwargs):
+    global _WORKER_KWARGS
+    _WORKER_KWARGS = controller_kwargs
+    _WORKER_CONTROLLERS.clear()
+
+
+def _solve_chunk(drones, states, references):
+    """Solve the MPC problems of `drones` in this process; returns (inputs, plans)."""
+    inputs, plans = [], []
+    for drone, state, reference in zip(drones, states, references):
+        ctrl = _WORKER_CONTROLLERS.get(drone)
+        if ctrl is None:
+            ctrl = _WORKER_CONTROLLERS[drone] = MPCController(**_WORKER_KWARGS)
+        inputs.append(ctrl.compute(state, reference))
+        plans.append(ctrl.u_plan)
+    return np.array(inputs), np.array(plans)
+
+
+class BatchMPCController:
+    """
+    One `MPCController` per drone, solved in parallel across processes.
+
+    `controller_kwargs` are passed to every `MPCController`. Use as a context
+    manager (or call `close`) to shut the workers down. Drone i is always
+    solved by the same worker, which holds the only controller for it.
+    """
+
+    def __init__(self, n_drones, n_jobs=-1, **controller_kwargs):
+        self.n_drones = int(n_drones)
+        self.controller_kwargs = controller_kwargs
+        self.n_jobs = min(effective_n_jobs(n_jobs), self.n_drones)
+        self.u_plans = None
+        self._chunks = np.array_split(np.arange(self.n_drones), self.n_jobs)
+        # One single-process executor per chunk pins the chunk to its process.
+        self._executors = [ProcessPoolExecutor(1, initializer=_init_worker,
+                                               initargs=(controller_kwargs,))
+                           for _ in self._chunks]
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        self._executors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def compute(self, states, references):
+        """
+        Solve all drones for one tick and return their first inputs as (n_drones, nu).
+
+        `states` is (n_drones, nx); `references` holds one setpoint or
+        trajectory per drone, or a single setpoint shared by all.
+        """
+        states = np.asarray(states, dtype=float)
+        references = np.asarray(references, dtype=float)
+        if states.shape[0] != self.n_drones:
+            raise ValueError(f"expected {self.n_drones} states, got {states.shape[0]}")
+        if references.ndim == 1:
+            references = np.broadcast_to(references, (self.n_drones,) + references.shape)
+
+        futures = [executor.submit(_solve_chunk, chunk.tolist(), states[chunk], references[chunk])
+                   for executor, chunk in zip(self._executors, self._chunks)]
+        results = [future.result() for future in futures]
+        self.u_plans = np.concatenate([plans for _, plans in results])
+        return np.concatenate([inputs for inputs, _ in results])
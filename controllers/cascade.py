@@ -0,0 +1,212 @@
+"""
+Cascaded multi-rate PID: position -> velocity -> attitude.
+
+Three `PIDController` loops run at their own rates under one scheduler
+clocked at the fastest rate. Every rate is an integer divider of that clock
+and a loop is evaluated only on ticks where its divider is due; in between
+its output (the setpoint of the next loop) is held. The position loop turns
+position errors into a velocity setpoint, the velocity loop turns velocity
+errors into an acceleration, which `QuadrotorModel.trim_inputs` converts
+into roll/pitch setpoints and thrust, and the attitude loop adds a
+correction to the roll/pitch commands that speeds up the lagged attitude
+response.
+
+A loop may schedule its gains over the operating point (altitude, speed and
+variables measured elsewhere, such as the battery voltage) with a
+`GainSchedule` table; the gains are looked up only when the loop is due.
+
+Every loop evaluation is timed; `timing_stats` reports the per-loop call
+counts and time percentiles.
+"""
+
+import time
+
+import numpy as np
+
+from utils.logger import PERCENTILES
+
+from .gain_schedule import GainSchedule
+from .pid import PIDController
+from .quadrotor import QuadrotorModel
+
+# Loop rates in Hz.
+DEFAULT_RATES = {"position": 50.0, "velocity": 100.0, "attitude": 500.0}
+
+DEFAULT_GAINS = {
+    "position": {"kp": [2.0, 2.0, 2.5]},
+    "velocity": {"kp": [4.0, 4.0, 6.0], "ki": [0.5, 0.5, 2.0], "integral_limit": 1.0},
+    "attitude": {"kp": 2.0},
+}
+
+STAGES = ("position", "velocity", "attitude")
+
+
+class LoopStage:
+    """
+    One loop of a cascade: a PIDController evaluated every `divider`
+    scheduler ticks, with its tick length set accordingly.
+
+    `output` holds the last result between evaluations. The last `capacity`
+    evaluation times are kept for `timing`.
+    """
+
+    __slots__ = ("name", "pid", "divider", "output", "calls", "_times")
+
+    def __init__(self, name, pid, divider, capacity=4096):
+        self.name = name
+        self.pid = pid
+        self.divider = int(divider)
+        self.output = np.zeros(pid.shape)
+        self.calls = 0
+        self._times = np.zeros(int(capacity))
+
+    def due(self, tick):
+        return tick % self.divider == 0
+
+    def run(self, setpoint, measurement):
+        """Evaluate the loop, record its time and return the (held) output."""
+        start = time.perf_counter()
+        self.pid.update(setpoint, measurement, out=self.output)
+        self._times[self.calls % len(self._times)] = time.perf_counter() - start
+        self.calls += 1
+        return self.output
+
+    def reset(self):
+        self.pid.reset()
+        self.output[...] = 0.0
+        self.calls = 0
+
+    def timing(self):
+        """{"calls", "mean", "p50", "p95", "p99", "max"} over the kept evaluation times [s]."""
+        times = self._times[:min(self.calls, len(self._times))]
+        if len(times) == 0:
+            return {"calls": 0}
+        stats = {"calls": self.calls, "mean": times.mean()}
+        stats.update(zip((f"p{p}" for p in PERCENTILES), np.percentile(times, PERCENTILES)))
+        stats["max"] = times.max()
+        return stats
+
+
+class CascadedPIDController:
+    """
+    Position, velocity and attitude PID loops at separate rates.
+
+    `rates` maps the loop names in `STAGES` to Hz; the scheduler runs at
+    the highest rate (`dt` is its period) and every rate must divide it.
+    `gains` maps loop names to PIDController keyword arguments (``kp``,
+    ``ki``, ``kd``, ``integral_limit``; per-axis lists or scalars) and
+    overrides `DEFAULT_GAINS` loop by loop; a loop's ``schedule`` entry is
+    a `GainSchedule.from_config` section scaling its gains. The velocity
+    setpoint is limited to `max_speed`, roll/pitch commands to `max_tilt`
+    and the thrust offset to `thrust_limits`.
+
+    `compute(state, reference)` is called once per scheduler tick, like the
+    MPC controllers, with a target state whose velocity part is used as
+    feed-forward.
+
+    With a `batch_shape`, e.g. (n,), one instance controls n vehicles (or
+    simulated copies of one): states, references and inputs get these
+    leading axes, and gains may differ per vehicle (shape (n, 3)).
+    """
+
+    def __init__(self, model=None, rates=None, gains=None, max_speed=1.0, max_tilt=0.35,
+                 thrust_limits=(-0.2, 0.3), timing_capacity=4096, batch_shape=()):
+        self.model = model if model is not None else QuadrotorModel()
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        gains = {name: {**DEFAULT_GAINS[name], **(gains or {}).get(name, {})} for name in STAGES}
+        self.max_speed = float(max_speed)
+        self.max_tilt = float(max_tilt)
+        self.thrust_limits = tuple(float(limit) for limit in thrust_limits)
+        self.batch_shape = tuple(batch_shape)
+
+        base_rate = max(self.rates[name] for name in STAGES)
+        self.dt = 1.0 / base_rate
+        max_accel = self.model.gravity * np.tan(self.max_tilt)
+        thrust_accel = np.array(self.thrust_limits) / self.model.mass
+        limits = {
+            "position": (-max_speed, max_speed),
+            "velocity": (np.array([-max_accel, -max_accel, thrust_accel[0]]),
+                         np.array([max_accel, max_accel, thrust_accel[1]])),
+            "attitude": (-self.max_tilt, self.max_tilt),
+        }
+        self.stages = {}
+        for name, shape in zip(STAGES, (3, 3, 2)):
+            divider = base_rate / self.rates[name]
+            if abs(divider - round(divider)) > 1e-9:
+                raise ValueError(f"{name} rate {self.rates[name]} Hz does not divide the "
+                                 f"scheduler rate {base_rate} Hz")
+            loop_gains = dict(gains[name])
+            schedule = loop_gains.pop("schedule", None)
+            if schedule is not None:
+                schedule = GainSchedule.from_config(
+                    schedule, *(loop_gains.get(key, 0.0) for key in ("kp", "ki", "kd")))
+            pid = PIDController(dt=round(divider) * self.dt, output_limits=limits[name],
+                                shape=self.batch_shape + (shape,), gain_schedule=schedule,
+                                **loop_gains)
+            self.stages[name] = LoopStage(name, pid, round(divider), timing_capacity)
+        self.tick = 0
+        self._velocity_setpoint = np.zeros(self.batch_shape + (3,))
+        self._command = np.zeros(self.batch_shape + (3,))
+
+    @classmethod
+    def from_config(cls, config, model=None):
+        """Build from a config section (`rates`, `gains` and the limits)."""
+        return cls(model=model, **config)
+
+    def reset(self):
+        """Restart the scheduler and clear every loop."""
+        for stage in self.stages.values():
+            stage.reset()
+        self.tick = 0
+        self._velocity_setpoint[:] = 0.0
+        self._command[:] = 0.0
+
+    def compute(self, state, reference, operating_point=None):
+        """
+        Run the loops that are due this tick; returns [roll_cmd, pitch_cmd, thrust].
+
+        `operating_point` maps gain-scheduling variables other than
+        ``altitude`` and ``speed`` (taken from the state) to their current
+        values, e.g. ``{"vbat": 3.9}``.
+        """
+        state = np.asarray(state, dtype=float)
+        reference = np.asarray(reference, dtype=float)
+        position, velocity, attitude = (self.stages[name] for name in STAGES)
+
+        # Outer loops first, so inner loops due on the same tick see fresh setpoints.
+        if position.due(self.tick):
+            self._schedule(position, state, operating_point)
+            position.run(reference[..., 0:3], state[..., 0:3])
+        if velocity.due(self.tick):
+            self._schedule(velocity, state, operating_point)
+            # Feed-forward plus position correction, limited as a whole to max_speed.
+            setpoint = np.add(reference[..., 3:6], position.output, out=self._velocity_setpoint)
+            np.clip(setpoint, -self.max_speed, self.max_speed, out=setpoint)
+            velocity.run(setpoint, state[..., 3:6])
+            trim = self.model.trim_inputs(velocity.output)
+            self._command[..., :2] = np.clip(trim[..., :2], -self.max_tilt, self.max_tilt)
+            self._command[..., 2] = np.clip(trim[..., 2], *self.thrust_limits)
+        if attitude.due(self.tick):
+            self._schedule(attitude, state, operating_point)
+            attitude.run(self._command[..., :2], state[..., 6:8])
+        self.tick += 1
+
+        u = self._command.copy()
+        u[..., :2] = np.clip(u[..., :2] + attitude.output, -self.max_tilt, self.max_tilt)
+        return u
+
+    @staticmethod
+    def _schedule(stage, state, operating_point):
+        schedule = stage.pid.gain_schedule
+        if schedule is None:
+            return
+        values = {**schedule.defaults, "altitude": state[..., 2],
+                  "speed": np.linalg.norm(state[..., 3:6], axis=-1), **(operating_point or {})}
+        point = np.stack(np.broadcast_arrays(*(values[name] for name in schedule.variables)),
+                         axis=-1)
+        stage.pid.set_operating_point(point)
+
+    def timing_stats(self):
+        """Per loop: its rate [Hz] and `LoopStage.timing` (call count, times in seconds)."""
+        return {name: {"rate": self.rates[name], **stage.timing()}
+                for name, stage in self.stages.items()}
@@ -0,0 +1,92 @@
+"""
+OSQP C code generation for the fixed-structure MPC QP.
+
+OSQP emits a self-contained C solver for one QP (data, scaling and
+factorization baked in) together with pybind11 bindings. The MPC only
+updates q, l and u, but the code is generated with matrix updates enabled
+("matrices" mode), since only that mode keeps OSQP's adaptive step size
+(rho) and its refactorization; without it the tail latency is several
+times worse. `build_module` generates that code, compiles it into a
+Python extension module and imports it, so a tick calls straight into C
+without the general-purpose OSQP bindings in between.
+
+Modules are named after a hash of the QP matrices and settings and built
+once per directory; later controllers with the same QP load the existing
+module. Building needs a C/C++ compiler and the pybind11 headers (the
+``pybind11`` package), not network access. An extension module holds a
+single solver workspace, so controllers loading the same module in one
+process share it; every solve sends all vectors, so results do not depend
+on who solved last, only the implicit warm start does.
+"""
+
+import glob
+import hashlib
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+
+def module_name(P, A, settings):
+    """Extension module name identifying the QP structure, data and settings."""
+    digest = hashlib.sha1()
+    for matrix in (P, A):
+        for array in (matrix.indptr, matrix.indices, matrix.data):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(repr(sorted(settings.items())).encode())
+    return f"mpc_qp_{digest.hexdigest()[:16]}"
+
+
+def compile_module(folder, name):
+    """Compile the generated sources in `folder` into an extension module; returns its path."""
+    try:
+        import pybind11
+    except ImportError as exc:
+        raise ImportError("compiling OSQP generated code needs the pybind11 package") from exc
+    from setuptools import Distribution, Extension
+    from setuptools.command.build_ext import build_ext
+
+    folder = Path(folder)
+    extension = Extension(
+        name,
+        sources=sorted(glob.glob(str(folder / "src" / "*.c")))
+        + [str(folder / "workspace.c"), str(folder / "bindings.cpp")],
+        include_dirs=[str(folder / "inc" / "public"), str(folder / "inc" / "private"),
+                      str(folder), pybind11.get_include()],
+        extra_compile_args=["-O3"],
+        language="c++",
+    )
+    command = build_ext(Distribution({"name": name, "ext_modules": [extension]}))
+    command.build_lib = str(folder)
+    command.build_temp = str(folder / "build")
+    command.ensure_finalized()
+    command.run()
+    return Path(command.get_outputs()[0])
+
+
+def load_module(path, name):
+    """Import a compiled extension module from `path`."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_module(solver, P, A, settings, directory):
+    """
+    Extension module solving the QP `solver` was set up with.
+
+    `P` (upper triangle) and `A` are the QP matrices and `settings` the OSQP
+    settings used for the setup; together they name the module. Generated
+    and compiled into ``directory/<name>`` unless already built there.
+    """
+    name = module_name(P, A, settings)
+    folder = Path(directory) / name
+    built = sorted(folder.glob(f"{name}*.so")) + sorted(folder.glob(f"{name}*.pyd"))
+    if built:
+        path = built[0]
+    else:
+        solver.codegen(str(folder), parameters="matrices", extension_name=name,
+                       force_rewrite=True)
+        path = compile_module(folder, name)
+    return load_module(path, name)
@@ -0,0 +1,331 @@
+"""
+Explicit (multiparametric) MPC for small linear systems.
+
+The MPC problem is solved offline for every initial state in a box: the
+critical regions of the multiparametric QP are explored facet by facet, and
+the optimal input sequence on each region is an affine function of the state,
+
+    U*(theta) = K_i theta + k_i    for    H_i theta <= h_i.
+
+The piecewise-affine law is kept as flat arrays (`ExplicitLaw.arrays`) so it
+can be written to an .npz file and loaded without redoing the offline solve.
+Online, a binary search tree over the region facet hyperplanes narrows the
+candidates down to a handful of regions before the membership test, so a
+lookup costs a few dot products instead of a scan over all regions.
+"""
+
+from collections import deque
+from operator import mul
+
+import numpy as np
+import osqp
+from scipy import sparse
+from scipy.optimize import linprog
+from scipy.spatial import HalfspaceIntersection
+
+from .prediction import condense
+
+# Constraint rows with a bound at least this large are treated as absent.
+UNBOUNDED = 1e6
+# Membership tolerance for point location.
+LOCATE_TOL = 1e-6
+# Distance stepped across a facet when exploring the neighbouring region.
+STEP = 1e-5
+
+
+def _vertices(Hr, hr, center):
+    """Vertices of the bounded polytope {Hr theta <= hr} around an interior point."""
+    if Hr.shape[1] == 1:
+        a = Hr[:, 0]
+        upper = np.min(hr[a > 0] / a[a > 0])
+        lower = np.max(hr[a < 0] / a[a < 0])
+        return np.array([[lower], [upper]])
+    hs = HalfspaceIntersection(np.hstack([Hr, -hr[:, None]]), center)
+    return hs.intersections
+
+
+def _chebyshev(Hr, hr):
+    """Chebyshev center and radius of {Hr theta <= hr}, or (None, 0) if empty."""
+    d = Hr.shape[1]
+    norms = np.linalg.norm(Hr, axis=1)
+    c = np.zeros(d + 1)
+    c[-1] = -1.0
+    res = linprog(c, A_ub=np.hstack([Hr, norms[:, None]]), b_ub=hr,
+                  bounds=[(None, None)] * d + [(0, None)], method="highs")
+    if res.status != 0:
+        return None, 0.0
+    return res.x[:d], res.x[-1]
+
+
+class _RegionExplorer:
+    """Offline mpQP solver: explores critical regions from a starting point."""
+
+    def __init__(self, A, B, Q, R, P, horizon, u_min, u_max, x_min, x_max,
+                 theta_min, theta_max):
+        self.nx, self.nu = B.shape
+        self.horizon = horizon
+        Phi, Gamma, self.H, self.F = condense(A, B, Q, R, P, horizon)
+        self.H_inv = np.linalg.inv(self.H)
+
+        # Constraints G U <= w + S theta, keeping only finite bounds.
+        N, nx, nu = horizon, self.nx, self.nu
+        eye = np.eye(N * nu)
+        G = np.vstack([eye, -eye, Gamma, -Gamma])
+        w = np.concatenate([np.tile(u_max, N), -np.tile(u_min, N),
+                            np.tile(x_max, N), -np.tile(x_min, N)])
+        S = np.vstack([np.zeros((2 * N * nu, nx)), -Phi, Phi])
+        keep = np.abs(w) < UNBOUNDED
+        self.G, self.w, self.S = G[keep], w[keep], S[keep]
+
+        self.theta_min = np.asarray(theta_min, dtype=float)
+        self.theta_max = np.asarray(theta_max, dtype=float)
+        eye = np.eye(nx)
+        self.box_H = np.vstack([eye, -eye])
+        self.box_h = np.concatenate([self.theta_max, -self.theta_min])
+
+        self._qp = osqp.OSQP()
+        self._qp.setup(sparse.triu(self.H, format="csc"), np.zeros(N * nu),
+                       sparse.csc_matrix(self.G), np.full(len(self.w), -np.inf), self.w.copy(),
+                       eps_abs=1e-10, eps_rel=1e-10, max_iter=100000, polishing=True,
+                       verbose=False)
+
+    def active_set(self, theta):
+        """Active constraint rows at the optimum for `theta`, or None if infeasible."""
+        self._qp.update(q=self.F @ theta, u=self.w + self.S @ theta)
+        result = self._qp.solve(raise_error=False)
+        if result.info.status_val != osqp.SolverStatus.OSQP_SOLVED:
+            return None
+        return tuple(np.flatnonzero(result.y > 1e-8))
+
+    def region(self, active):
+        """Affine law and (irredundant) region for an active set, or None if lower-dimensional."""
+        H_inv, G, F = self.H_inv, self.G, self.F
+        active = list(active)
+
+        # Keep a linearly independent subset of the active rows (LICQ).
+        independent = []
+        for i in active:
+            if np.linalg.matrix_rank(G[independent + [i]]) == len(independent) + 1:
+                independent.append(i)
+        inactive = np.setdiff1d(np.arange(len(self.w)), independent)
+
+        if independent:
+            GA = G[independent]
+            M_inv = np.linalg.inv(GA @ H_inv @ GA.T)
+            L_lam = -M_inv @ (self.S[independent] + GA @ H_inv @ F)
+            l_lam = -M_inv @ self.w[independent]
+            K = -H_inv @ (F + GA.T @ L_lam)
+            k = -H_inv @ GA.T @ l_lam
+        else:
+            L_lam = np.zeros((0, self.nx))
+            l_lam = np.zeros(0)
+            K = -H_inv @ F
+            k = np.zeros(F.shape[0])
+
+        GI = G[inactive]
+        Hr = np.vstack([GI @ K - self.S[inactive], -L_lam, self.box_H])
+        hr = np.concatenate([self.w[inactive] - GI @ k, l_lam, self.box_h])
+
+        norms = np.linalg.norm(Hr, axis=1)
+        degenerate = norms < 1e-10
+        if np.any(hr[degenerate] < -1e-9):
+            return None
+        Hr, hr, norms = Hr[~degenerate], hr[~degenerate], norms[~degenerate]
+        Hr, hr = Hr / norms[:, None], hr / norms
+
+        center, radius = _chebyshev(Hr, hr)
+        if center is None or radius < 1e-7:
+            return None
+        vertices = _vertices(Hr, hr, center)
+
+        # A row is a facet if at least nx vertices lie on it.
+        tight = np.abs(vertices @ Hr.T - hr) < 1e-8
+        facets = tight.sum(axis=0) >= self.nx
+        Hr, hr = Hr[facets], hr[facets]
+        _, unique = np.unique(np.round(np.hstack([Hr, hr[:, None]]), 9), axis=0,
+                              return_index=True)
+        unique = np.sort(unique)
+        return Hr[unique], hr[unique], K, k, vertices
+
+    def explore(self):
+        """Return the list of regions covering the feasible part of the box."""
+        regions = []
+        seen = set()
+        start = 0.5 * (self.theta_min + self.theta_max)
+        queue = deque([start])
+        while queue:
+            theta = queue.popleft()
+            if any(np.all(r[0] @ theta <= r[1] + LOCATE_TOL) for r in regions):
+                continue
+            active = self.active_set(theta)
+            if active is None or active in seen:
+                continue
+            seen.add(active)
+            region = self.region(active)
+            if region is None:
+                continue
+            regions.append(region)
+
+            Hr, hr, _, _, vertices = region
+            on_facet = np.abs(vertices @ Hr.T - hr) < 1e-8
+            for i in range(len(hr)):
+                point = vertices[on_facet[:, i]].mean(axis=0) + STEP * Hr[i]
+                if np.all(point >= self.theta_min) and np.all(point <= self.theta_max):
+                    queue.append(point)
+        return regions
+
+
+def _build_tree(regions, planes_A, planes_b):
+    """
+    Binary search tree over hyperplanes.
+
+    Each internal node splits its candidate regions by one hyperplane, picking
+    the plane that minimizes the larger side; regions that straddle the plane
+    go to both children. Nodes that cannot be split further become leaves
+    listing their remaining candidates.
+    """
+    lo = np.empty((len(regions), len(planes_b)))
+    hi = np.empty_like(lo)
+    for i, region in enumerate(regions):
+        proj = region[4] @ planes_A.T - planes_b
+        lo[i], hi[i] = proj.min(axis=0), proj.max(axis=0)
+    negative, positive = lo < -1e-9, hi > 1e-9
+
+    plane, left, right, leaf_start, leaf_count = [], [], [], [], []
+    leaf_regions = []
+
+    def build(candidates):
+        node = len(plane)
+        plane.append(-1)
+        left.append(-1)
+        right.append(-1)
+        leaf_start.append(len(leaf_regions))
+        leaf_count.append(0)
+        if len(candidates) > 1:
+            n_neg = negative[candidates].sum(axis=0)
+            n_pos = positive[candidates].sum(axis=0)
+            score = np.maximum(n_neg, n_pos)
+            best = int(np.argmin(score))
+            if score[best] < len(candidates):
+                plane[node] = best
+                left[node] = build(candidates[negative[candidates, best]])
+                right[node] = build(candidates[positive[candidates, best]])
+                return node
+        leaf_start[node] = len(leaf_regions)
+        leaf_count[node] = len(candidates)
+        leaf_regions.extend(candidates.tolist())
+        return node
+
+    build(np.arange(len(regions)))
+    return {
+        "node_plane": np.array(plane, dtype=np.int32),
+        "node_left": np.array(left, dtype=np.int32),
+        "node_right": np.array(right, dtype=np.int32),
+        "node_leaf_start": np.array(leaf_start, dtype=np.int32),
+        "node_leaf_count": np.array(leaf_count, dtype=np.int32),
+        "leaf_regions": np.array(leaf_regions, dtype=np.int32),
+    }
+
+
+class ExplicitLaw:
+    """
+    Piecewise-affine MPC law with a hyperplane search tree for point location.
+
+    Built offline with `ExplicitLaw.build`; `arrays` / `from_arrays` convert
+    to and from the flat array representation stored on disk.
+    """
+
+    FIELDS = ("region_A", "region_b", "region_offsets", "gains", "offsets",
+              "planes_A", "planes_b", "theta_min", "theta_max",
+              "node_plane", "node_left", "node_right", "node_leaf_start",
+              "node_leaf_count", "leaf_regions")
+
+    def __init__(self, **arrays):
+        for name in self.FIELDS:
+            setattr(self, name, np.asarray(arrays[name]))
+        # The tree is walked with plain Python objects: for a few short dot
+        # products per node this is several times faster than numpy indexing.
+        self._nodes = list(zip(self.node_plane.tolist(), self.node_left.tolist(),
+                               self.node_right.tolist()))
+        self._planes = list(zip(self.planes_A.tolist(), self.planes_b.tolist()))
+        self._leaves = [self.leaf_regions[s:s + c].tolist() for s, c in
+                        zip(self.node_leaf_start.tolist(), self.node_leaf_count.tolist())]
+        bounds = self.region_offsets.tolist()
+        self._regions = [(self.region_A[s:e], self.region_b[s:e] + LOCATE_TOL)
+                         for s, e in zip(bounds[:-1], bounds[1:])]
+
+    @classmethod
+    def build(cls, A, B, Q, R, P, horizon, u_min, u_max, x_min, x_max,
+              theta_min, theta_max):
+        """Solve the multiparametric QP over the box [theta_min, theta_max]."""
+        explorer = _RegionExplorer(A, B, Q, R, P, horizon, u_min, u_max, x_min, x_max,
+                                   theta_min, theta_max)
+        regions = explorer.explore()
+        if not regions:
+            raise RuntimeError("explicit MPC has no feasible region in the parameter box")
+
+        facets_A = np.vstack([r[0] for r in regions])
+        facets_b = np.concatenate([r[1] for r in regions])
+        # Faces of the parameter box never separate regions, so they are left
+        # out of the tree; the rest are oriented consistently and deduplicated.
+        j = np.argmax(np.abs(facets_A), axis=1)
+        a_j = facets_A[np.arange(len(j)), j]
+        bound = np.where(a_j > 0, np.asarray(theta_max)[j], -np.asarray(theta_min)[j])
+        on_box = np.isclose(np.abs(a_j), 1.0) & np.isclose(facets_b, bound)
+        planes = np.hstack([facets_A, facets_b[:, None]])[~on_box]
+        first = planes[np.arange(len(planes)), np.argmax(np.abs(planes[:, :-1]) > 1e-9, axis=1)]
+        planes = planes * np.sign(first)[:, None]
+        _, unique = np.unique(np.round(planes, 8), axis=0, return_index=True)
+        planes = planes[np.sort(unique)]
+        planes_A, planes_b = planes[:, :-1], planes[:, -1]
+
+        tree = _build_tree(regions, planes_A, planes_b)
+        sizes = [len(r[1]) for r in regions]
+        return cls(
+            region_A=facets_A,
+            region_b=facets_b,
+            region_offsets=np.concatenate([[0], np.cumsum(sizes)]).astype(np.int32),
+            gains=np.array([r[2] for r in regions]),
+            offsets=np.array([r[3] for r in regions]),
+            planes_A=planes_A,
+            planes_b=planes_b,
+            theta_min=np.asarray(theta_min, dtype=float),
+            theta_max=np.asarray(theta_max, dtype=float),
+            **tree,
+        )
+
+    def arrays(self):
+        """Flat array representation, e.g. for `np.savez`."""
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(**arrays)
+
+    def __len__(self):
+        return len(self.gains)
+
+    def contains(self, region, theta):
+        H, h = self._regions[region]
+        return bool((H @ theta <= h).all())
+
+    def locate(self, theta):
+        """Index of the region containing `theta`, or -1 if it is infeasible."""
+        point = theta.tolist()
+        node = 0
+        plane, left, right = self._nodes[0]
+        while plane >= 0:
+            a, b = self._planes[plane]
+            node = left if sum(map(mul, a, point)) <= b else right
+            plane, left, right = self._nodes[node]
+        for region in self._leaves[node]:
+            if self.contains(region, theta):
+                return region
+        return -1
+
+    def evaluate(self, theta):
+        """Optimal input sequence U = [u_0, ..., u_{N-1}] for `theta`, or None."""
+        region = self.locate(theta)
+        if region < 0:
+            return None
+        return self.gains[region] @ theta + self.offsets[region]
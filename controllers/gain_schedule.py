@@ -0,0 +1,122 @@
+"""
+Precomputed PID gain-scheduling tables.
+
+Gains that vary with the operating point (altitude, speed, battery voltage
+``pm.vbat``, ...) are evaluated once, at construction, on a dense uniform
+grid over the operating-point variables and stored as one compact float32
+array. A lookup is then a multilinear interpolation in that grid: the cell
+index follows from the grid spacing (no search), and all 2^d cell corners of
+every queried point are gathered and weighted in a few array operations, so
+a whole swarm is scheduled at once and no scheduling function runs per
+tick.
+
+Tables hold (kp, ki, kd) along the last axis, after any per-channel axes:
+shape (*resolution, *channels, 3).
+"""
+
+import itertools
+
+import numpy as np
+
+
+class GainSchedule:
+    """
+    Dense gain table over the operating-point `variables`.
+
+    `lower` and `upper` are the grid bounds per variable and `table` has
+    shape (*resolution, *channels, 3) with at least two grid points per
+    variable. Operating points outside the bounds are clamped to them.
+    `defaults` optionally maps variables to values for callers that do not
+    measure them (e.g. the battery voltage in simulation).
+    """
+
+    def __init__(self, variables, lower, upper, table, dtype=np.float32, defaults=None):
+        self.variables = tuple(variables)
+        self.defaults = dict(defaults or {})
+        self.table = np.asarray(table, dtype=dtype)
+        d = len(self.variables)
+        self.resolution = np.array(self.table.shape[:d])
+        if np.any(self.resolution < 2):
+            raise ValueError("a gain schedule needs at least two grid points per variable")
+        if self.table.shape[-1] != 3:
+            raise ValueError(f"the last table axis must hold (kp, ki, kd), got {self.table.shape}")
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.channels = self.table.shape[d:-1]
+        self._scale = (self.resolution - 1) / (self.upper - self.lower)
+        # Flat table and the flat offsets of the 2^d corners of a grid cell.
+        self._flat = self.table.reshape(-1, int(np.prod(self.table.shape[d:])))
+        self._strides = np.array([int(np.prod(self.resolution[j + 1:])) for j in range(d)])
+        corners = np.array(list(itertools.product((0, 1), repeat=d)))
+        self._corner_offsets = corners @ self._strides
+
+    @classmethod
+    def from_function(cls, function, ranges, resolution=16, dtype=np.float32, defaults=None):
+        """
+        Tabulate `function` on a uniform grid.
+
+        `ranges` maps variable names to (low, high); `resolution` is the
+        number of grid points per variable (int or one per variable).
+        `function(points)` receives all grid points at once as an array
+        (..., d) in the order of `ranges` and returns gains (..., *channels, 3).
+        """
+        names = list(ranges)
+        lower = np.array([ranges[name][0] for name in names], dtype=float)
+        upper = np.array([ranges[name][1] for name in names], dtype=float)
+        counts = np.broadcast_to(resolution, (len(names),))
+        grids = [np.linspace(lo, hi, int(n)) for lo, hi, n in zip(lower, upper, counts)]
+        points = np.stack(np.meshgrid(*grids, indexing="ij"), axis=-1)
+        return cls(names, lower, upper, function(points), dtype, defaults)
+
+    @classmethod
+    def from_config(cls, config, kp, ki=0.0, kd=0.0):
+        """
+        Build from a config section scaling base gains.
+
+        The section has ``variables``, mapping every variable name to its
+        ``breakpoints``, a ``scale`` factor per breakpoint (a scalar, or
+        [kp, ki, kd] factors) and optionally a ``default`` value, and
+        optionally ``resolution``. The gains at an
+        operating point are the base gains times the product of the
+        per-variable factors, linear between breakpoints and held beyond.
+        """
+        variables = config["variables"]
+        base = np.stack(np.broadcast_arrays(*(np.asarray(g, dtype=float) for g in (kp, ki, kd))),
+                        axis=-1)
+        ranges = {name: (min(spec["breakpoints"]), max(spec["breakpoints"]))
+                  for name, spec in variables.items()}
+
+        def scaled_gains(points):
+            factor = np.ones(points.shape[:-1] + (3,))
+            for j, spec in enumerate(variables.values()):
+                scale = np.broadcast_to(np.asarray(spec["scale"], dtype=float).T,
+                                        (3, len(spec["breakpoints"])))
+                factor *= np.stack([np.interp(points[..., j], spec["breakpoints"], s)
+                                    for s in scale], axis=-1)
+            # Insert the channel axes between the grid axes and the gain axis.
+            factor = factor.reshape(factor.shape[:-1] + (1,) * (base.ndim - 1) + (3,))
+            return factor * base
+
+        defaults = {name: spec["default"] for name, spec in variables.items() if "default" in spec}
+        return cls.from_function(scaled_gains, ranges, config.get("resolution", 16),
+                                 defaults=defaults)
+
+    def lookup(self, operating_point):
+        """
+        Gains at `operating_point` (..., d), ordered as `variables`;
+        returns (..., *channels, 3) in float64 with (kp, ki, kd) last.
+        """
+        point = np.asarray(operating_point, dtype=float)
+        batch = point.shape[:-1]
+        position = np.clip((point - self.lower) * self._scale, 0.0, self.resolution - 1)
+        cell = np.minimum(position.astype(int), self.resolution - 2)
+        frac = position - cell
+        # Corner weights: outer product over variables of (1 - frac, frac), in
+        # the same (first variable slowest) order as the corner offsets.
+        sides = np.stack([1.0 - frac, frac], axis=-1).astype(self.table.dtype)
+        weights = sides[..., 0, :]
+        for j in range(1, len(self.variables)):
+            weights = (weights[..., :, None] * sides[..., j, None, :]).reshape(batch + (-1,))
+        index = (cell @ self._strides)[..., None] + self._corner_offsets
+        gains = weights[..., None, :] @ np.take(self._flat, index, axis=0)
+        return gains.reshape(batch + self.table.shape[len(self.variables):]).astype(float)
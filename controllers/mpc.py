@@ -0,0 +1,1026 @@
+"""
+Linear model predictive controller for Crazyflie position control.
+
+Two interchangeable backends solve the same QP:
+
+* ``"cvxpy"`` writes the problem once as a DPP-compliant parametrized problem:
+  the measured state, the reference trajectory and the box constraints are
+  `cp.Parameter`s, so every control tick only writes new parameter values and
+  cvxpy reuses its cached canonicalization instead of rebuilding the problem.
+* ``"osqp-direct"`` assembles the sparse QP matrices once with scipy.sparse
+  and talks to OSQP directly; per tick only ``q``, ``l`` and ``u`` change.
+
+* ``"osqp-codegen"`` is the osqp-direct QP exported with OSQP's code
+  generation and compiled into an extension module (see
+  `controllers.codegen`), so a tick runs the solver in C with no
+  general-purpose binding layer in between.
+
+* ``"explicit"`` solves the multiparametric QP offline per decoupled axis
+  (see `controllers.explicit_mpc`) and evaluates the stored piecewise-affine
+  law online, so a tick is a tree lookup plus a matrix-vector product.
+
+With warm starting enabled, the osqp-direct backend seeds every solve with
+the previous primal and dual solution shifted forward by one step, which is
+close to optimal whenever the reference changes slowly (e.g. in hover).
+
+With the LQR fast path enabled, a tick first predicts the unconstrained
+optimum, which for a setpoint at an equilibrium is the Riccati feedback
+u = -K (x - r) along the whole horizon (the terminal weight is the Riccati
+solution), and only calls the solver if that prediction leaves the
+constraint set. Near hover most ticks never reach the solver.
+
+For long lookaheads the online backends accept a non-uniform horizon (step
+durations growing along the horizon) and move blocking (inputs held
+constant over blocks of steps), which keep the QP small: a 2 s lookahead
+fits in 20 steps and a handful of input decisions instead of 100 steps.
+
+For trajectory tracking the osqp-direct backend can re-linearize every tick
+along the reference: the reference is completed with the tilt and thrust
+that produce its accelerations, the dynamics are linearized and discretized
+at all horizon steps in one batched call, and the new A_k and B_k values are
+written into the existing QP in place, so OSQP keeps its setup.
+"""
+
+import os
+import time
+
+import numpy as np
+import cvxpy as cp
+import osqp
+from scipy import sparse
+
+from utils.logger import TickLog
+
+from .explicit_mpc import ExplicitLaw
+from .prediction import affine_stages, horizon_stages, lqr_gain, prediction_data, save_npz
+from .quadrotor import QuadrotorModel
+
+DEFAULT_Q = np.diag([10.0, 10.0, 10.0, 1.0, 1.0, 1.0, 0.1, 0.1])
+DEFAULT_R = np.diag([1.0, 1.0, 50.0])
+DEFAULT_U_MIN = np.array([-0.35, -0.35, -0.2])
+DEFAULT_U_MAX = np.array([0.35, 0.35, 0.3])
+DEFAULT_X_MIN = np.array([-np.inf, -np.inf, -np.inf, -2.0, -2.0, -1.5, -0.5, -0.5])
+DEFAULT_X_MAX = np.array([np.inf, np.inf, np.inf, 2.0, 2.0, 1.5, 0.5, 0.5])
+
+ACCEPTED_STATUSES = (cp.OPTIMAL, cp.OPTIMAL_INACCURATE)
+
+# Accepted, but in anytime mode a sign the solver was cut off (e.g. by SCS's
+# time limit) before converging, so the plan may violate the bounds.
+INACCURATE_STATUSES = (cp.OPTIMAL_INACCURATE, "solved inaccurate")
+
+# cvxpy parameters must be finite; unbounded entries are clipped to this value.
+UNBOUNDED = 1e6
+
+# Same tolerances cvxpy passes to OSQP, so both backends agree.
+OSQP_DEFAULT_SETTINGS = {
+    "eps_abs": 1e-5,
+    "eps_rel": 1e-5,
+    "max_iter": 10000,
+    "polishing": True,
+    "verbose": False,
+}
+
+# Position errors beyond this are saturated before the explicit law lookup.
+EXPLICIT_POSITION_RANGE = 1.0
+
+BACKENDS = ("cvxpy", "osqp-direct", "osqp-codegen", "explicit")
+
+# Where the prediction model is linearized: once about hover, or every tick
+# along the reference trajectory.
+LINEARIZATIONS = ("hover", "reference")
+
+# Name of the wall-clock limit option for solvers reachable through cvxpy.
+TIME_LIMIT_OPTIONS = {
+    cp.OSQP: "time_limit",
+    cp.CLARABEL: "time_limit",
+    cp.SCS: "time_limit_secs",
+}
+
+
+def _psd_sqrt(M):
+    """Return L with L @ L.T == M for a symmetric positive semidefinite M."""
+    w, V = np.linalg.eigh(M)
+    return V * np.sqrt(np.clip(w, 0.0, None))
+
+
+def _is_uniform(stages):
+    """True for a horizon of equal steps of length dt with one input per step."""
+    N, M = stages.blocking.shape
+    return N == M and np.all(stages.weights == 1.0)
+
+
+class _CvxpyBackend:
+    """
+    Parametrized cvxpy problem, canonicalized on the first solve only.
+
+    The input variable holds one column per move block; with a uniform,
+    unblocked horizon the problem is written in stacked form. With a
+    `slack_penalty`, state bounds are softened by nonnegative slacks.
+    """
+
+    def __init__(self, stages, Q, R, P, solver, solver_options, warm_start, slack_penalty=None):
+        self.solver = solver
+        self.solver_options = solver_options
+        self.warm_start = warm_start
+        self.solve_time = None
+        self.status = None
+        self.phase_times = (0.0, 0.0, 0.0)
+        self.iterations = None
+        self.slack = None
+
+        N, nx, nu = stages.B.shape
+        M = stages.blocking.shape[1]
+        self._blocking = stages.blocking
+
+        self._x = cp.Variable((nx, N + 1))
+        self._u = cp.Variable((nu, M))
+
+        self._x0 = cp.Parameter(nx, name="x0")
+        self._ref = cp.Parameter((nx, N + 1), name="reference")
+        self._u_min = cp.Parameter(nu, name="u_min")
+        self._u_max = cp.Parameter(nu, name="u_max")
+        self._x_min = cp.Parameter(nx, name="x_min")
+        self._x_max = cp.Parameter(nx, name="x_max")
+
+        err = self._x - self._ref
+        Lq, Lr, Lp = _psd_sqrt(Q), _psd_sqrt(R), _psd_sqrt(P)
+        if _is_uniform(stages):
+            stage_err, inputs = err[:, :N], self._u
+            dynamics = [self._x[:, 1:] == stages.A[0] @ self._x[:, :N] + stages.B[0] @ self._u]
+        else:
+            block_weights = stages.blocking.T @ stages.weights
+            stage_err = err[:, :N] @ np.diag(np.sqrt(stages.weights))
+            inputs = self._u @ np.diag(np.sqrt(block_weights))
+            u = self._u @ stages.blocking.T
+            dynamics = [self._x[:, k + 1] == stages.A[k] @ self._x[:, k] + stages.B[k] @ u[:, k]
+                        for k in range(N)]
+        cost = (cp.sum_squares(Lq.T @ stage_err)
+                + cp.sum_squares(Lr.T @ inputs)
+                + cp.sum_squares(Lp.T @ err[:, N]))
+
+        ones_u, ones_x = np.ones((1, M)), np.ones((1, N))
+        x_min = cp.reshape(self._x_min, (nx, 1), order="F") @ ones_x
+        x_max = cp.reshape(self._x_max, (nx, 1), order="F") @ ones_x
+        if slack_penalty is not None:
+            self._s = cp.Variable((nx, N), nonneg=True)
+            cost = cost + slack_penalty * cp.sum(self._s)
+            x_min, x_max = x_min - self._s, x_max + self._s
+        else:
+            self._s = None
+        constraints = [
+            self._x[:, 0] == self._x0,
+            *dynamics,
+            self._u >= cp.reshape(self._u_min, (nu, 1), order="F") @ ones_u,
+            self._u <= cp.reshape(self._u_max, (nu, 1), order="F") @ ones_u,
+            self._x[:, 1:] >= x_min,
+            self._x[:, 1:] <= x_max,
+        ]
+
+        self.problem = cp.Problem(cp.Minimize(cost), constraints)
+        assert self.problem.is_dpp()
+
+    def set_bounds(self, u_min, u_max, x_min, x_max):
+        self._u_min.value = u_min
+        self._u_max.value = u_max
+        self._x_min.value = x_min
+        self._x_max.value = x_max
+
+    def solve(self, x0, ref):
+        start = time.perf_counter()
+        self._x0.value = x0
+        self._ref.value = ref
+
+        updated = time.perf_counter()
+        self.problem.solve(solver=self.solver, warm_start=self.warm_start,
+                           **self.solver_options)
+        solved = time.perf_counter()
+        self.status = self.problem.status
+        self.phase_times = (updated - start, solved - updated, 0.0)
+        if self.problem.status not in ACCEPTED_STATUSES:
+            raise RuntimeError(f"MPC solve failed with status '{self.problem.status}'")
+        self.solve_time = self.problem.solver_stats.solve_time
+        self.iterations = self.problem.solver_stats.num_iters
+        if self._s is not None:
+            self.slack = self._s.value.T
+        plan = self._x.value.T, self._blocking @ self._u.value.T
+        self.phase_times = (updated - start, solved - updated, time.perf_counter() - solved)
+        return plan
+
+
+class _OSQPDirectBackend:
+    """
+    Sparse QP in OSQP standard form, set up and factorized once.
+
+    Decision vector z = [x_0, ..., x_N, u_0, ..., u_{M-1}] with one input
+    per move block (M = N without blocking). The constraint matrix stacks
+    the dynamics as equalities on top of identity rows for the box bounds on
+    x_1..x_N and u, so only q (reference), l and u (initial state and
+    bounds) depend on the tick.
+
+    Dual vector y = [dynamics rows (N+1 blocks of nx), state bound rows
+    (N blocks of nx), input bound rows (M blocks of nu)]; every block is
+    indexed by horizon step, which is what makes shifting straightforward.
+    Shifting only applies to a uniform, unblocked horizon; otherwise OSQP
+    starts from the unshifted previous solution.
+
+    With a `slack_penalty`, z gains slacks s_1..s_N (N blocks of nx) and the
+    state bound rows become x_k + s_k >= x_min and x_k - s_k <= x_max,
+    followed by the input rows and s_k >= 0.
+
+    With `time_varying`, every A_k and B_k block is stored densely (explicit
+    zeros included), so `set_dynamics` can overwrite their values in place
+    through OSQP's ``Ax`` update and move the affine terms into l and u
+    without changing the sparsity pattern. `nmpc.RTIMPCController` solves
+    its linearizations with this backend as well.
+    """
+
+    def __init__(self, stages, Q, R, P, settings, bounds, warm_start, slack_penalty=None,
+                 time_varying=False):
+        N, nx, nu = stages.B.shape
+        M = stages.blocking.shape[1]
+        self.horizon, self.nx, self.nu = N, nx, nu
+        self.warm_start = warm_start
+        self.solve_time = None
+        self.status = None
+        self.phase_times = (0.0, 0.0, 0.0)
+        self.iterations = None
+        self.slack = None
+        self._A, self._B = stages.A[-1], stages.B[-1]
+        self._Q, self._R, self._P = Q, R, P
+        self._weights = stages.weights
+        self._blocking = stages.blocking
+        self._shift = _is_uniform(stages)
+        self._soft = slack_penalty is not None
+        self._z = None
+        self._y = None
+
+        n_x = (N + 1) * nx
+        n_var = n_x + M * nu
+        self._n_x = n_x
+        self._n_xu = n_var
+        # (blocks, block size) of every group in z and y, in order.
+        self._z_groups = [(N + 1, nx), (M, nu)]
+        self._y_groups = [(N + 1, nx), (N, nx), (M, nu)]
+        if self._soft:
+            self._z_groups.append((N, nx))
+            self._y_groups = [(N + 1, nx), (N, nx), (N, nx), (M, nu), (N, nx)]
+
+        block_weights = stages.blocking.T @ stages.weights
+        P_qp = sparse.block_diag([sparse.kron(sparse.diags(stages.weights), Q), P,
+                                  sparse.kron(sparse.diags(block_weights), R)], format="csc")
+        # Time-varying blocks are built from all-ones patterns so that no
+        # entry is dropped as zero; the real values are written below.
+        A_blocks = np.ones_like(stages.A) if time_varying else stages.A
+        B_blocks = np.ones_like(stages.B) if time_varying else stages.B
+        Ax = (sparse.kron(sparse.eye(N + 1), -sparse.eye(nx))
+              + sparse.bmat([[None, sparse.csc_matrix((nx, nx))],
+                             [sparse.block_diag(A_blocks), None]]))
+        Bu = sparse.vstack([sparse.csc_matrix((nx, M * nu)),
+                            sparse.block_diag(B_blocks) @ sparse.kron(stages.blocking,
+                                                                      sparse.eye(nu))])
+        A_eq = sparse.hstack([Ax, Bu])
+        A_ineq = sparse.eye(n_var, format="csr")[nx:]
+        if self._soft:
+            n_s = N * nx
+            I_s, x_rows = sparse.eye(n_s), A_ineq[:n_s]
+            A_eq = sparse.hstack([A_eq, sparse.csc_matrix((n_x, n_s))])
+            A_ineq = sparse.bmat([[x_rows, I_s], [x_rows, -I_s],
+                                  [A_ineq[n_s:], None], [None, I_s]])
+            P_qp = sparse.block_diag([P_qp, sparse.csc_matrix((n_s, n_s))], format="csc")
+            # OSQP minimizes half the documented cost, so the penalty is halved too.
+            q_slack = np.full(n_s, 0.5 * slack_penalty)
+            n_var += n_s
+        A_qp = sparse.vstack([A_eq, A_ineq], format="csc")
+        self._P_qp, self._A_qp = sparse.triu(P_qp, format="csc"), A_qp
+        self._Ax = None
+        self._dynamics_changed = False
+        if time_varying:
+            self._Ax = A_qp.data
+            self._ab_idx = self._dynamics_positions(A_qp, stages.blocking)
+            self._Ax[self._ab_idx] = np.concatenate([stages.A.ravel(), stages.B.ravel()])
+
+        self._q = np.zeros(n_var)
+        if self._soft:
+            self._q[self._n_xu:] = q_slack
+        self._l = np.zeros(A_qp.shape[0])
+        self._u = np.zeros(A_qp.shape[0])
+        self.set_bounds(*bounds)
+
+        self._solver = osqp.OSQP()
+        self._settings = {**settings, "warm_starting": warm_start}
+        self._solver.setup(self._P_qp, self._q, A_qp, self._l, self._u, **self._settings)
+
+    def _dynamics_positions(self, A_qp, blocking):
+        """Indices into ``A_qp.data`` of the A_k entries, then the B_k entries, row-major."""
+        N, nx, nu = self.horizon, self.nx, self.nu
+        k, i, j = np.indices((N, nx, nx)).reshape(3, -1)
+        a_rows, a_cols = (k + 1) * nx + i, k * nx + j
+        k, i, j = np.indices((N, nx, nu)).reshape(3, -1)
+        block = np.argmax(blocking, axis=1)
+        b_rows, b_cols = (k + 1) * nx + i, self._n_x + block[k] * nu + j
+        # Same pattern with 1-based storage positions as values.
+        lookup = sparse.csc_matrix((np.arange(1.0, A_qp.nnz + 1), A_qp.indices, A_qp.indptr),
+                                   shape=A_qp.shape)
+        positions = lookup[np.concatenate([a_rows, b_rows]), np.concatenate([a_cols, b_cols])]
+        return np.asarray(positions).ravel().astype(int) - 1
+
+    def set_dynamics(self, A, B, c):
+        """Overwrite the stage dynamics with x_{k+1} = A[k] x_k + B[k] u_k + c[k]."""
+        nx = self.nx
+        self._Ax[self._ab_idx] = np.concatenate([A.ravel(), B.ravel()])
+        self._l[nx:self._n_x] = self._u[nx:self._n_x] = -c.ravel()
+        self._A, self._B = A[-1], B[-1]
+        # Sent with the next solve's vector update: a separate Ax update
+        # costs OSQP extra iterations from the same warm start.
+        self._dynamics_changed = True
+
+    def set_bounds(self, u_min, u_max, x_min, x_max):
+        N, M, n_eq = self.horizon, self._blocking.shape[1], self._n_x
+        if not self._soft:
+            self._l[n_eq:] = np.concatenate([np.tile(x_min, N), np.tile(u_min, M)])
+            self._u[n_eq:] = np.concatenate([np.tile(x_max, N), np.tile(u_max, M)])
+            return
+        inf, zero = np.full(N * self.nx, np.inf), np.zeros(N * self.nx)
+        self._l[n_eq:] = np.concatenate([np.tile(x_min, N), -inf, np.tile(u_min, M), zero])
+        self._u[n_eq:] = np.concatenate([inf, np.tile(x_max, N), np.tile(u_max, M), inf])
+
+    @staticmethod
+    def _shift_groups(v, groups):
+        """Split `v` into its block groups, each advanced by one block (last one repeated)."""
+        shifted, start = [], 0
+        for count, size in groups:
+            blocks = v[start:start + count * size].reshape(count, size)
+            shifted.append(np.vstack([blocks[1:], blocks[-1:]]))
+            start += count * size
+        return shifted
+
+    def _shifted_warm_start(self):
+        """Previous primal/dual solution advanced by one horizon step."""
+        z = self._shift_groups(self._z, self._z_groups)
+        x, u = z[0], z[1]
+        x[-1] = self._A @ x[-1] + self._B @ u[-1]
+        y = self._shift_groups(self._y, self._y_groups)
+        return np.concatenate([g.ravel() for g in z]), np.concatenate([g.ravel() for g in y])
+
+    def _update_vectors(self, x0, ref, u_ref):
+        N, nx = self.horizon, self.nx
+        self._q[:N * nx] = -(self._Q @ ref[:, :N] * self._weights).T.ravel()
+        self._q[N * nx:self._n_x] = -self._P @ ref[:, N]
+        if u_ref is not None:
+            # Per-step input references, summed over each move block.
+            block_ref = self._blocking.T @ (self._weights[:, None] * u_ref)
+            self._q[self._n_x:self._n_xu] = -(block_ref @ self._R).ravel()
+        self._l[:nx] = self._u[:nx] = -x0
+
+    def solve(self, x0, ref, u_ref=None, guess=None):
+        """
+        Solve for initial state `x0` and reference `ref` (nx, N + 1); returns
+        (x_plan, u_plan). A primal `guess` z replaces the shifted warm start.
+        """
+        N, nx = self.horizon, self.nx
+        start = time.perf_counter()
+        self._update_vectors(x0, ref, u_ref)
+        matrices = {"Ax": self._Ax} if self._dynamics_changed else {}
+        self._solver.update(q=self._q, l=self._l, u=self._u, **matrices)
+        self._dynamics_changed = False
+        if guess is not None:
+            self._solver.warm_start(x=guess)
+        elif self.warm_start and self._shift and self._z is not None:
+            self._z, self._y = self._shifted_warm_start()
+            self._solver.warm_start(self._z, self._y)
+        updated = time.perf_counter()
+        result = self._solver.solve(raise_error=False)
+        solved = time.perf_counter()
+        self.solve_time = result.info.run_time
+        self.iterations = result.info.iter
+        self.status = result.info.status
+        self.phase_times = (updated - start, solved - updated, 0.0)
+        if result.info.status_val not in (osqp.SolverStatus.OSQP_SOLVED,
+                                          osqp.SolverStatus.OSQP_SOLVED_INACCURATE):
+            # The shifted guess stays in place, so a run of failed ticks keeps
+            # warm-starting from the last good plan.
+            raise RuntimeError(f"MPC solve failed with status '{result.info.status}'")
+
+        self._z, self._y = result.x, result.y
+        z = result.x
+        if self._soft:
+            self.slack = z[self._n_xu:].reshape(N, nx)
+        plan = (z[:self._n_x].reshape(N + 1, nx),
+                self._blocking @ z[self._n_x:self._n_xu].reshape(-1, self.nu))
+        self.phase_times = (updated - start, solved - updated, time.perf_counter() - solved)
+        return plan
+
+
+class _OSQPCodegenBackend(_OSQPDirectBackend):
+    """
+    The osqp-direct QP solved by OSQP-generated C code (see `controllers.codegen`).
+
+    The QP is set up as for osqp-direct, then exported and compiled into an
+    extension module in `directory` (or loaded from there if already built).
+    Per tick only q, l and u are sent. The generated solver reports no
+    status, so a solution is accepted if it satisfies the constraints to
+    within `feasibility_tol` and the iteration limit was not hit. The
+    embedded solver warm-starts from its previous solution by itself but
+    cannot be seeded with a shifted guess.
+    """
+
+    def __init__(self, stages, Q, R, P, settings, bounds, warm_start, slack_penalty, directory,
+                 feasibility_tol=1e-3):
+        super().__init__(stages, Q, R, P, settings, bounds, warm_start, slack_penalty)
+        from .codegen import build_module
+
+        self._module = build_module(self._solver, self._P_qp, self._A_qp, self._settings,
+                                    directory)
+        self._max_iter = self._settings["max_iter"]
+        self.feasibility_tol = feasibility_tol
+
+    def solve(self, x0, ref, u_ref=None):
+        N, nx = self.horizon, self.nx
+        start = time.perf_counter()
+        self._update_vectors(x0, ref, u_ref)
+        # The generated code takes the bounds as given; OSQP's Python interface
+        # would clamp infinite ones to OSQP_INFTY, so do that here.
+        infinity = osqp.constant("OSQP_INFTY")
+        self._module.update_data_vec(q=self._q, l=np.maximum(self._l, -infinity),
+                                     u=np.minimum(self._u, infinity))
+        updated = time.perf_counter()
+        z, _, _, iterations, _ = self._module.solve()
+        solved = time.perf_counter()
+        self.solve_time = solved - updated
+        self.iterations = iterations
+
+        Az = self._A_qp @ z
+        residual = np.max(np.maximum(self._l - Az, Az - self._u), initial=0.0)
+        if not residual <= self.feasibility_tol or iterations >= self._max_iter:
+            self.status = "failed"
+            self.phase_times = (updated - start, solved - updated, 0.0)
+            raise RuntimeError(f"MPC solve failed: constraint residual {residual:.3g} "
+                               f"after {iterations} iterations")
+        self.status = "solved"
+        if self._soft:
+            self.slack = z[self._n_xu:].reshape(N, nx)
+        plan = (z[:self._n_x].reshape(N + 1, nx),
+                self._blocking @ z[self._n_x:self._n_xu].reshape(-1, self.nu))
+        self.phase_times = (updated - start, solved - updated, time.perf_counter() - solved)
+        return plan
+
+
+def _decoupled_subsystems(A, B, Q, R, P, tol=1e-9):
+    """
+    Split the problem into independent (state indices, input indices) groups.
+
+    Two variables belong to the same group if any of A, B, Q, R or P couples
+    them; with box constraints, the QP then separates into one QP per group.
+    """
+    nx, nu = B.shape
+    parent = list(range(nx + nu))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def couple(M, row_offset, col_offset):
+        for i, j in zip(*np.nonzero(np.abs(M) > tol * np.abs(M).max())):
+            parent[find(i + row_offset)] = find(j + col_offset)
+
+    for M in (A, Q, P):
+        couple(M, 0, 0)
+    couple(B, 0, nx)
+    couple(R, nx, nx)
+
+    groups = {}
+    for i in range(nx + nu):
+        groups.setdefault(find(i), []).append(i)
+    subsystems = []
+    for members in groups.values():
+        states = [i for i in members if i < nx]
+        inputs = [i - nx for i in members if i >= nx]
+        if states and inputs:
+            subsystems.append((np.array(states), np.array(inputs)))
+    return subsystems
+
+
+class _ExplicitBackend:
+    """
+    Offline-solved piecewise-affine MPC law, one per decoupled subsystem.
+
+    The law is parametrized by the tracking error x_0 - r_0, which is exact
+    for hover setpoints since the hover model is invariant to translation.
+    State bounds therefore apply to the error; position errors are saturated
+    to the parameter box. Laws are cached in an .npz file at `path` together
+    with the problem data they were built from, and rebuilt on mismatch.
+    """
+
+    def __init__(self, prediction, Q, R, horizon, bounds, path=None):
+        A, B, P = prediction.A, prediction.B, prediction.P
+        self.horizon = horizon
+        self.nx, self.nu = B.shape
+        self.solve_time = None
+        self.status = None
+        self.phase_times = (0.0, 0.0, 0.0)
+        self.iterations = 0
+        u_min, u_max, x_min, x_max = bounds
+
+        finite = np.abs(x_max) < UNBOUNDED
+        self.theta_max = np.where(finite, x_max, EXPLICIT_POSITION_RANGE)
+        self.theta_min = np.where(np.abs(x_min) < UNBOUNDED, x_min, -EXPLICIT_POSITION_RANGE)
+
+        self._Phi = np.vstack([np.eye(self.nx), prediction.Phi])
+        self._Gamma = np.vstack([np.zeros((self.nx, prediction.Gamma.shape[1])),
+                                 prediction.Gamma])
+
+        key = np.concatenate([M.ravel() for M in (A, B, Q, R, P)]
+                             + [[horizon], u_min, u_max, x_min, x_max])
+        self.subsystems = self._load(path, key)
+        if self.subsystems is None:
+            self.subsystems = []
+            for states, inputs in _decoupled_subsystems(A, B, Q, R, P):
+                sx, su = np.ix_(states, states), np.ix_(inputs, inputs)
+                law = ExplicitLaw.build(A[sx], B[np.ix_(states, inputs)], Q[sx], R[su], P[sx],
+                                        horizon, u_min[inputs], u_max[inputs],
+                                        x_min[states], x_max[states],
+                                        self.theta_min[states], self.theta_max[states])
+                self.subsystems.append((states, inputs, law))
+            if path is not None:
+                self._save(path, key)
+
+    def _load(self, path, key):
+        if path is None or not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if data["key"].shape != key.shape or not np.allclose(data["key"], key):
+                return None
+            return [(data[f"states{i}"], data[f"inputs{i}"],
+                     ExplicitLaw.from_arrays({name: data[f"law{i}_{name}"]
+                                              for name in ExplicitLaw.FIELDS}))
+                    for i in range(int(data["n_subsystems"]))]
+
+    def _save(self, path, key):
+        arrays = {"key": key, "n_subsystems": len(self.subsystems)}
+        for i, (states, inputs, law) in enumerate(self.subsystems):
+            arrays[f"states{i}"] = states
+            arrays[f"inputs{i}"] = inputs
+            arrays.update({f"law{i}_{name}": value for name, value in law.arrays().items()})
+        save_npz(path, **arrays)
+
+    @property
+    def n_regions(self):
+        """Number of critical regions per subsystem."""
+        return [len(law) for _, _, law in self.subsystems]
+
+    def set_bounds(self, u_min, u_max, x_min, x_max):
+        raise ValueError("bounds are compiled into the explicit MPC law; "
+                         "build a new controller to change them")
+
+    def solve(self, x0, ref):
+        start = time.perf_counter()
+        if np.any(ref != ref[:, :1]):
+            raise ValueError("the explicit backend only tracks constant setpoints")
+        theta = np.clip(x0 - ref[:, 0], self.theta_min, self.theta_max)
+
+        updated = time.perf_counter()
+        U = np.zeros((self.horizon, self.nu))
+        for states, inputs, law in self.subsystems:
+            U_sub = law.evaluate(theta[states])
+            if U_sub is None:
+                self.status = "infeasible"
+                self.phase_times = (updated - start, time.perf_counter() - updated, 0.0)
+                raise RuntimeError("MPC solve failed: state outside the explicit MPC feasible set")
+            U[:, inputs] = U_sub.reshape(self.horizon, len(inputs))
+
+        solved = time.perf_counter()
+        x_plan = (self._Phi @ x0 + self._Gamma @ U.ravel()).reshape(self.horizon + 1, self.nx)
+        self.solve_time = time.perf_counter() - start
+        self.status = "solved"
+        self.phase_times = (updated - start, solved - updated, time.perf_counter() - solved)
+        return x_plan, U
+
+
+class MPCController:
+    """
+    Linear MPC around hover.
+
+    Minimizes sum_k (x_k - r_k)' Q (x_k - r_k) + u_k' R u_k over the horizon,
+    with the discrete-time Riccati solution as terminal weight, subject to the
+    discretized hover dynamics and box bounds on inputs and predicted states.
+
+    `backend` selects how the QP is solved (see `BACKENDS`). For ``"cvxpy"``,
+    `solver` names the cvxpy solver and `solver_options` are passed to
+    `Problem.solve`; for ``"osqp-direct"``, `solver_options` override
+    `OSQP_DEFAULT_SETTINGS`.
+
+    `warm_start` seeds each solve with the previous solution. The osqp-direct
+    backend shifts the primal and dual iterates by one step first; through
+    cvxpy, OSQP is warm-started with the unshifted previous solution (cvxpy
+    does not expose the iterates), and interior-point solvers such as
+    Clarabel ignore it.
+
+    The ``"explicit"`` backend is built offline at construction, which takes
+    seconds for short horizons and grows quickly with the horizon; pass
+    `explicit_path` to cache the law in an .npz file. Its bounds are fixed.
+
+    With a `time_budget` (seconds) the controller runs in anytime mode: the
+    solver gets that wall-clock limit (iterations can be capped as well via
+    ``max_iter`` in `solver_options`), and a tick that produces no solution
+    emits the next input of the previous plan, shifted by one step, instead
+    of raising. Inaccurate solutions count as no solution there, since a
+    solver stopped by its time limit may report one. `ticks`,
+    `deadline_misses` (no accurate solution within the budget, or one that
+    took longer), `infeasible_ticks` (the solver proved the problem
+    infeasible) and `fallbacks` (previous plan used) count what happened.
+
+    The discretized model, terminal weight and prediction matrices come from
+    `controllers.prediction`, cached in memory and, with `cache_dir`, on disk.
+
+    The ``"osqp-codegen"`` backend compiles the osqp-direct QP into an
+    extension module in `codegen_dir` (default: ``codegen`` under
+    `cache_dir`) on first use, which takes seconds and needs a C compiler
+    and pybind11; later controllers with the same QP load the built module.
+    `export_codegen` does the same for an existing osqp-direct controller.
+    It solves with the osqp-direct settings but has no time limit, so it
+    does not support a `time_budget`.
+
+    `step_durations` (one per horizon step, the first equal to `dt`) makes
+    the horizon non-uniform; stage costs are weighted by duration / dt and
+    trajectory references must be sampled at `step_times`. `move_blocks`
+    (step counts summing to the horizon) holds the input constant over each
+    block. Neither is supported by the explicit backend, and both disable
+    the shifted warm start of the osqp-direct backend.
+
+    With a `slack_penalty`, the state bounds become soft: each predicted
+    state may exceed its bounds by a nonnegative slack that costs
+    `slack_penalty` per unit (an exact L1 penalty), so a tick whose hard
+    bounds are infeasible, e.g. after a gust pushed the velocity out of
+    range, still returns in one solve. As long as the penalty exceeds the
+    bound multipliers, feasible ticks give the same solution as hard bounds.
+    Input bounds stay hard. `constraint_violation` reports the largest slack
+    of the last solve. Not supported by the explicit backend.
+
+    `lqr_fast_path` skips the solver whenever the reference is a constant
+    equilibrium setpoint and the Riccati feedback's predicted states and
+    inputs stay within all bounds, which makes it the exact MPC solution.
+    `fast_path_ticks` counts those ticks. Needs a uniform, unblocked horizon.
+
+    `linearization="reference"` (osqp-direct only) re-linearizes the model
+    every tick along the reference trajectory instead of using the hover
+    model. The reference attitudes are replaced by the trim attitudes for
+    the reference accelerations and the input cost penalizes deviations
+    from the trim inputs; at a hover setpoint this is the hover model.
+    `linearize_time` reports the seconds spent linearizing in the last tick.
+
+    Every tick is recorded in `tick_log`, a `utils.logger.TickLog` ring
+    buffer of the last `tick_log_size` ticks (None disables it): wall-clock
+    time of the parameter update (including any linearization), the solve
+    and the solution extraction, solver iterations and status (the solver's
+    own status string, ``"fast path"``, or ``"fallback: <status>"`` in
+    anytime mode). `utils.logger` summarizes and exports it.
+    """
+
+    def __init__(self, model=None, dt=0.02, horizon=20, Q=None, R=None,
+                 u_min=None, u_max=None, x_min=None, x_max=None,
+                 solver=cp.OSQP, solver_options=None, backend="cvxpy",
+                 warm_start=True, explicit_path=None, time_budget=None, cache_dir=None,
+                 step_durations=None, move_blocks=None, slack_penalty=None,
+                 lqr_fast_path=False, linearization="hover", codegen_dir=None,
+                 tick_log_size=4096):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend '{backend}', expected one of {BACKENDS}")
+        if linearization not in LINEARIZATIONS:
+            raise ValueError(f"unknown linearization '{linearization}', "
+                             f"expected one of {LINEARIZATIONS}")
+        if linearization == "reference" and backend != "osqp-direct":
+            raise ValueError("linearization along the reference needs the osqp-direct backend")
+        if backend == "osqp-codegen":
+            if time_budget is not None:
+                raise ValueError("the osqp-codegen backend does not support a time budget")
+            if codegen_dir is None and cache_dir is None:
+                raise ValueError("the osqp-codegen backend needs codegen_dir or cache_dir")
+        self.codegen_dir = codegen_dir if codegen_dir is not None or cache_dir is None \
+            else os.path.join(cache_dir, "codegen")
+        self.model = model if model is not None else QuadrotorModel()
+        self.dt = float(dt)
+        self.horizon = int(horizon)
+        self.Q = np.asarray(DEFAULT_Q if Q is None else Q, dtype=float)
+        self.R = np.asarray(DEFAULT_R if R is None else R, dtype=float)
+        self.solver = solver
+        self.solver_options = dict(solver_options or {})
+        self.backend = backend
+        self.warm_start = bool(warm_start)
+        self.explicit_path = explicit_path
+        self.time_budget = None if time_budget is None else float(time_budget)
+        self.slack_penalty = None if slack_penalty is None else float(slack_penalty)
+        self.linearization = linearization
+        self.linearize_time = None
+
+        self.prediction = prediction_data(self.model, self.dt, self.horizon, self.Q, self.R,
+                                          cache_dir)
+        self.A, self.B, self.P = self.prediction.A, self.prediction.B, self.prediction.P
+        self.nx, self.nu = self.B.shape
+
+        self.step_durations = np.full(self.horizon, self.dt) if step_durations is None \
+            else np.asarray(step_durations, dtype=float)
+        self.move_blocks = np.ones(self.horizon, dtype=int) if move_blocks is None \
+            else np.asarray(move_blocks, dtype=int)
+        if self.step_durations.shape != (self.horizon,) or self.step_durations[0] != self.dt \
+                or np.any(self.step_durations <= 0):
+            raise ValueError(f"step_durations must be {self.horizon} positive durations "
+                             f"starting with dt={self.dt}")
+        if self.move_blocks.sum() != self.horizon or np.any(self.move_blocks < 1):
+            raise ValueError(f"move_blocks must be positive step counts summing to {self.horizon}")
+        self.step_times = np.concatenate([[0.0], np.cumsum(self.step_durations)])
+        self.stages = horizon_stages(self.model, self.dt, self.step_durations, self.move_blocks)
+
+        self.K = lqr_gain(self.A, self.B, self.R, self.P)
+        self.lqr_fast_path = bool(lqr_fast_path)
+        if self.lqr_fast_path:
+            if not _is_uniform(self.stages):
+                raise ValueError("the LQR fast path needs a uniform horizon without move blocking")
+            # Rows k*nx..(k+1)*nx hold (A - B K)^k, so x_k - r = closed_loop[k] @ (x_0 - r).
+            closed_loop = [np.eye(self.nx)]
+            for _ in range(self.horizon):
+                closed_loop.append((self.A - self.B @ self.K) @ closed_loop[-1])
+            self._closed_loop = np.vstack(closed_loop)
+        self._fast_path_time = None
+
+        self.u_min = self.u_max = self.x_min = self.x_max = None
+        self._backend = None
+        self.set_bounds(
+            u_min=DEFAULT_U_MIN if u_min is None else u_min,
+            u_max=DEFAULT_U_MAX if u_max is None else u_max,
+            x_min=DEFAULT_X_MIN if x_min is None else x_min,
+            x_max=DEFAULT_X_MAX if x_max is None else x_max,
+        )
+        self._backend = self._make_backend()
+
+        self.x_plan = None
+        self.u_plan = None
+        self.tick_log = None if tick_log_size is None else TickLog(tick_log_size)
+        self.reset_counters()
+
+    def _make_backend(self):
+        bounds = (self.u_min, self.u_max, self.x_min, self.x_max)
+        if self.backend == "explicit":
+            if not _is_uniform(self.stages):
+                raise ValueError("the explicit backend needs a uniform horizon without "
+                                 "move blocking")
+            if self.slack_penalty is not None:
+                raise ValueError("the explicit backend does not support soft constraints")
+            return _ExplicitBackend(self.prediction, self.Q, self.R,
+                                    self.horizon, bounds, self.explicit_path)
+        options = dict(self.solver_options)
+        if self.backend == "osqp-codegen":
+            settings = {**OSQP_DEFAULT_SETTINGS, **options}
+            return _OSQPCodegenBackend(self.stages, self.Q, self.R, self.P, settings, bounds,
+                                       self.warm_start, self.slack_penalty, self.codegen_dir)
+        if self.backend == "osqp-direct":
+            if self.time_budget is not None:
+                options.setdefault("time_limit", self.time_budget)
+            settings = {**OSQP_DEFAULT_SETTINGS, **options}
+            return _OSQPDirectBackend(self.stages, self.Q, self.R, self.P,
+                                      settings, bounds, self.warm_start, self.slack_penalty,
+                                      time_varying=self.linearization == "reference")
+        if self.time_budget is not None and self.solver in TIME_LIMIT_OPTIONS:
+            options.setdefault(TIME_LIMIT_OPTIONS[self.solver], self.time_budget)
+        backend = _CvxpyBackend(self.stages, self.Q, self.R, self.P,
+                                self.solver, options, self.warm_start, self.slack_penalty)
+        backend.set_bounds(*bounds)
+        return backend
+
+    @classmethod
+    def from_config(cls, config, model=None):
+        """
+        Build a controller from the ``mpc`` section of a YAML config.
+
+        `Q` and `R` may be given as diagonals and `step_durations` as
+        ``[count, duration]`` runs; every other key maps to the constructor
+        argument of the same name.
+        """
+        return cls(model=model, **cls.config_kwargs(config))
+
+    @staticmethod
+    def config_kwargs(config):
+        """Constructor keyword arguments for a config section (see `from_config`)."""
+        kwargs = dict(config)
+        for key in ("Q", "R"):
+            if key in kwargs and np.ndim(kwargs[key]) == 1:
+                kwargs[key] = np.diag(kwargs[key])
+        if np.ndim(kwargs.get("step_durations")) == 2:
+            kwargs["step_durations"] = [duration for count, duration in kwargs["step_durations"]
+                                        for _ in range(int(count))]
+        return kwargs
+
+    @classmethod
+    def autoselect(cls, accuracy=0.01, candidates=None, episode=None, **kwargs):
+        """
+        Benchmark the solver backends on a closed-loop episode and return a
+        controller using the fastest one within `accuracy` of the best
+        tracking cost (see `controllers.solver_selection`).
+        """
+        from .solver_selection import DEFAULT_CANDIDATES, benchmark_solvers, select_solver
+
+        results = benchmark_solvers(DEFAULT_CANDIDATES if candidates is None else candidates,
+                                    episode, **kwargs)
+        best = select_solver(results, accuracy)
+        return cls(**{**kwargs, **best.kwargs})
+
+    def export_codegen(self, directory):
+        """
+        Generate and compile this controller's QP as an OSQP extension module.
+
+        Needs the osqp-direct backend; returns the imported module. A
+        controller built with ``backend="osqp-codegen"`` and the same
+        settings and ``codegen_dir=directory`` loads it instead of building.
+        """
+        if self.backend != "osqp-direct" or self.linearization != "hover":
+            raise ValueError("code generation needs the osqp-direct backend with the hover model")
+        from .codegen import build_module
+
+        backend = self._backend
+        return build_module(backend._solver, backend._P_qp, backend._A_qp, backend._settings,
+                            directory)
+
+    @property
+    def problem(self):
+        """The underlying cvxpy problem (built once, reused every tick)."""
+        if self.backend != "cvxpy":
+            raise AttributeError(f"backend '{self.backend}' has no cvxpy problem")
+        return self._backend.problem
+
+    @property
+    def solve_time(self):
+        """Solver-reported time of the last solve (fast path: its own time) in seconds."""
+        if self._fast_path_time is not None:
+            return self._fast_path_time
+        return self._backend.solve_time
+
+    @property
+    def iterations(self):
+        """Solver iteration count of the last solve (0 on the fast path)."""
+        if self._fast_path_time is not None:
+            return 0
+        return self._backend.iterations
+
+    @property
+    def constraint_violation(self):
+        """Largest state-bound slack of the last solve (0 with hard bounds)."""
+        slack = getattr(self._backend, "slack", None)
+        if slack is None or self._fast_path_time is not None:
+            return 0.0
+        return float(max(slack.max(), 0.0))
+
+    @property
+    def fast_path_rate(self):
+        """Fraction of ticks answered by the LQR fast path."""
+        return self.fast_path_ticks / self.ticks if self.ticks else 0.0
+
+    @property
+    def deadline_miss_rate(self):
+        """Fraction of ticks without a fresh solution within the time budget."""
+        return self.deadline_misses / self.ticks if self.ticks else 0.0
+
+    def reset_counters(self):
+        """Zero the tick, deadline-miss, infeasibility, fallback and fast-path counters."""
+        self.ticks = 0
+        self.deadline_misses = 0
+        self.infeasible_ticks = 0
+        self.fallbacks = 0
+        self.fast_path_ticks = 0
+
+    def set_bounds(self, u_min=None, u_max=None, x_min=None, x_max=None):
+        """Update any of the box constraints without rebuilding the problem."""
+        def clipped(value, size):
+            value = np.broadcast_to(np.asarray(value, dtype=float), (size,))
+            return np.clip(value, -UNBOUNDED, UNBOUNDED)
+
+        if u_min is not None:
+            self.u_min = clipped(u_min, self.nu)
+        if u_max is not None:
+            self.u_max = clipped(u_max, self.nu)
+        if x_min is not None:
+            self.x_min = clipped(x_min, self.nx)
+        if x_max is not None:
+            self.x_max = clipped(x_max, self.nx)
+        if self._backend is not None:
+            self._backend.set_bounds(self.u_min, self.u_max, self.x_min, self.x_max)
+
+    def _reference_matrix(self, reference):
+        """Expand a setpoint (nx,) or trajectory (N+1, nx) into an (nx, N+1) array."""
+        ref = np.asarray(reference, dtype=float)
+        if ref.ndim == 1:
+            return np.repeat(ref[:, None], self.horizon + 1, axis=1)
+        if ref.shape != (self.horizon + 1, self.nx):
+            raise ValueError(f"reference must have shape ({self.nx},) or "
+                             f"({self.horizon + 1}, {self.nx}), got {ref.shape}")
+        return ref.T
+
+    def compute(self, state, reference):
+        """
+        Solve the MPC problem for the current state and return the first input.
+
+        `reference` is either a single target state or a trajectory with one
+        row per horizon step (including the initial one), sampled at
+        `step_times` relative to now.
+        """
+        tick_start = time.perf_counter()
+        x0 = np.asarray(state, dtype=float)
+        ref = self._reference_matrix(reference)
+        self.ticks += 1
+        self._fast_path_time = None
+        self.linearize_time = None
+        plan = self._lqr_plan(x0, ref) if self.lqr_fast_path else None
+        extra = {}
+        if plan is None and self.linearization == "reference":
+            ref, extra["u_ref"] = self._linearize(ref)
+        if plan is not None:
+            self.fast_path_ticks += 1
+            x_plan, u_plan = plan
+        elif self.time_budget is None:
+            try:
+                x_plan, u_plan = self._backend.solve(x0, ref, **extra)
+            except RuntimeError:
+                self._record_tick(tick_start)
+                raise
+        else:
+            start = time.perf_counter()
+            try:
+                x_plan, u_plan = self._backend.solve(x0, ref, **extra)
+            except RuntimeError:
+                return self._fall_back(tick_start, self._backend.status)
+            except cp.error.SolverError:
+                return self._fall_back(tick_start, "solver error")
+            if self._backend.status in INACCURATE_STATUSES:
+                return self._fall_back(tick_start, self._backend.status)
+            if time.perf_counter() - start > self.time_budget:
+                self.deadline_misses += 1
+
+        self.x_plan = x_plan.copy()
+        self.u_plan = u_plan.copy()
+        self._record_tick(tick_start)
+        return self.u_plan[0].copy()
+
+    def _record_tick(self, start, status=None):
+        """Add the tick that started at `start` to the tick log."""
+        if self.tick_log is None:
+            return
+        if self._fast_path_time is not None:
+            update, solve, extract = 0.0, self._fast_path_time, 0.0
+            iterations, status = 0, "fast path"
+        else:
+            update, solve, extract = self._backend.phase_times
+            update += self.linearize_time or 0.0
+            iterations = self._backend.iterations or 0
+            status = self._backend.status if status is None else status
+        self.tick_log.record(update, solve, extract, time.perf_counter() - start,
+                             iterations, status)
+
+    def _linearize(self, ref):
+        """
+        Complete `ref` with trim attitudes, load the dynamics linearized along
+        it into the backend and return the completed reference and the trim
+        inputs (N, nu).
+        """
+        start = time.perf_counter()
+        X = ref.T.copy()
+        accel = np.diff(X[:, 3:6], axis=0) / self.step_durations[:, None]
+        U = self.model.trim_inputs(accel)
+        X[:-1, 6:8] = U[:, :2]
+        X[-1, 6:8] = U[-1, :2]
+        self._backend.set_dynamics(*affine_stages(self.model, X[:-1], U, self.step_durations))
+        self.linearize_time = time.perf_counter() - start
+        return X.T, U
+
+    def _lqr_plan(self, x0, ref, tol=1e-9):
+        """Riccati-feedback plan if it is the constrained optimum, else None."""
+        start = time.perf_counter()
+        r = ref[:, 0]
+        if np.any(ref != ref[:, :1]) or not np.allclose(self.A @ r, r):
+            return None
+        err = (self._closed_loop @ (x0 - r)).reshape(self.horizon + 1, self.nx)
+        u_plan = -err[:-1] @ self.K.T
+        x_plan = err + r
+        if (np.any(u_plan < self.u_min - tol) or np.any(u_plan > self.u_max + tol)
+                or np.any(x_plan[1:] < self.x_min - tol) or np.any(x_plan[1:] > self.x_max + tol)):
+            return None
+        self._fast_path_time = time.perf_counter() - start
+        return x_plan, u_plan
+
+    def _fall_back(self, tick_start, status):
+        """Count a tick without a usable solution, log it and return the fallback input."""
+        if "infeasible" in status:
+            self.infeasible_ticks += 1
+        else:
+            self.deadline_misses += 1
+        u = self._fallback()
+        self._record_tick(tick_start, f"fallback: {status}")
+        return u
+
+    def _fallback(self):
+        """Advance the previous plan by one step and return its next input (hover if none)."""
+        self.fallbacks += 1
+        if self.u_plan is None:
+            return np.zeros(self.nu)
+        self.x_plan = np.vstack([self.x_plan[1:], self.x_plan[-1:]])
+        self.u_plan = np.vstack([self.u_plan[1:], self.u_plan[-1:]])
+        return self.u_plan[0].copy()
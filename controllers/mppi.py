@@ -0,0 +1,119 @@
+"""
+Model predictive path integral (MPPI) control with batched rollouts.
+
+Every tick perturbs the nominal input sequence with Gaussian noise, rolls
+all perturbed sequences through the nonlinear quadrotor model at once (the
+sample axis is a leading array axis, so a horizon step is one vectorized RK4
+step for every sample), scores them with a fully vectorized cost and
+averages the perturbations with softmin weights. No QP is involved, so the
+cost may be nonconvex (obstacles, corridors, saturating penalties).
+"""
+
+import numpy as np
+
+from .mpc import DEFAULT_Q, DEFAULT_R, DEFAULT_U_MAX, DEFAULT_U_MIN, MPCController
+from .nmpc import reference_rows
+from .quadrotor import QuadrotorModel
+
+DEFAULT_NOISE_SIGMA = np.array([0.1, 0.1, 0.05])
+
+
+class MPPIController:
+    """
+    Sampling-based MPC on the full nonlinear model.
+
+    Tracks the reference with the quadratic cost sum_k (x_k - r_k)' Q
+    (x_k - r_k) + u_k' R u_k, terminal weight `Q_terminal` (defaults to Q),
+    plus the optional `cost(states, inputs)` callable, which receives all
+    rollouts as (K, N, nx) states x_1..x_N and (K, N, nu) inputs and returns
+    (K,) costs. `n_samples` rollouts per tick are drawn with per-input
+    standard deviations `noise_sigma` and clipped to the input bounds;
+    `temperature` sets how sharply the softmin favours the best rollouts.
+
+    As for `MPCController`, `u_plan` and `x_plan` are the plan of the last
+    tick, starting at its state (None before the first tick); the next tick
+    samples around that plan shifted by one step.
+    """
+
+    def __init__(self, model=None, dt=0.02, horizon=20, n_samples=1000, Q=None, R=None,
+                 Q_terminal=None, u_min=None, u_max=None, noise_sigma=None, temperature=1.0,
+                 cost=None, seed=None):
+        self.model = model if model is not None else QuadrotorModel()
+        self.dt = float(dt)
+        self.horizon = int(horizon)
+        self.n_samples = int(n_samples)
+        self.Q = np.asarray(DEFAULT_Q if Q is None else Q, dtype=float)
+        self.R = np.asarray(DEFAULT_R if R is None else R, dtype=float)
+        self.Q_terminal = self.Q if Q_terminal is None else np.asarray(Q_terminal, dtype=float)
+        self.u_min = np.asarray(DEFAULT_U_MIN if u_min is None else u_min, dtype=float)
+        self.u_max = np.asarray(DEFAULT_U_MAX if u_max is None else u_max, dtype=float)
+        self.noise_sigma = np.asarray(DEFAULT_NOISE_SIGMA if noise_sigma is None else noise_sigma,
+                                      dtype=float)
+        self.temperature = float(temperature)
+        self.cost = cost
+        self.nx, self.nu = self.Q.shape[0], self.R.shape[0]
+        self.rng = np.random.default_rng(seed)
+
+        self.u_plan = None
+        self.x_plan = None
+        self.costs = None
+
+    @classmethod
+    def from_config(cls, config, model=None):
+        """Build from a config section; `Q`, `R` and `Q_terminal` may be diagonals."""
+        kwargs = MPCController.config_kwargs(config)
+        if np.ndim(kwargs.get("Q_terminal")) == 1:
+            kwargs["Q_terminal"] = np.diag(kwargs["Q_terminal"])
+        return cls(model=model, **kwargs)
+
+    def reset(self):
+        """Forget the previous plan; the next tick samples around hover."""
+        self.u_plan = None
+        self.x_plan = None
+
+    def rollout(self, x0, inputs):
+        """Propagate x0 under every input sequence (K, N, nu); return x_1..x_N as (K, N, nx)."""
+        K, N = inputs.shape[:2]
+        states = np.empty((K, N, self.nx))
+        x = np.broadcast_to(np.asarray(x0, dtype=float), (K, self.nx))
+        for k in range(N):
+            x = states[:, k] = self.model.step(x, inputs[:, k], self.dt)
+        return states
+
+    def trajectory_cost(self, states, inputs, ref):
+        """Cost of every rollout, shape (K,); `ref` is (N+1, nx) including x_0."""
+        # Quadratic forms as matmuls (BLAS) rather than einsum contractions.
+        err = states - ref[1:]
+        cost = (((err[:, :-1] @ self.Q) * err[:, :-1]).sum(axis=(1, 2))
+                + ((err[:, -1] @ self.Q_terminal) * err[:, -1]).sum(axis=1)
+                + ((inputs @ self.R) * inputs).sum(axis=(1, 2)))
+        if self.cost is not None:
+            cost = cost + self.cost(states, inputs)
+        return cost
+
+    def compute(self, state, reference):
+        """
+        Sample, roll out and reweight input sequences; return the first input.
+
+        `reference` is a target state or a trajectory with one row per
+        horizon step, including the initial one.
+        """
+        ref = reference_rows(reference, self.horizon, self.nx)
+        if self.u_plan is None:
+            nominal = np.zeros((self.horizon, self.nu))
+        else:
+            # Last tick's plan shifted by one step, repeating the last input.
+            nominal = np.vstack([self.u_plan[1:], self.u_plan[-1:]])
+        noise = self.rng.standard_normal((self.n_samples, self.horizon, self.nu))
+        inputs = np.clip(nominal + noise * self.noise_sigma, self.u_min, self.u_max)
+        states = self.rollout(state, inputs)
+        costs = self.trajectory_cost(states, inputs, ref)
+
+        weights = np.exp(-(costs - costs.min()) / self.temperature)
+        weights /= weights.sum()
+        u_plan = np.einsum("k,kni->ni", weights, inputs)
+
+        self.costs = costs
+        self.x_plan = np.vstack([state, self.rollout(state, u_plan[None])[0]])
+        self.u_plan = u_plan
+        return u_plan[0].copy()
@@ -0,0 +1,119 @@
+"""
+Closed-loop parameter sweeps for MPC tuning.
+
+Every configuration of a grid over horizon length, dt, weight scalings and
+solver tolerance flies the same reference trajectory in simulation. The
+configurations run in parallel joblib worker processes; each records the
+RMS position error and its tick times, and `pareto_front` keeps the
+configurations that no other one beats in both tracking error and p99 tick
+time. `cheapest` picks the fastest configuration within an error budget.
+
+Tick times are measured inside the workers, so run at most one worker per
+physical core (the default): with more, the percentiles include time spent
+waiting for a core and p99 turns into the scheduler's time slice.
+"""
+
+import itertools
+from collections import namedtuple
+
+import numpy as np
+from joblib import Parallel, cpu_count, delayed
+
+from utils.simulation import simulate
+from utils.trajectory import load_trajectory
+
+from .mpc import DEFAULT_Q, DEFAULT_R, MPCController
+
+# Swept values; "q_scale" and "r_scale" multiply the base Q and R, "eps" sets
+# OSQP's eps_abs and eps_rel.
+DEFAULT_GRID = {
+    "horizon": (10, 20, 30),
+    "dt": (0.02, 0.04),
+    "r_scale": (0.5, 1.0, 2.0),
+    "eps": (1e-3, 1e-5),
+}
+
+SweepResult = namedtuple("SweepResult", ["params", "rms_error", "p50", "p99", "failed"])
+
+
+def configurations(grid=None):
+    """Every combination of the grid's values, as a list of dicts."""
+    grid = DEFAULT_GRID if grid is None else grid
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+
+def controller_kwargs(params, base=None):
+    """
+    MPCController keyword arguments for one configuration on top of `base`.
+
+    A swept horizon or dt replaces any non-uniform horizon or move blocking
+    of the base, which would no longer fit.
+    """
+    kwargs = dict(base or {})
+    if "horizon" in params or "dt" in params:
+        kwargs.pop("step_durations", None)
+        kwargs.pop("move_blocks", None)
+    for key in ("horizon", "dt"):
+        if key in params:
+            kwargs[key] = params[key]
+    if "q_scale" in params:
+        kwargs["Q"] = params["q_scale"] * np.asarray(kwargs.get("Q", DEFAULT_Q), dtype=float)
+    if "r_scale" in params:
+        kwargs["R"] = params["r_scale"] * np.asarray(kwargs.get("R", DEFAULT_R), dtype=float)
+    if "eps" in params:
+        kwargs["solver_options"] = {**kwargs.get("solver_options", {}),
+                                    "eps_abs": params["eps"], "eps_rel": params["eps"]}
+    return kwargs
+
+
+def run_configuration(params, base=None, trajectory="circle", duration=None):
+    """Fly `trajectory` with one configuration and return its SweepResult."""
+    ref = load_trajectory(trajectory)
+    duration = ref.duration if duration is None else duration
+    kwargs = controller_kwargs(params, base)
+    steps = int(round(duration / kwargs.get("dt", 0.02)))
+    # Keep every tick in the percentiles.
+    ctrl = MPCController(**{**kwargs, "tick_log_size": max(steps, 1)})
+
+    def policy(x, k):
+        return ctrl.compute(x, ref.sample(k * ctrl.dt + ctrl.step_times))
+
+    try:
+        _, _, errors = simulate(policy, ctrl.model, ref.sample(0.0),
+                                lambda k: ref.sample(k * ctrl.dt), steps, ctrl.dt)
+    except RuntimeError:
+        return SweepResult(params, np.inf, np.inf, np.inf, True)
+    rms = float(np.sqrt(np.mean(np.sum(errors[:, :3] ** 2, axis=1))))
+    total = ctrl.tick_log.ticks()["total"]
+    p50, p99 = np.percentile(total, [50, 99])
+    return SweepResult(params, rms, float(p50), float(p99), False)
+
+
+def sweep(grid=None, base=None, trajectory="circle", duration=None, n_jobs=None):
+    """
+    Run every configuration of `grid` on joblib workers; results in grid order.
+
+    `n_jobs` defaults to the number of physical cores.
+    """
+    n_jobs = cpu_count(only_physical_cores=True) if n_jobs is None else n_jobs
+    return Parallel(n_jobs=n_jobs)(
+        delayed(run_configuration)(params, base, trajectory, duration)
+        for params in configurations(grid))
+
+
+def pareto_front(results):
+    """Completed results not dominated in (rms_error, p99), sorted by p99."""
+    front, best_error = [], np.inf
+    for result in sorted((r for r in results if not r.failed),
+                         key=lambda r: (r.p99, r.rms_error)):
+        if result.rms_error < best_error:
+            front.append(result)
+            best_error = result.rms_error
+    return front
+
+
+def cheapest(results, max_error):
+    """Result with the lowest p99 tick time whose RMS error is at most `max_error`, or None."""
+    eligible = [r for r in results if not r.failed and r.rms_error <= max_error]
+    return min(eligible, key=lambda r: r.p99) if eligible else None
@@ -0,0 +1,172 @@
+"""
+Discrete PID controller, vectorized over axes and vehicles.
+"""
+
+import numpy as np
+
+
+class PIDController:
+    """
+    PID with optional output saturation and integrator clamp on an array of channels.
+
+    Gains and limits are scalars or arrays broadcast to `shape` (by default
+    their common broadcast shape), so one instance can run every axis of
+    every vehicle: gains of shape (4,) for x, y, z, yaw with
+    ``shape=(n_drones, 4)``. `update` advances all channels in one
+    vectorized step. With scalar gains and no shape it is a single-axis PID
+    on plain floats, which for one channel is much faster than NumPy.
+
+    Gains and limits are stored broadcast to `shape` and all state lives in
+    buffers allocated here, so an array update with ``out=`` and inputs of
+    the full shape allocates nothing (no temporaries, no Python objects).
+    Change gains in place (``pid.kp[...] = ...``) to keep it that way.
+
+    An optional `gain_schedule` (`controllers.gain_schedule.GainSchedule`)
+    makes the gains depend on the operating point; `set_operating_point`
+    looks them up and writes them in place, at whatever rate the operating
+    point changes.
+    """
+
+    __slots__ = ("shape", "kp", "ki", "kd", "output_limits", "integral_limit", "gain_schedule",
+                 "integral", "prev_error", "_dt", "_step_dt", "_error", "_derivative", "_scratch",
+                 "_fresh", "_any_fresh", "_clamp_integral")
+
+    def __init__(self, kp, ki=0.0, kd=0.0, dt=0.01, output_limits=(None, None),
+                 integral_limit=None, shape=None, gain_schedule=None):
+        low, high = output_limits
+        if shape is None:
+            shape = np.broadcast_shapes(*(np.shape(value) for value in
+                                          (kp, ki, kd, low, high, integral_limit)))
+        self.shape = (int(shape),) if np.isscalar(shape) else tuple(int(n) for n in shape)
+        if self.shape == ():
+            self.kp, self.ki, self.kd = float(kp), float(ki), float(kd)
+            self.output_limits = (None if low is None else float(low),
+                                  None if high is None else float(high))
+            self.integral_limit = None if integral_limit is None else float(integral_limit)
+            self._dt = float(dt)
+        else:
+            def full(value, default=0.0):
+                value = default if value is None else value
+                return np.broadcast_to(np.asarray(value, dtype=float), self.shape).copy()
+
+            self.kp, self.ki, self.kd = full(kp), full(ki), full(kd)
+            self.output_limits = (full(low, -np.inf), full(high, np.inf))
+            self.integral_limit = full(integral_limit, np.inf)
+            self._clamp_integral = integral_limit is not None
+            self.integral = np.zeros(self.shape)
+            self.prev_error = np.zeros(self.shape)
+            self._dt = full(dt)
+            self._step_dt = np.empty(self.shape)
+            self._error = np.empty(self.shape)
+            self._derivative = np.empty(self.shape)
+            self._scratch = np.empty(self.shape)
+            # Channels without a previous error; their first derivative is zero.
+            self._fresh = np.ones(self.shape, dtype=bool)
+        self.gain_schedule = gain_schedule
+        self.reset()
+
+    @property
+    def dt(self):
+        """Default tick length (a float, or an array of per-channel tick lengths)."""
+        return self._dt if self.shape == () else self._dt[()]
+
+    @dt.setter
+    def dt(self, value):
+        if self.shape == ():
+            self._dt = float(value)
+        else:
+            self._dt[...] = value
+
+    def set_operating_point(self, operating_point):
+        """
+        Set the gains from `gain_schedule` at `operating_point`, a vector
+        ordered as the schedule's variables, or one per vehicle (leading
+        axes broadcasting to `shape`).
+        """
+        gains = self.gain_schedule.lookup(operating_point)
+        if self.shape == ():
+            self.kp, self.ki, self.kd = (float(gain) for gain in gains)
+        else:
+            self.kp[...] = gains[..., 0]
+            self.ki[...] = gains[..., 1]
+            self.kd[...] = gains[..., 2]
+
+    def reset(self, index=None):
+        """Clear the integrator and derivative history of all channels, or those at `index`."""
+        if self.shape == ():
+            self.integral = 0.0
+            self.prev_error = None
+            return
+        index = ... if index is None else index
+        self.integral[index] = 0.0
+        self.prev_error[index] = 0.0
+        self._fresh[index] = True
+        self._any_fresh = True
+
+    def update(self, setpoint, measurement, dt=None, out=None):
+        """
+        Advance every channel one step and return the control outputs.
+
+        `setpoint` and `measurement` broadcast to `shape`; `dt` may be an
+        array too (per-vehicle tick lengths). The outputs are written to
+        `out` if given (array controllers only) and returned; without it
+        they are a new array, the one allocation of the update.
+        """
+        if self.shape == ():
+            if out is not None:
+                raise ValueError("out is only supported by array controllers")
+            return self._update_scalar(setpoint - measurement, self._dt if dt is None else dt)
+
+        error, derivative, scratch = self._error, self._derivative, self._scratch
+        if dt is None:
+            step_dt = self._dt
+        else:
+            step_dt = self._step_dt
+            if isinstance(dt, float):
+                step_dt.fill(dt)
+            else:
+                np.copyto(step_dt, dt)
+        np.subtract(setpoint, measurement, out=error)
+
+        np.multiply(error, step_dt, out=scratch)
+        self.integral += scratch
+        if self._clamp_integral:
+            np.minimum(self.integral, self.integral_limit, out=self.integral)
+            np.negative(self.integral_limit, out=scratch)
+            np.maximum(self.integral, scratch, out=self.integral)
+
+        if self._any_fresh:
+            np.copyto(self.prev_error, error, where=self._fresh)
+            self._fresh.fill(False)
+            self._any_fresh = False
+        np.subtract(error, self.prev_error, out=derivative)
+        derivative /= step_dt
+        np.copyto(self.prev_error, error)
+
+        if out is None:
+            out = np.empty(self.shape)
+        np.multiply(self.kp, error, out=out)
+        np.multiply(self.ki, self.integral, out=scratch)
+        out += scratch
+        np.multiply(self.kd, derivative, out=scratch)
+        out += scratch
+        low, high = self.output_limits
+        np.minimum(out, high, out=out)
+        np.maximum(out, low, out=out)
+        return out
+
+    def _update_scalar(self, error, dt):
+        self.integral += error * dt
+        if self.integral_limit is not None:
+            self.integral = max(-self.integral_limit, min(self.integral_limit, self.integral))
+
+        derivative = 0.0 if self.prev_error is None else (error - self.prev_error) / dt
+        self.prev_error = error
+
+        output = self.kp * error + self.ki * self.integral + self.kd * derivative
+        low, high = self.output_limits
+        if low is not None:
+            output = max(low, output)
+        if high is not None:
+            output = min(high, output)
+        return output
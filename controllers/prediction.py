@@ -0,0 +1,194 @@
+"""
+Cached discretization and prediction matrices for the linear MPC variants.
+
+Discretizing the model (matrix exponential), solving the Riccati equation
+for the terminal weight and building the condensed prediction matrices only
+depend on the model parameters, dt, horizon and weights. `prediction_data`
+computes them once per key, keeps them in memory for the life of the
+process and, given a `cache_dir`, in an .npz file so later runs and
+parameter sweeps load them instead of recomputing. The per-step
+discretizations of non-uniform horizons (`horizon_stages`) share the
+in-memory cache through `discretize`.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from scipy.linalg import solve_discrete_are
+
+PredictionData = namedtuple("PredictionData", ["A", "B", "P", "Phi", "Gamma", "H", "F"])
+
+# Per-step dynamics of a (possibly non-uniform, move-blocked) horizon.
+Stages = namedtuple("Stages", ["A", "B", "weights", "blocking"])
+
+_MEMORY_CACHE = {}
+_DISCRETE_CACHE = {}
+
+
+def condense(A, B, Q, R, P, horizon):
+    """
+    Condensed prediction matrices for x_0 = theta.
+
+    Returns (Phi, Gamma, H, F) with [x_1; ...; x_N] = Phi theta + Gamma U and
+    the cost (up to a constant) 1/2 U' H U + theta' F' U.
+    """
+    N = horizon
+    nx, nu = B.shape
+    Phi = np.zeros((N * nx, nx))
+    powers_B = np.zeros((N, nx, nu))
+    Ak = np.eye(nx)
+    for k in range(N):
+        powers_B[k] = Ak @ B
+        Ak = A @ Ak
+        Phi[k * nx:(k + 1) * nx] = Ak
+
+    Gamma = np.zeros((N * nx, N * nu))
+    for k in range(N):
+        for j in range(k + 1):
+            Gamma[k * nx:(k + 1) * nx, j * nu:(j + 1) * nu] = powers_B[k - j]
+
+    Qbar = np.kron(np.eye(N), Q)
+    Qbar[-nx:, -nx:] = P
+    Rbar = np.kron(np.eye(N), R)
+    H = 2.0 * (Gamma.T @ Qbar @ Gamma + Rbar)
+    F = 2.0 * Gamma.T @ Qbar @ Phi
+    return Phi, Gamma, 0.5 * (H + H.T), F
+
+
+def cache_key(model, dt, horizon, Q, R):
+    """Hex digest identifying the data computed for these arguments."""
+    digest = hashlib.sha1(type(model).__name__.encode())
+    for value in (model.params, [dt, horizon], Q, R):
+        digest.update(np.ascontiguousarray(value, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def _discrete_key(model, dt):
+    return type(model).__name__, np.asarray(model.params, dtype=float).tobytes(), float(dt)
+
+
+def discretize(model, dt):
+    """`model.discretize(dt)`, computed once per model parameters and dt."""
+    key = _discrete_key(model, dt)
+    discrete = _DISCRETE_CACHE.get(key)
+    if discrete is None:
+        discrete = _DISCRETE_CACHE[key] = model.discretize(dt)
+    return discrete
+
+
+def _compute(model, dt, horizon, Q, R):
+    A, B = discretize(model, dt)
+    P = solve_discrete_are(A, B, Q, R)
+    return PredictionData(A, B, P, *condense(A, B, Q, R, P, horizon))
+
+
+def save_npz(path, **arrays):
+    """
+    `np.savez` to `path` atomically: the file is written next to it under a
+    temporary name and renamed into place, so concurrent readers (e.g. sweep
+    workers sharing a cache directory) never see a partial file.
+    """
+    path = os.fspath(path)
+    if not path.endswith(".npz"):
+        path += ".npz"
+    fd, tmp = tempfile.mkstemp(suffix=".npz.tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            np.savez(file, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def prediction_data(model, dt, horizon, Q, R, cache_dir=None):
+    """Discretized model, terminal weight and prediction matrices, cached."""
+    key = cache_key(model, dt, horizon, Q, R)
+    data = _MEMORY_CACHE.get(key)
+    if data is not None:
+        return data
+
+    path = None if cache_dir is None else Path(cache_dir) / f"prediction_{key}.npz"
+    if path is not None and path.exists():
+        with np.load(path) as arrays:
+            data = PredictionData(**{name: arrays[name] for name in PredictionData._fields})
+    else:
+        data = _compute(model, dt, horizon, np.asarray(Q, dtype=float), np.asarray(R, dtype=float))
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            save_npz(path, **data._asdict())
+
+    _MEMORY_CACHE[key] = data
+    _DISCRETE_CACHE.setdefault(_discrete_key(model, dt), (data.A, data.B))
+    return data
+
+
+def lqr_gain(A, B, R, P):
+    """Discrete-time LQR gain K (u = -K x) for the Riccati solution P."""
+    return np.linalg.solve(R + B.T @ P @ B, B.T @ P @ A)
+
+
+def horizon_stages(model, dt, step_durations, move_blocks):
+    """
+    Per-step discrete dynamics, stage weights and input blocking matrix.
+
+    Step k is discretized over `step_durations[k]` and its stage cost is
+    weighted by `step_durations[k] / dt`, so a coarse step counts as much as
+    the fine steps it replaces. `blocking[k, b]` is 1 if step k applies the
+    input of block b; `move_blocks` gives the number of steps per block.
+    """
+    durations = np.asarray(step_durations, dtype=float)
+    discrete = {d: discretize(model, d) for d in np.unique(durations)}
+    A = np.array([discrete[d][0] for d in durations])
+    B = np.array([discrete[d][1] for d in durations])
+    blocking = np.repeat(np.eye(len(move_blocks)), move_blocks, axis=0)
+    return Stages(A, B, durations / dt, blocking)
+
+
+def _batched_expm(M, order=12):
+    """
+    Matrix exponential of a stack of matrices by scaling and squaring a
+    Taylor series. For the small matrices of a horizon this is several times
+    faster than `scipy.linalg.expm` on the stack and accurate to rounding.
+    """
+    norm = np.abs(M).sum(axis=-2).max()
+    squarings = max(0, int(np.ceil(np.log2(norm / 0.5)))) if norm > 0 else 0
+    M = M / 2.0 ** squarings
+    term = M
+    result = np.eye(M.shape[-1]) + M
+    for k in range(2, order + 1):
+        term = term @ M / k
+        result = result + term
+    for _ in range(squarings):
+        result = result @ result
+    return result
+
+
+def affine_stages(model, X, U, step_durations):
+    """
+    Zero-order-hold discretization of the model linearized at every (X[k], U[k]).
+
+    Returns (A, B, c) stacked over the leading axis with x_{k+1} ~ A[k] x_k +
+    B[k] u_k + c[k] over `step_durations[k]`. The affine term makes the
+    expansion exact at the linearization point; all steps go through one
+    batched matrix exponential.
+    """
+    Ac, Bc = model.jacobians(X, U)
+    f0 = (model.dynamics(X, U) - np.einsum("kij,kj->ki", Ac, X)
+          - np.einsum("kij,kj->ki", Bc, U))
+    N, nx, nu = Bc.shape
+    M = np.zeros((N, nx + nu + 1, nx + nu + 1))
+    M[:, :nx, :nx] = Ac
+    M[:, :nx, nx:nx + nu] = Bc
+    M[:, :nx, -1] = f0
+    Md = _batched_expm(M * np.asarray(step_durations, dtype=float)[:, None, None])
+    return Md[:, :nx, :nx], Md[:, :nx, nx:nx + nu], Md[:, :nx, -1]
+
+
+def clear_memory_cache():
+    _MEMORY_CACHE.clear()
+    _DISCRETE_CACHE.clear()
@@ -0,0 +1,117 @@
+"""
+Translational Crazyflie model shared by the model-based controllers.
+
+The onboard attitude controller is treated as a first-order lag, so the model
+takes the same setpoints the commander sends: roll and pitch angles plus a
+collective thrust offset from hover.
+
+    state  x = [x, y, z, vx, vy, vz, roll, pitch]
+    input  u = [roll_cmd, pitch_cmd, thrust]      (thrust in N, relative to m*g)
+
+Yaw is assumed to be held at zero by the onboard controller.
+"""
+
+import numpy as np
+from scipy.linalg import expm
+
+STATE_DIM = 8
+INPUT_DIM = 3
+
+
+class QuadrotorModel:
+    """Nonlinear point-mass quadrotor with lagged attitude response."""
+
+    def __init__(self, mass=0.027, gravity=9.81, tau=0.1):
+        self.mass = float(mass)
+        self.gravity = float(gravity)
+        self.tau = float(tau)
+
+    @property
+    def params(self):
+        """Model parameters as a tuple, e.g. for use as a cache key."""
+        return (self.mass, self.gravity, self.tau)
+
+    def dynamics(self, x, u):
+        """Continuous-time state derivative. Broadcasts over leading axes."""
+        x = np.asarray(x, dtype=float)
+        u = np.asarray(u, dtype=float)
+        roll, pitch = x[..., 6], x[..., 7]
+        accel = (self.mass * self.gravity + u[..., 2]) / self.mass
+
+        dx = np.empty(np.broadcast_shapes(x.shape[:-1], u.shape[:-1]) + (STATE_DIM,))
+        dx[..., 0:3] = x[..., 3:6]
+        dx[..., 3] = accel * np.cos(roll) * np.sin(pitch)
+        dx[..., 4] = -accel * np.sin(roll)
+        dx[..., 5] = accel * np.cos(roll) * np.cos(pitch) - self.gravity
+        dx[..., 6] = (u[..., 0] - roll) / self.tau
+        dx[..., 7] = (u[..., 1] - pitch) / self.tau
+        return dx
+
+    def step(self, x, u, dt):
+        """Integrate the nonlinear dynamics over `dt` with one RK4 step."""
+        k1 = self.dynamics(x, u)
+        k2 = self.dynamics(x + 0.5 * dt * k1, u)
+        k3 = self.dynamics(x + 0.5 * dt * k2, u)
+        k4 = self.dynamics(x + dt * k3, u)
+        return x + dt / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+
+    def jacobians(self, x, u):
+        """Continuous-time Jacobians (A, B) of `dynamics`, vectorized over leading axes."""
+        x = np.asarray(x, dtype=float)
+        u = np.asarray(u, dtype=float)
+        batch = np.broadcast_shapes(x.shape[:-1], u.shape[:-1])
+        roll, pitch = x[..., 6], x[..., 7]
+        accel = (self.mass * self.gravity + u[..., 2]) / self.mass
+        cr, sr = np.cos(roll), np.sin(roll)
+        cp, sp = np.cos(pitch), np.sin(pitch)
+
+        A = np.zeros(batch + (STATE_DIM, STATE_DIM))
+        A[..., 0, 3] = A[..., 1, 4] = A[..., 2, 5] = 1.0
+        A[..., 3, 6] = -accel * sr * sp
+        A[..., 3, 7] = accel * cr * cp
+        A[..., 4, 6] = -accel * cr
+        A[..., 5, 6] = -accel * sr * cp
+        A[..., 5, 7] = -accel * cr * sp
+        A[..., 6, 6] = A[..., 7, 7] = -1.0 / self.tau
+
+        B = np.zeros(batch + (STATE_DIM, INPUT_DIM))
+        B[..., 3, 2] = cr * sp / self.mass
+        B[..., 4, 2] = -sr / self.mass
+        B[..., 5, 2] = cr * cp / self.mass
+        B[..., 6, 0] = B[..., 7, 1] = 1.0 / self.tau
+        return A, B
+
+    def trim_inputs(self, accel):
+        """
+        Inputs holding a constant acceleration `accel` (..., 3), attitude settled.
+
+        Inverts the translational dynamics: the thrust vector must equal
+        m (accel + g e_z). Vectorized over leading axes; returns (..., 3).
+        """
+        accel = np.asarray(accel, dtype=float)
+        thrust = accel + np.array([0.0, 0.0, self.gravity])
+        magnitude = np.linalg.norm(thrust, axis=-1)
+        u = np.empty(accel.shape[:-1] + (INPUT_DIM,))
+        u[..., 0] = -np.arcsin(thrust[..., 1] / magnitude)
+        u[..., 1] = np.arctan2(thrust[..., 0], thrust[..., 2])
+        u[..., 2] = self.mass * (magnitude - self.gravity)
+        return u
+
+    def hover_linearization(self):
+        """Continuous-time (A, B) about hover, x = 0 and u = 0."""
+        return self.jacobians(np.zeros(STATE_DIM), np.zeros(INPUT_DIM))
+
+    def discretize(self, dt):
+        """Zero-order-hold discretization of the hover linearization."""
+        A, B = self.hover_linearization()
+        return discretize(A, B, dt)
+
+
+def discretize(A, B, dt):
+    """Exact zero-order-hold discretization via the augmented matrix exponential."""
+    n, m = B.shape
+    M = np.zeros((n + m, n + m))
+    M[:n, :n] = A
+    M[:n, n:] = B
+    Md = expm(M * dt)
+    return Md[:n, :n], Md[:n, n:]
@@ -0,0 +1,90 @@
+"""
+Closed-loop benchmark of MPC solver backends and automatic selection.
+
+Every candidate (backend, solver and tolerance settings) flies the same
+simulated episode. The per-tick wall-clock time of `MPCController.compute`
+and the closed-loop tracking cost are recorded; `select_solver` then picks
+the fastest candidate whose cost stays within a relative accuracy target
+of the best one.
+"""
+
+import time
+from collections import namedtuple
+
+import cvxpy as cp
+import numpy as np
+
+from utils.simulation import simulate
+
+from .mpc import MPCController
+
+# (name, MPCController keyword arguments) for every backend/tolerance pairing.
+DEFAULT_CANDIDATES = (
+    ("osqp-direct eps=1e-5", {"backend": "osqp-direct"}),
+    ("osqp-direct eps=1e-4", {"backend": "osqp-direct",
+                              "solver_options": {"eps_abs": 1e-4, "eps_rel": 1e-4}}),
+    ("osqp-direct eps=1e-3", {"backend": "osqp-direct",
+                              "solver_options": {"eps_abs": 1e-3, "eps_rel": 1e-3}}),
+    ("cvxpy OSQP eps=1e-5", {"backend": "cvxpy", "solver": cp.OSQP}),
+    ("cvxpy OSQP eps=1e-3", {"backend": "cvxpy", "solver": cp.OSQP,
+                             "solver_options": {"eps_abs": 1e-3, "eps_rel": 1e-3}}),
+    ("cvxpy CLARABEL tol=1e-8", {"backend": "cvxpy", "solver": cp.CLARABEL}),
+    ("cvxpy CLARABEL tol=1e-5", {"backend": "cvxpy", "solver": cp.CLARABEL,
+                                 "solver_options": {"tol_gap_abs": 1e-5, "tol_gap_rel": 1e-5,
+                                                    "tol_feas": 1e-5}}),
+    ("cvxpy SCS eps=1e-4", {"backend": "cvxpy", "solver": cp.SCS}),
+    ("cvxpy SCS eps=1e-3", {"backend": "cvxpy", "solver": cp.SCS,
+                            "solver_options": {"eps_abs": 1e-3, "eps_rel": 1e-3}}),
+)
+
+BenchmarkResult = namedtuple("BenchmarkResult", ["name", "kwargs", "tick_times", "cost", "failed"])
+
+
+def default_episode(nx=8):
+    """Take-off to 0.7 m combined with a 0.5 m lateral step, 4 s at 50 Hz."""
+    target = np.zeros(nx)
+    target[:3] = [0.5, 0.5, 0.7]
+    return {"x0": np.zeros(nx), "reference": target, "steps": 200}
+
+
+def run_candidate(name, kwargs, episode, **controller_kwargs):
+    """Fly `episode` with one candidate and return its BenchmarkResult."""
+    ctrl = MPCController(**{**controller_kwargs, **kwargs})
+    reference = episode["reference"]
+    tick_times = []
+
+    def policy(x, k):
+        start = time.perf_counter()
+        u = ctrl.compute(x, reference)
+        tick_times.append(time.perf_counter() - start)
+        return u
+
+    try:
+        states, inputs, errors = simulate(policy, ctrl.model, episode["x0"], reference,
+                                          episode["steps"], ctrl.dt)
+    except RuntimeError:
+        return BenchmarkResult(name, kwargs, np.array(tick_times), np.inf, True)
+
+    cost = (np.einsum("ki,ij,kj->", errors, ctrl.Q, errors)
+            + np.einsum("ki,ij,kj->", inputs, ctrl.R, inputs))
+    return BenchmarkResult(name, kwargs, np.array(tick_times), float(cost), False)
+
+
+def benchmark_solvers(candidates=DEFAULT_CANDIDATES, episode=None, **controller_kwargs):
+    """Run every candidate on the same episode; extra kwargs go to MPCController."""
+    episode = default_episode() if episode is None else episode
+    return [run_candidate(name, kwargs, episode, **controller_kwargs)
+            for name, kwargs in candidates]
+
+
+def select_solver(results, accuracy=0.01, percentile=99):
+    """
+    Fastest result (by the given tick-time percentile) whose tracking cost is
+    within `accuracy` (relative) of the lowest cost among all results.
+    """
+    best_cost = min(r.cost for r in results)
+    eligible = [r for r in results
+                if not r.failed and r.cost <= best_cost * (1.0 + accuracy)]
+    if not eligible:
+        raise RuntimeError("no solver candidate completed the benchmark episode")
+    return min(eligible, key=lambda r: np.percentile(r.tick_times, percentile))
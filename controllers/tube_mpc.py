@@ -0,0 +1,155 @@
+"""
+Robust tube MPC against bounded additive disturbances (e.g. prop-wash).
+
+The plant is split into a nominal system, steered by an ordinary
+`MPCController`, and the error between the real and the nominal state,
+which an ancillary LQR feedback keeps inside a disturbance-invariant set
+(the tube). The tube is computed offline: with the error dynamics
+e+ = (A - BK) e + w and |w| <= disturbance, the error stays within the box
+sum_i |(A - BK)^i| disturbance, and the feedback adds at most
+sum_i |K (A - BK)^i| disturbance to the input. The nominal controller gets
+its bounds tightened by these margins, so its QP has exactly the nominal
+size and the real state and input satisfy the original bounds for every
+admissible disturbance sequence.
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from .mpc import (DEFAULT_Q, DEFAULT_R, DEFAULT_U_MAX, DEFAULT_U_MIN, DEFAULT_X_MAX,
+                  DEFAULT_X_MIN, MPCController)
+from .prediction import lqr_gain, prediction_data, save_npz
+from .quadrotor import QuadrotorModel
+
+_MEMORY_CACHE = {}
+
+
+def tube_margins(A, B, K, disturbance, tol=1e-10, max_terms=100000):
+    """
+    Box bounds (x_margin, u_margin) of the minimal disturbance-invariant set
+    of e+ = (A - BK) e + w, |w| <= disturbance, and of K times that set.
+
+    The series is summed until its terms fall below `tol`; the remaining
+    tail is bounded geometrically with the spectral radius of A - BK.
+    """
+    A_cl = A - B @ K
+    rho = np.max(np.abs(np.linalg.eigvals(A_cl)))
+    if rho >= 1.0:
+        raise ValueError("the ancillary feedback does not stabilize the model")
+    w = np.asarray(disturbance, dtype=float)
+    x_margin = np.zeros(A.shape[0])
+    u_margin = np.zeros(B.shape[1])
+    power = np.eye(A.shape[0])
+    for _ in range(max_terms):
+        x_term = np.abs(power) @ w
+        u_term = np.abs(K @ power) @ w
+        x_margin += x_term
+        u_margin += u_term
+        if max(x_term.max(), u_term.max()) < tol:
+            break
+        power = A_cl @ power
+    tail = rho / (1.0 - rho)
+    return x_margin + tail * x_term, u_margin + tail * u_term
+
+
+def cached_tube_margins(A, B, K, disturbance, cache_dir=None):
+    """`tube_margins`, kept in memory and, given a `cache_dir`, in an .npz file."""
+    digest = hashlib.sha1()
+    for value in (A, B, K, disturbance):
+        digest.update(np.ascontiguousarray(value, dtype=float).tobytes())
+    key = digest.hexdigest()
+    margins = _MEMORY_CACHE.get(key)
+    if margins is not None:
+        return margins
+
+    path = None if cache_dir is None else Path(cache_dir) / f"tube_{key}.npz"
+    if path is not None and path.exists():
+        with np.load(path) as data:
+            margins = data["x_margin"], data["u_margin"]
+    else:
+        margins = tube_margins(A, B, K, disturbance)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            save_npz(path, x_margin=margins[0], u_margin=margins[1])
+    _MEMORY_CACHE[key] = margins
+    return margins
+
+
+class TubeMPCController:
+    """
+    Tube MPC: nominal `MPCController` on tightened bounds plus LQR feedback.
+
+    `disturbance` bounds the additive disturbance per control tick on each
+    discrete-time state, e.g. the velocity change prop-wash can cause within
+    one `dt`. The remaining arguments are those of `MPCController`, whose
+    bounds are the ones the real system must satisfy; `controller` is the
+    nominal controller built with the tightened bounds.
+
+    The nominal state starts at the first measured state and then follows
+    the nominal plan; `reset` restarts it from the next measurement. The
+    applied input v - K (x - z) is clipped to the original input bounds,
+    which only matters when the disturbance bound is exceeded. Until the
+    nominal MPC has a plan (in anytime mode its first solves may fall back),
+    the nominal state is the measured state and the fallback input is sent.
+    """
+
+    def __init__(self, disturbance, model=None, dt=0.02, horizon=20, Q=None, R=None,
+                 u_min=None, u_max=None, x_min=None, x_max=None, cache_dir=None,
+                 **controller_kwargs):
+        model = model if model is not None else QuadrotorModel()
+        self.dt = float(dt)
+        Q = np.asarray(DEFAULT_Q if Q is None else Q, dtype=float)
+        R = np.asarray(DEFAULT_R if R is None else R, dtype=float)
+        prediction = prediction_data(model, dt, horizon, Q, R, cache_dir)
+        self.K = lqr_gain(prediction.A, prediction.B, R, prediction.P)
+        self.disturbance = np.asarray(disturbance, dtype=float)
+        self.x_margin, self.u_margin = cached_tube_margins(prediction.A, prediction.B, self.K,
+                                                           self.disturbance, cache_dir)
+
+        self.u_min = np.asarray(DEFAULT_U_MIN if u_min is None else u_min, dtype=float)
+        self.u_max = np.asarray(DEFAULT_U_MAX if u_max is None else u_max, dtype=float)
+        self.x_min = np.asarray(DEFAULT_X_MIN if x_min is None else x_min, dtype=float)
+        self.x_max = np.asarray(DEFAULT_X_MAX if x_max is None else x_max, dtype=float)
+        tight = (self.u_min + self.u_margin, self.u_max - self.u_margin,
+                 self.x_min + self.x_margin, self.x_max - self.x_margin)
+        if np.any(tight[0] > tight[1]) or np.any(tight[2] > tight[3]):
+            raise ValueError("the disturbance bound leaves no room inside the constraints")
+
+        self.controller = MPCController(model=model, dt=dt, horizon=horizon, Q=Q, R=R,
+                                        u_min=tight[0], u_max=tight[1],
+                                        x_min=tight[2], x_max=tight[3],
+                                        cache_dir=cache_dir, **controller_kwargs)
+        self.nominal_state = None
+
+    @classmethod
+    def from_config(cls, config, model=None):
+        """Build from an ``mpc`` config section that also holds `disturbance`."""
+        return cls(model=model, **MPCController.config_kwargs(config))
+
+    @property
+    def x_plan(self):
+        return self.controller.x_plan
+
+    @property
+    def u_plan(self):
+        return self.controller.u_plan
+
+    def reset(self):
+        """Restart the nominal trajectory from the next measured state."""
+        self.nominal_state = None
+
+    def compute(self, state, reference):
+        """Solve the nominal MPC and return the input with the ancillary feedback applied."""
+        x = np.asarray(state, dtype=float)
+        if self.nominal_state is None or self.controller.x_plan is None:
+            self.nominal_state = x.copy()
+        v = self.controller.compute(self.nominal_state, reference)
+        if self.controller.x_plan is None:
+            # The nominal MPC fell back before it ever had a plan: the nominal
+            # state stays at the measurement and its fallback input is sent.
+            return np.clip(v, self.u_min, self.u_max)
+        u = v - self.K @ (x - self.nominal_state)
+        self.nominal_state = self.controller.x_plan[1].copy()
+        return np.clip(u, self.u_min, self.u_max)
@@ -0,0 +1,82 @@
+"""
+Autotune the cascaded PID gains of configs/hover.yaml in simulation.
+
+Draws random gain candidates for the position, velocity and attitude loops,
+flies each through a simulated take-off to the hover height with a 0.5 m
+lateral step (batches of candidates per joblib worker), scores rise time,
+overshoot and RMS position error, and prints the best candidates next to
+the current gains. The best gains are written back into the cascade section
+of the config, comments intact, if they score better than the current ones.
+
+Run from the repository root:
+
+    python -m scripts.autotune_pid [--config hover] [--candidates 5000] [--jobs N]
+        [--seed 0] [--dry-run]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers.autotune import (
+    SEARCH_SPACE, default_episode, evaluate, params_from_gains, tune)
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config, update_config
+
+
+def rounded(value):
+    """Gain array (1, channels) as a float or list with 3 significant digits."""
+    values = [float(f"{v:.3g}") for v in np.ravel(value)]
+    return values[0] if len(set(values)) == 1 else values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--chunk", type=int, default=250, help="candidates per batch")
+    parser.add_argument("--jobs", type=int, default=None, help="workers (default: physical cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--dry-run", action="store_true", help="do not write the config")
+    args = parser.parse_args()
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+    cascade = config["cascade"]
+    episode = default_episode(height=config["hover"]["height"])
+    names = list(SEARCH_SPACE)
+
+    start = time.perf_counter()
+    results = tune(args.candidates, cascade=cascade, model=model, episode=episode,
+                   chunk_size=args.chunk, n_jobs=args.jobs, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    current_params = params_from_gains(names, cascade["gains"])[None]
+    current = [float(m[0]) for m in evaluate(names, current_params, cascade, model, episode)]
+
+    print(f"{args.candidates} candidates in {elapsed:.1f} s "
+          f"({60 * args.candidates / elapsed:.0f} per minute)")
+    header = "".join(f"{name:>16}" for name in names)
+    print(f"{'':<9}{header}{'rise [s]':>10}{'overshoot':>11}{'rms [m]':>9}{'score':>8}")
+    rows = [("current", params_from_gains(names, cascade["gains"]), *current)]
+    rows += [(f"#{i + 1}", [r.params[name] for name in names], r.rise_time, r.overshoot,
+              r.rms_error, r.score) for i, r in enumerate(results[:args.top])]
+    for label, params, rise, overshoot, rms, score in rows:
+        print(f"{label:<9}" + "".join(f"{p:>16.3g}" for p in params)
+              + f"{rise:>10.3f}{overshoot:>11.3f}{rms:>9.4f}{score:>8.4f}")
+
+    best = results[0]
+    if best.score >= current[3]:
+        print("no candidate beats the current gains; config unchanged")
+    elif args.dry_run:
+        print("dry run; config unchanged")
+    else:
+        for loop in sorted({name.split(".")[0] for name in names}):
+            tuned = {name.split(".")[1] for name in names if name.startswith(loop + ".")}
+            path = update_config(args.config, ("cascade", "gains", loop),
+                                 {gain: rounded(best.gains[loop][gain]) for gain in sorted(tuned)})
+        print(f"best gains written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-tick cost of solving several drones serially vs. on a process pool.
+
+Besides the serial and batched tick times it reports the dispatch overhead:
+the batched tick time minus the time spent solving (the slowest chunk with
+a core per worker, all chunks on fewer cores). Batching pays off once the
+serial tick time exceeds about workers / (workers - 1) times that
+overhead, and only with at least as many physical cores as workers (on
+fewer cores the chunks are solved one after the other anyway). Longer
+horizons and more drones per worker move past the break-even point.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_batch_mpc [--drones 8] [--jobs -1]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from joblib import cpu_count
+
+from controllers import BatchMPCController, MPCController
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--drones", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    kwargs = {"horizon": args.horizon, "backend": "osqp-direct"}
+    rng = np.random.default_rng(0)
+    states = rng.normal(scale=0.05, size=(args.ticks, args.drones, 8))
+    references = np.zeros((args.drones, 8))
+    references[:, 2] = 0.5
+
+    serial = [MPCController(**kwargs) for _ in range(args.drones)]
+    drone_times = np.empty((args.ticks, args.drones))
+    for tick_states, times in zip(states, drone_times):
+        for i, (ctrl, state, reference) in enumerate(zip(serial, tick_states, references)):
+            start = time.perf_counter()
+            ctrl.compute(state, reference)
+            times[i] = time.perf_counter() - start
+    serial_times = drone_times.sum(axis=1)
+
+    with BatchMPCController(args.drones, n_jobs=args.jobs, **kwargs) as batch:
+        batch.compute(states[0], references)  # builds the problems in the workers
+        batch_times = []
+        for tick_states in states:
+            start = time.perf_counter()
+            batch.compute(tick_states, references)
+            batch_times.append(time.perf_counter() - start)
+        workers = batch.n_jobs
+        chunks = batch._chunks
+
+    cores = cpu_count(only_physical_cores=True)
+    if cores >= workers:
+        solves = np.max([drone_times[:, chunk].sum(axis=1) for chunk in chunks], axis=0)
+    else:
+        solves = serial_times  # the chunks share cores and run one after the other
+    overhead = np.median(batch_times) - np.median(solves)
+    print(f"drones={args.drones} workers={workers} horizon={args.horizon} physical cores={cores}")
+    for name, times in (("serial", serial_times), ("batched", batch_times)):
+        print(f"{name:<8} tick p50 {1e3 * np.median(times):7.3f} ms"
+              f"  p95 {1e3 * np.percentile(times, 95):7.3f} ms")
+    print(f"dispatch overhead {1e3 * overhead:.3f} ms per tick")
+    if workers > 1:
+        print(f"batching pays off above a serial tick of about "
+              f"{1e3 * overhead * workers / (workers - 1):.3f} ms "
+              f"(with {workers} physical cores)")
+
+
+if __name__ == "__main__":
+    main()
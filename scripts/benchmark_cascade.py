@@ -0,0 +1,64 @@
+"""
+Multi-rate cascaded PID against running every loop at the attitude rate.
+
+Flies a simulated take-off to the hover height of configs/hover.yaml with a
+0.5 m lateral step, once with the loop rates from its cascade section and
+once with every loop at the fastest rate, and reports per-loop call counts
+and evaluation times, the controller CPU time per second of flight and the
+RMS position error.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_cascade [--config hover] [--duration 5]
+"""
+
+import argparse
+
+import numpy as np
+
+from controllers import CascadedPIDController
+from controllers.cascade import STAGES
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+
+
+def run_episode(ctrl, reference, duration):
+    steps = int(round(duration / ctrl.dt))
+    _, _, errors = simulate(lambda x, k: ctrl.compute(x, reference), ctrl.model,
+                            np.zeros(8), reference, steps, ctrl.dt)
+    return np.sqrt(np.mean(np.sum(errors[:, :3] ** 2, axis=1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+    cascade = config["cascade"]
+    reference = np.zeros(8)
+    reference[:3] = [0.5, 0.0, config["hover"]["height"]]
+
+    fastest = max(cascade["rates"].values())
+    variants = (
+        ("multi-rate", cascade),
+        ("single-rate", {**cascade, "rates": {name: fastest for name in STAGES}}),
+    )
+    print(f"{'schedule':<13}{'loop':<10}{'rate [Hz]':>10}{'calls':>8}{'mean [us]':>11}"
+          f"{'p99 [us]':>10}{'cpu [ms/s]':>12}{'rms error [m]':>15}")
+    for name, section in variants:
+        ctrl = CascadedPIDController.from_config(section, model=model)
+        rms = run_episode(ctrl, reference, args.duration)
+        stats = ctrl.timing_stats()
+        cpu = sum(s["calls"] * s["mean"] for s in stats.values()) / args.duration
+        for i, loop in enumerate(STAGES):
+            s = stats[loop]
+            tail = f"{1e3 * cpu:>12.2f}{rms:>15.4f}" if i == 0 else ""
+            print(f"{name if i == 0 else '':<13}{loop:<10}{s['rate']:>10.0f}{s['calls']:>8d}"
+                  f"{1e6 * s['mean']:>11.1f}{1e6 * s['p99']:>10.1f}{tail}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Tick times of the cvxpy, osqp-direct and OSQP code-generated MPC backends.
+
+Flies a simulated take-off to the configured hover height with a 0.5 m
+lateral step, once per backend, with the settings from configs/hover.yaml
+(without the time budget and LQR fast path, so every tick reaches the
+solver). Reports the setup time (including compiling the generated code on
+the first run), wall-clock tick times and the mean OSQP iteration count.
+Generated modules are kept in the config's cache directory, so later runs
+only load them.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_codegen [--config hover]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+
+
+def run_episode(ctrl, model, reference, duration):
+    tick_times, iterations = [], []
+
+    def policy(x, k):
+        start = time.perf_counter()
+        u = ctrl.compute(x, reference)
+        tick_times.append(time.perf_counter() - start)
+        iterations.append(ctrl.iterations)
+        return u
+
+    simulate(policy, model, np.zeros(ctrl.nx), reference, int(round(duration / ctrl.dt)), ctrl.dt)
+    return np.array(tick_times), np.array(iterations, dtype=float)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    args = parser.parse_args()
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+    mpc = {key: value for key, value in config["mpc"].items()
+           if key not in ("backend", "time_budget", "lqr_fast_path")}
+    reference = np.zeros(8)
+    reference[0] = 0.5
+    reference[2] = config["hover"]["height"]
+
+    print(f"horizon={mpc.get('horizon')} dt={mpc.get('dt')}")
+    print(f"{'backend':<14}{'setup [s]':>10}{'p50 [ms]':>10}{'p99 [ms]':>10}{'max [ms]':>10}"
+          f"{'iter mean':>11}")
+    for backend in ("cvxpy", "osqp-direct", "osqp-codegen"):
+        start = time.perf_counter()
+        ctrl = MPCController.from_config({**mpc, "backend": backend}, model=model)
+        setup = time.perf_counter() - start
+        tick_times, iterations = run_episode(ctrl, model, reference, config["hover"]["duration"])
+        p50, p99 = 1e3 * np.percentile(tick_times, [50, 99])
+        iteration_mean = np.mean(iterations) if backend != "cvxpy" else np.nan
+        print(f"{backend:<14}{setup:>10.2f}{p50:>10.3f}{p99:>10.3f}"
+              f"{1e3 * tick_times.max():>10.3f}{iteration_mean:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
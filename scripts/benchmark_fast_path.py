@@ -0,0 +1,65 @@
+"""
+How many MPC solves the LQR fast path skips on the hover config.
+
+Flies the simulated take-off and hover from configs/hover.yaml with and
+without the fast path, with a gust every two seconds to push the drone
+into its bounds, and reports the fraction of ticks answered without the
+solver and the resulting tick times.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_fast_path [--config hover]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+
+GUST_VELOCITY = np.array([1.0, -1.0, -1.0])
+
+
+def run_episode(config, model, fast_path):
+    ctrl = MPCController.from_config({**config["mpc"], "lqr_fast_path": fast_path}, model=model)
+    reference = np.zeros(ctrl.nx)
+    reference[2] = config["hover"]["height"]
+    steps = int(round(config["hover"]["duration"] / ctrl.dt))
+    gust_every = int(round(2.0 / ctrl.dt))
+    tick_times = []
+
+    def policy(x, k):
+        if k and k % gust_every == 0:
+            x[3:6] += GUST_VELOCITY
+        start = time.perf_counter()
+        u = ctrl.compute(x, reference)
+        tick_times.append(time.perf_counter() - start)
+        return u
+
+    simulate(policy, model, np.zeros(ctrl.nx), reference, steps, ctrl.dt)
+    return ctrl, np.array(tick_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    args = parser.parse_args()
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+
+    print(f"{'fast path':<11}{'skipped':>9}{'mean [ms]':>11}{'p50 [ms]':>10}"
+          f"{'p99 [ms]':>10}{'max [ms]':>10}")
+    for fast_path in (False, True):
+        ctrl, tick_times = run_episode(config, model, fast_path)
+        p50, p99 = 1e3 * np.percentile(tick_times, [50, 99])
+        print(f"{'on' if fast_path else 'off':<11}{100 * ctrl.fast_path_rate:>8.1f}%"
+              f"{1e3 * tick_times.mean():>11.3f}{p50:>10.3f}{p99:>10.3f}"
+              f"{1e3 * tick_times.max():>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Long-horizon MPC: uniform versus non-uniform, move-blocked horizons.
+
+Tracks a horizontal circle (0.5 m radius, 4 s period, 0.7 m up) with the
+osqp-direct backend and compares a uniform 2 s horizon (100 steps of dt), a
+uniform 0.4 s horizon (20 steps) and the non-uniform, move-blocked 2 s
+horizon from configs/trajectory.yaml. Reports decision variables, tick times
+and the RMS position error.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_horizon [--config trajectory] [--duration 8]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+
+RADIUS = 0.5
+PERIOD = 4.0
+HEIGHT = 0.7
+
+
+def circle(t, nx=8):
+    """Reference states at times `t` (array) on the circle, shape (len(t), nx)."""
+    w = 2.0 * np.pi / PERIOD
+    t = np.asarray(t, dtype=float)
+    ref = np.zeros((len(t), nx))
+    ref[:, 0] = RADIUS * np.cos(w * t)
+    ref[:, 1] = RADIUS * np.sin(w * t)
+    ref[:, 2] = HEIGHT
+    ref[:, 3] = -RADIUS * w * np.sin(w * t)
+    ref[:, 4] = RADIUS * w * np.cos(w * t)
+    return ref
+
+
+def run_episode(ctrl, duration):
+    steps = int(round(duration / ctrl.dt))
+    tick_times = []
+
+    def policy(x, k):
+        start = time.perf_counter()
+        u = ctrl.compute(x, circle(k * ctrl.dt + ctrl.step_times))
+        tick_times.append(time.perf_counter() - start)
+        return u
+
+    x0 = circle(np.zeros(1))[0]
+    _, _, errors = simulate(policy, ctrl.model, x0, lambda k: circle([k * ctrl.dt])[0],
+                            steps, ctrl.dt)
+    rms = np.sqrt(np.mean(np.sum(errors[:, :3] ** 2, axis=1)))
+    return np.array(tick_times), rms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="trajectory")
+    parser.add_argument("--duration", type=float, default=8.0)
+    args = parser.parse_args()
+    config = load_config(args.config)
+    mpc = config["mpc"]
+    model = QuadrotorModel(**config.get("model", {}))
+
+    uniform = {key: value for key, value in mpc.items()
+               if key not in ("step_durations", "move_blocks", "horizon")}
+    variants = (
+        ("uniform 2.0 s", {**uniform, "horizon": int(round(2.0 / mpc["dt"]))}),
+        ("uniform 0.4 s", {**uniform, "horizon": 20}),
+        ("config", mpc),
+    )
+
+    print(f"{'horizon':<16}{'lookahead [s]':>14}{'variables':>11}{'p50 [ms]':>10}"
+          f"{'p95 [ms]':>10}{'max [ms]':>10}{'rms error [m]':>15}")
+    for name, kwargs in variants:
+        ctrl = MPCController.from_config(kwargs, model=model)
+        tick_times, rms = run_episode(ctrl, args.duration)
+        n_var = (ctrl.horizon + 1) * ctrl.nx + len(ctrl.move_blocks) * ctrl.nu
+        p50, p95 = 1e3 * np.percentile(tick_times, [50, 95])
+        print(f"{name:<16}{ctrl.step_times[-1]:>14.2f}{n_var:>11d}{p50:>10.3f}"
+              f"{p95:>10.3f}{1e3 * tick_times.max():>10.3f}{rms:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Per-tick overhead benchmark for MPCController.
+
+Compares rebuilding the cvxpy problem every tick (what a naive controller
+does) against MPCController's compile-once parametrized cvxpy problem and its
+"osqp-direct" backend, which skips the modeling layer entirely. For each
+variant the wall-clock time of a tick is split into the time spent in
+the solver and the modeling overhead around it.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_mpc
+"""
+
+import argparse
+import time
+
+import cvxpy as cp
+import numpy as np
+
+from controllers import MPCController
+
+
+def rebuild_tick(ctrl, state, reference):
+    """Solve one tick with a freshly built (non-parametrized) problem."""
+    N = ctrl.horizon
+    x = cp.Variable((ctrl.nx, N + 1))
+    u = cp.Variable((ctrl.nu, N))
+    ref = ctrl._reference_matrix(reference)
+    err = x - ref
+    cost = (sum(cp.quad_form(err[:, k], ctrl.Q) for k in range(N))
+            + sum(cp.quad_form(u[:, k], ctrl.R) for k in range(N))
+            + cp.quad_form(err[:, N], ctrl.P))
+    constraints = [x[:, 0] == state]
+    for k in range(N):
+        constraints += [
+            x[:, k + 1] == ctrl.A @ x[:, k] + ctrl.B @ u[:, k],
+            u[:, k] >= ctrl.u_min,
+            u[:, k] <= ctrl.u_max,
+            x[:, k + 1] >= ctrl.x_min,
+            x[:, k + 1] <= ctrl.x_max,
+        ]
+    problem = cp.Problem(cp.Minimize(cost), constraints)
+    problem.solve(solver=ctrl.solver)
+    return problem.solver_stats.solve_time
+
+
+def controller_tick(ctrl, state, reference):
+    """Solve one tick through MPCController with its configured backend."""
+    ctrl.compute(state, reference)
+    return ctrl.solve_time
+
+
+def run(tick, ctrl, states, reference):
+    wall, solver = [], []
+    for state in states:
+        start = time.perf_counter()
+        solve_time = tick(ctrl, state, reference)
+        wall.append(time.perf_counter() - start)
+        solver.append(solve_time)
+    return np.array(wall), np.array(solver)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ctrl = MPCController(horizon=args.horizon)
+    direct = MPCController(horizon=args.horizon, backend="osqp-direct")
+    rng = np.random.default_rng(args.seed)
+    states = rng.normal(scale=[0.1] * 3 + [0.05] * 3 + [0.02] * 2, size=(args.ticks, ctrl.nx))
+    reference = np.zeros(ctrl.nx)
+    reference[2] = 0.5
+
+    # The first parametrized solve pays for canonicalization; keep it out of the stats.
+    ctrl.compute(states[0], reference)
+    direct.compute(states[0], reference)
+
+    print(f"horizon={args.horizon} ticks={args.ticks} solver={ctrl.solver}")
+    print(f"{'variant':<14}{'tick [ms]':>12}{'solver [ms]':>14}{'overhead [ms]':>16}")
+    variants = (("rebuild", rebuild_tick, ctrl),
+                ("parametrized", controller_tick, ctrl),
+                ("osqp-direct", controller_tick, direct))
+    for name, tick, controller in variants:
+        n = min(args.ticks, 20) if name == "rebuild" else args.ticks
+        wall, solver = run(tick, controller, states[:n], reference)
+        print(f"{name:<14}{1e3 * np.median(wall):>12.3f}{1e3 * np.median(solver):>14.3f}"
+              f"{1e3 * np.median(wall - solver):>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
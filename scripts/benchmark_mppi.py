@@ -0,0 +1,57 @@
+"""
+Rollout throughput of MPPIController for several sample counts.
+
+Runs MPPI ticks in a simulated take-off to 0.7 m for each sample count and
+reports tick times, rollouts per second (sample count over median tick
+time) and whether the p95 tick fits in the control period.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_mppi [--samples 256 1024 4096] [--ticks 100]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPPIController
+from controllers.quadrotor import QuadrotorModel
+from utils.simulation import simulate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--horizon", type=int, default=20)
+    parser.add_argument("--dt", type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = QuadrotorModel()
+    reference = np.zeros(8)
+    reference[2] = 0.7
+
+    print(f"horizon={args.horizon} dt={args.dt} ticks={args.ticks}")
+    print(f"{'samples':>8}{'p50 [ms]':>10}{'p95 [ms]':>10}{'rollouts/s':>13}"
+          f"{'steps/s':>13}{'fits dt':>9}{'final z':>9}")
+    for n_samples in args.samples:
+        ctrl = MPPIController(model=model, dt=args.dt, horizon=args.horizon,
+                              n_samples=n_samples, seed=0)
+        tick_times = []
+
+        def policy(x, k):
+            start = time.perf_counter()
+            u = ctrl.compute(x, reference)
+            tick_times.append(time.perf_counter() - start)
+            return u
+
+        states, _, _ = simulate(policy, model, np.zeros(8), reference, args.ticks, args.dt)
+        p50, p95 = np.percentile(tick_times, [50, 95])
+        print(f"{n_samples:>8d}{1e3 * p50:>10.3f}{1e3 * p95:>10.3f}{n_samples / p50:>13.0f}"
+              f"{n_samples * args.horizon / p50:>13.0f}{'yes' if p95 < args.dt else 'no':>9}"
+              f"{states[-1, 2]:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
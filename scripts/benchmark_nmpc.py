@@ -0,0 +1,78 @@
+"""
+Circle tracking with linear, LTV and RTI nonlinear MPC and converged SQP.
+
+Flies the trajectory from configs/trajectory.yaml (data/circle.csv by
+default) in simulation with the uniform linear hover MPC, the same MPC
+linearized along the reference every tick (LTV), the RTI controller (one
+SQP step per tick) and the same controller with several SQP steps per
+tick, and reports tick times and the RMS position error.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_nmpc [--config trajectory] [--sqp-iterations 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPCController, RTIMPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+from utils.trajectory import load_trajectory
+
+
+def run_episode(ctrl, trajectory):
+    offsets = ctrl.dt * np.arange(ctrl.horizon + 1)
+    steps = int(trajectory.duration / ctrl.dt)
+    tick_times, linearize_times = [], []
+
+    def policy(x, k):
+        start = time.perf_counter()
+        u = ctrl.compute(x, trajectory.sample(k * ctrl.dt + offsets))
+        tick_times.append(time.perf_counter() - start)
+        linearize_times.append(getattr(ctrl, "linearize_time", None) or 0.0)
+        return u
+
+    _, _, errors = simulate(policy, ctrl.model, trajectory.sample(0.0),
+                            lambda k: trajectory.sample(k * ctrl.dt), steps, ctrl.dt)
+    rms = np.sqrt(np.mean(np.sum(errors[:, :3] ** 2, axis=1)))
+    return np.array(tick_times), np.array(linearize_times), rms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="trajectory")
+    parser.add_argument("--sqp-iterations", type=int, default=5)
+    args = parser.parse_args()
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+    trajectory = load_trajectory(config.get("trajectory", "circle"))
+    nmpc = config["nmpc"]
+
+    linear = {**{key: nmpc[key] for key in ("dt", "horizon", "Q", "R", "u_min", "u_max")},
+              "backend": "osqp-direct"}
+    variants = (
+        ("linear MPC", MPCController.from_config(linear, model=model)),
+        ("LTV MPC", MPCController.from_config({**linear, "linearization": "reference"},
+                                              model=model)),
+        ("RTI", RTIMPCController.from_config(nmpc, model=model)),
+        (f"SQP x{args.sqp_iterations}", RTIMPCController.from_config(
+            {**nmpc, "sqp_iterations": args.sqp_iterations}, model=model)),
+    )
+
+    print(f"trajectory {trajectory.duration:.1f} s, horizon={nmpc['horizon']} dt={nmpc['dt']}")
+    print(f"{'controller':<12}{'p50 [ms]':>10}{'p95 [ms]':>10}{'max [ms]':>10}"
+          f"{'linearize':>11}{'rms error [m]':>15}")
+    for name, ctrl in variants:
+        tick_times, linearize_times, rms = run_episode(ctrl, trajectory)
+        p50, p95 = 1e3 * np.percentile(tick_times, [50, 95])
+        share = linearize_times.sum() / tick_times.sum()
+        print(f"{name:<12}{p50:>10.3f}{p95:>10.3f}{1e3 * tick_times.max():>10.3f}"
+              f"{100 * share:>10.1f}%{rms:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
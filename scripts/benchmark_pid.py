@@ -0,0 +1,147 @@
+"""
+PIDController update cost: time and allocations per update, and swarm batching.
+
+First reports, per `update`, the time in nanoseconds and the number of
+memory blocks allocated for a scalar controller and a (drones, 4) array
+controller with and without ``out=``, net of the benchmark loop itself.
+Blocks are counted with tracemalloc while every update's return value is
+kept alive, so the result array an update without ``out=`` returns is
+counted (3 blocks: array object, shape and strides, data); the ``out=``
+and scalar paths should show 0. The peak column is the most extra memory
+traced at any point of the loop, which also catches temporaries freed
+within an update (a per-update temporary shows up as the size of one
+array). Then runs the x, y, z, yaw loops of a swarm of drones for a number
+of ticks, once as a single PIDController with shape (drones, 4) and once
+as a scalar controller per axis per drone (looped in Python), and reports
+the time per swarm tick for each swarm size.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_pid [--drones 1 10 100] [--ticks 2000] [--updates 100000]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from controllers import PIDController
+
+KP = np.array([2.0, 2.0, 4.0, 1.0])
+KI = np.array([0.2, 0.2, 1.0, 0.0])
+KD = np.array([0.5, 0.5, 1.0, 0.1])
+LIMIT = np.array([0.35, 0.35, 0.3, 1.0])
+
+
+def batch_controller(drones):
+    return PIDController(KP, KI, KD, dt=0.002, output_limits=(-LIMIT, LIMIT),
+                         integral_limit=0.5, shape=(drones, 4))
+
+
+def traced_blocks():
+    return sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+
+
+def allocated_blocks(call, updates):
+    """Memory blocks allocated per call, keeping every call's return value alive."""
+    results = [None] * updates
+    call()
+    tracemalloc.start()
+    call()
+    before = traced_blocks()
+    for i in range(updates):
+        results[i] = call()
+    allocated = traced_blocks() - before
+    tracemalloc.stop()
+    return allocated / updates
+
+
+def peak_allocation(call, updates):
+    """Peak traced bytes allocated while calling `call` `updates` times."""
+    call()
+    tracemalloc.start()
+    call()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(updates):
+        call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - base
+
+
+def time_per_call(call, updates):
+    call()
+    start = time.perf_counter_ns()
+    for _ in range(updates):
+        call()
+    return (time.perf_counter_ns() - start) / updates
+
+
+def micro_benchmark(drones, updates):
+    scalar = PIDController(KP[0], KI[0], KD[0], dt=0.002, output_limits=(-LIMIT[0], LIMIT[0]),
+                           integral_limit=0.5)
+    batch = batch_controller(drones)
+    setpoint, measurement = np.ones((drones, 4)), np.zeros((drones, 4))
+    out = np.empty((drones, 4))
+    calls = (
+        ("no-op (loop overhead)", lambda: None),
+        ("scalar", lambda: scalar.update(1.0, 0.3)),
+        (f"({drones}, 4)", lambda: batch.update(setpoint, measurement)),
+        (f"({drones}, 4) out=", lambda: batch.update(setpoint, measurement, out=out)),
+    )
+    # Every return value is kept for the block count, so fewer calls suffice.
+    counted = min(updates, 1000)
+    blocks_baseline = allocated_blocks(calls[0][1], counted)
+    peak_baseline = peak_allocation(calls[0][1], updates)
+    print(f"{'update':<24}{'ns/update':>11}{'blocks/update':>15}{'peak [B]':>10}")
+    for name, call in calls:
+        blocks = allocated_blocks(call, counted) - blocks_baseline
+        peak = peak_allocation(call, updates) - peak_baseline
+        print(f"{name:<24}{time_per_call(call, updates):>11.0f}{blocks:>15.2f}{peak:>10d}")
+
+
+def time_batch(drones, setpoints, measurements):
+    pid = batch_controller(drones)
+    out = np.empty((drones, 4))
+    start = time.perf_counter()
+    for setpoint, measurement in zip(setpoints, measurements):
+        pid.update(setpoint, measurement, out=out)
+    return (time.perf_counter() - start) / len(setpoints)
+
+
+def time_per_channel(drones, setpoints, measurements):
+    pids = [[PIDController(KP[j], KI[j], KD[j], dt=0.002, output_limits=(-LIMIT[j], LIMIT[j]),
+                           integral_limit=0.5)
+             for j in range(4)] for _ in range(drones)]
+    start = time.perf_counter()
+    for setpoint, measurement in zip(setpoints, measurements):
+        for i in range(drones):
+            for j in range(4):
+                pids[i][j].update(setpoint[i, j], measurement[i, j])
+    return (time.perf_counter() - start) / len(setpoints)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--drones", type=int, nargs="+", default=(1, 10, 100))
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=100000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    micro_benchmark(max(args.drones), args.updates)
+    print()
+    print(f"{'drones':>7}{'batch [us]':>12}{'per channel [us]':>18}{'speed-up':>10}")
+    for drones in args.drones:
+        setpoints = rng.normal(size=(args.ticks, drones, 4))
+        measurements = rng.normal(size=(args.ticks, drones, 4))
+        batch = time_batch(drones, setpoints, measurements)
+        per_channel = time_per_channel(drones, setpoints, measurements)
+        print(f"{drones:>7}{1e6 * batch:>12.1f}{1e6 * per_channel:>18.1f}"
+              f"{per_channel / batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Gust recovery with hard state bounds plus re-solve versus soft bounds.
+
+Hovers at the configured height while a gust knocks the velocity outside its
+bounds every second. With hard bounds, an infeasible tick is re-solved with
+the state bounds widened to include the measured state, and once more with
+them dropped if that still fails (the pattern soft constraints replace);
+with soft bounds, every tick is a single solve. Reports tick times of all
+ticks and of the ticks right after a gust, the number of re-solves and the
+largest bound violation.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_soft_constraints [--config hover] [--slack-penalty 1000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+
+GUST_VELOCITY = np.array([2.5, -2.5, -2.0])
+
+
+def run_episode(ctrl, model, height, duration):
+    reference = np.zeros(ctrl.nx)
+    reference[2] = height
+    x = reference.copy()
+    steps = int(round(duration / ctrl.dt))
+    gust_every = int(round(1.0 / ctrl.dt))
+    tick_times, gust_ticks, resolves, violation = [], [], 0, 0.0
+
+    for k in range(steps):
+        if k % gust_every == gust_every // 2:
+            x[3:6] = GUST_VELOCITY * np.sign(np.sin(k))
+            gust_ticks.append(k)
+        start = time.perf_counter()
+        try:
+            u = ctrl.compute(x, reference)
+        except RuntimeError:
+            x_min, x_max = ctrl.x_min, ctrl.x_max
+            try:
+                for relaxed_min, relaxed_max in ((np.minimum(x_min, x), np.maximum(x_max, x)),
+                                                 (-np.inf, np.inf)):
+                    resolves += 1
+                    ctrl.set_bounds(x_min=relaxed_min, x_max=relaxed_max)
+                    try:
+                        u = ctrl.compute(x, reference)
+                        break
+                    except RuntimeError:
+                        continue
+            finally:
+                ctrl.set_bounds(x_min=x_min, x_max=x_max)
+        tick_times.append(time.perf_counter() - start)
+        violation = max(violation, ctrl.constraint_violation)
+        for _ in range(5):
+            x = model.step(x, u, ctrl.dt / 5)
+    tick_times = np.array(tick_times)
+    return tick_times, tick_times[gust_ticks], resolves, violation
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    parser.add_argument("--slack-penalty", type=float, default=None,
+                        help="defaults to the config's slack_penalty")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+    mpc = {key: value for key, value in config["mpc"].items() if key != "time_budget"}
+    penalty = args.slack_penalty or mpc.get("slack_penalty") or 1e3
+
+    print(f"{'bounds':<8}{'p50 [ms]':>10}{'p99 [ms]':>10}{'max [ms]':>10}"
+          f"{'gust mean [ms]':>16}{'re-solves':>11}{'max slack':>11}")
+    for name, slack_penalty in (("hard", None), ("soft", penalty)):
+        ctrl = MPCController.from_config({**mpc, "slack_penalty": slack_penalty}, model=model)
+        tick_times, gust_times, resolves, violation = run_episode(
+            ctrl, model, config["hover"]["height"], args.duration)
+        p50, p99 = 1e3 * np.percentile(tick_times, [50, 99])
+        print(f"{name:<8}{p50:>10.3f}{p99:>10.3f}{1e3 * tick_times.max():>10.3f}"
+              f"{1e3 * gust_times.mean():>16.3f}{resolves:>11d}{violation:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
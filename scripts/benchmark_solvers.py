@@ -0,0 +1,52 @@
+"""
+Closed-loop comparison of the MPC solver backends and tolerances.
+
+Flies the same simulated episode with every candidate from
+controllers.solver_selection, prints the per-tick time distribution and
+tracking cost of each, and reports which candidate `MPCController.autoselect`
+would pick for the given accuracy target.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_solvers [--config hover] [--accuracy 0.01]
+"""
+
+import argparse
+
+import numpy as np
+
+from controllers.quadrotor import QuadrotorModel
+from controllers.solver_selection import benchmark_solvers, select_solver
+from utils.config import load_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    parser.add_argument("--accuracy", type=float, default=0.01,
+                        help="allowed relative tracking-cost excess over the best candidate")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    mpc = config["mpc"]
+    results = benchmark_solvers(model=QuadrotorModel(**config.get("model", {})),
+                                dt=mpc["dt"], horizon=mpc["horizon"],
+                                Q=np.diag(mpc["Q"]), R=np.diag(mpc["R"]))
+    best_cost = min(r.cost for r in results)
+
+    print(f"{'candidate':<26}{'p50 [ms]':>10}{'p95 [ms]':>10}{'p99 [ms]':>10}{'max [ms]':>10}"
+          f"{'cost':>10}{'excess':>9}")
+    for r in results:
+        if r.failed:
+            print(f"{r.name:<26}{'failed':>10}")
+            continue
+        p50, p95, p99 = 1e3 * np.percentile(r.tick_times, [50, 95, 99])
+        print(f"{r.name:<26}{p50:>10.3f}{p95:>10.3f}{p99:>10.3f}{1e3 * r.tick_times.max():>10.3f}"
+              f"{r.cost:>10.3f}{100 * (r.cost / best_cost - 1):>8.2f}%")
+
+    best = select_solver(results, args.accuracy)
+    print(f"selected: {best.name} (accuracy target {100 * args.accuracy:g}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Startup cost of the MPC model data with and without the prediction cache.
+
+Times computing the discretization, terminal weight and prediction matrices
+from scratch, loading them from the on-disk cache, and hitting the
+in-memory cache, then the full MPCController construction on a warm cache
+and construction plus the first solve, which for cvxpy includes compiling
+the problem for the solver.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_startup [--horizon 50]
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.mpc import DEFAULT_Q, DEFAULT_R
+from controllers.prediction import clear_memory_cache, prediction_data
+from controllers.quadrotor import QuadrotorModel
+
+
+def timed(fn, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return 1e3 * np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--horizon", type=int, default=50)
+    parser.add_argument("--dt", type=float, default=0.02)
+    args = parser.parse_args()
+
+    model = QuadrotorModel()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        def compute():
+            clear_memory_cache()
+            prediction_data(model, args.dt, args.horizon, DEFAULT_Q, DEFAULT_R)
+
+        def load():
+            clear_memory_cache()
+            prediction_data(model, args.dt, args.horizon, DEFAULT_Q, DEFAULT_R, cache_dir)
+
+        def memory():
+            prediction_data(model, args.dt, args.horizon, DEFAULT_Q, DEFAULT_R, cache_dir)
+
+        rows = [("compute", timed(compute)), ("disk cache", timed(load)),
+                ("memory cache", timed(memory))]
+        for backend in ("osqp-direct", "cvxpy"):
+            def construct():
+                return MPCController(horizon=args.horizon, dt=args.dt, backend=backend,
+                                     cache_dir=cache_dir)
+
+            def first_solve():
+                ctrl = construct()
+                hover = np.zeros(ctrl.nx)
+                hover[2] = 1.0
+                ctrl.compute(hover, hover)
+
+            rows.append((f"{backend} ctor", timed(construct)))
+            rows.append((f"{backend} ctor+first solve", timed(first_solve)))
+
+    print(f"horizon={args.horizon} dt={args.dt}")
+    for name, ms in rows:
+        print(f"{name:<28}{ms:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Step-response metrics over many logged runs: vectorized vs one run at a time.
+
+Generates synthetic step responses (second-order with random natural
+frequency, damping, step size and length, plus sensor noise), pads them into
+one array and computes rise time, settling time, overshoot, steady-state
+error, IAE and ISE for all of them with `utils.step_response.step_metrics`,
+once in a single call and once calling it per run in a Python loop, as a
+per-run notebook analysis does. Reports the time for each and the metric
+summary of the collection.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_step_metrics [--runs 100 1000 5000] [--samples 1000] [--dt 0.01]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.step_response import pad_runs, step_metrics, summarize
+
+
+def synthetic_runs(n, samples, dt, seed=0):
+    """`n` noisy second-order step responses of 50-100 % of `samples` samples; (runs, targets)."""
+    rng = np.random.default_rng(seed)
+    wn = rng.uniform(2.0, 10.0, n)
+    zeta = rng.uniform(0.2, 0.9, n)
+    target = rng.uniform(0.2, 1.5, n)
+    t = dt * np.arange(samples)
+    wd = wn * np.sqrt(1.0 - zeta ** 2)
+    response = target[:, None] * (1.0 - np.exp(-zeta[:, None] * wn[:, None] * t) * (
+        np.cos(wd[:, None] * t) + (zeta / np.sqrt(1.0 - zeta ** 2))[:, None]
+        * np.sin(wd[:, None] * t)))
+    response += rng.normal(0.0, 0.002, response.shape)
+    lengths = rng.integers(samples // 2, samples + 1, n)
+    return pad_runs([run[:length] for run, length in zip(response, lengths)]), target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--dt", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{'runs':>6}{'vectorized [ms]':>17}{'per run [ms]':>14}{'speedup':>9}")
+    for n in args.runs:
+        runs, targets = synthetic_runs(n, args.samples, args.dt)
+        start = time.perf_counter()
+        metrics = step_metrics(runs, targets, args.dt, initial=0.0)
+        vectorized = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for run, target in zip(runs, targets):
+            run = run[~np.isnan(run)]
+            step_metrics(run, target, args.dt, initial=0.0)
+        looped = time.perf_counter() - start
+        print(f"{n:>6}{1e3 * vectorized:>17.1f}{1e3 * looped:>14.1f}{looped / vectorized:>9.1f}")
+
+    print(f"\n{'metric':<20}{'p50':>10}{'p95':>10}{'missing':>9}")
+    for name, stats in summarize(metrics).items():
+        print(f"{name:<20}{stats['p50']:>10.4f}{stats['p95']:>10.4f}{stats['missing']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Warm-start telemetry for MPCController on the hover config.
+
+Flies a simulated take-off and hover with the settings from
+configs/hover.yaml, once with cold starts and once with shifted primal/dual
+warm starts, and reports solver iteration counts, solve times and the
+anytime-mode deadline misses and fallbacks.
+
+Run from the repository root:
+
+    python -m scripts.benchmark_warm_start [--config configs/hover.yaml]
+"""
+
+import argparse
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+
+
+def run_episode(config, warm_start):
+    model = QuadrotorModel(**config.get("model", {}))
+    # Every tick must reach the solver for the iteration counts to mean anything.
+    ctrl = MPCController.from_config({**config["mpc"], "warm_start": warm_start,
+                                      "lqr_fast_path": False}, model=model)
+    reference = np.zeros(ctrl.nx)
+    reference[2] = config["hover"]["height"]
+    steps = int(round(config["hover"]["duration"] / ctrl.dt))
+
+    iterations, solve_times = [], []
+
+    def policy(x, k):
+        u = ctrl.compute(x, reference)
+        iterations.append(ctrl.iterations)
+        solve_times.append(ctrl.solve_time)
+        return u
+
+    simulate(policy, model, np.zeros(ctrl.nx), reference, steps, ctrl.dt)
+    return ctrl, np.array(iterations), np.array(solve_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    args = parser.parse_args()
+    config = load_config(args.config)
+
+    print(f"backend={config['mpc'].get('backend', 'cvxpy')} "
+          f"horizon={config['mpc'].get('horizon')} dt={config['mpc'].get('dt')}")
+    print(f"{'start':<8}{'iter mean':>11}{'iter p95':>10}{'iter max':>10}"
+          f"{'solve p50 [ms]':>16}{'solve p95 [ms]':>16}{'miss rate':>11}{'fallbacks':>11}")
+    for name, warm_start in (("cold", False), ("warm", True)):
+        ctrl, iterations, solve_times = run_episode(config, warm_start)
+        print(f"{name:<8}{iterations.mean():>11.1f}{np.percentile(iterations, 95):>10.0f}"
+              f"{iterations.max():>10d}{1e3 * np.median(solve_times):>16.3f}"
+              f"{1e3 * np.percentile(solve_times, 95):>16.3f}"
+              f"{ctrl.deadline_miss_rate:>11.3f}{ctrl.fallbacks:>11d}")
+
+
+if __name__ == "__main__":
+    main()
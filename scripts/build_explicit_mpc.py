@@ -0,0 +1,62 @@
+"""
+Offline build of the explicit hover MPC law.
+
+Solves the multiparametric QP for the MPC settings in a config file and
+stores the piecewise-affine law (regions, gains and search tree) as an .npz
+file that `MPCController(backend="explicit", explicit_path=...)` loads at
+startup. Also reports region counts and the online lookup time.
+
+Run from the repository root:
+
+    python -m scripts.build_explicit_mpc [--config hover] [--horizon 10]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+
+EXPLICIT_UNSUPPORTED = ("solver_options", "slack_penalty", "time_budget", "step_durations",
+                        "move_blocks", "linearization")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    parser.add_argument("--horizon", type=int, default=None,
+                        help="override the config horizon (region count grows quickly with it)")
+    parser.add_argument("--output", default="data/hover_explicit_mpc.npz")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    mpc_config = {**config["mpc"], "backend": "explicit", "explicit_path": args.output}
+    # Online-solver settings the explicit backend does not take.
+    for key in EXPLICIT_UNSUPPORTED:
+        mpc_config.pop(key, None)
+    if args.horizon is not None:
+        mpc_config["horizon"] = args.horizon
+    model = QuadrotorModel(**config.get("model", {}))
+
+    start = time.perf_counter()
+    ctrl = MPCController.from_config(mpc_config, model=model)
+    print(f"built in {time.perf_counter() - start:.1f} s -> {args.output}")
+    print(f"regions per subsystem: {ctrl._backend.n_regions}")
+
+    rng = np.random.default_rng(0)
+    reference = np.zeros(ctrl.nx)
+    reference[2] = config["hover"]["height"]
+    times = []
+    for _ in range(2000):
+        state = reference + rng.normal(scale=0.05, size=ctrl.nx)
+        ctrl.compute(state, reference)
+        times.append(ctrl.solve_time)
+    print(f"lookup p50 {1e6 * np.median(times):.1f} us, "
+          f"p99 {1e6 * np.percentile(times, 99):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
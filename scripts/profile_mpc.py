@@ -0,0 +1,53 @@
+"""
+Tick-time profile of MPCController exported to log files.
+
+Flies a simulated take-off and hover with the settings from
+configs/hover.yaml, logs the p50/p95/p99/max summary of every tick phase
+(parameter update, solve, extraction), iteration counts and statuses, and
+writes the per-tick records and the latency histogram as CSV files for
+post-flight analysis.
+
+Run from the repository root:
+
+    python -m scripts.profile_mpc [--config hover] [--log-dir logs]
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.logger import log_summary, write_histogram, write_ticks
+from utils.simulation import simulate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="hover")
+    parser.add_argument("--log-dir", default="logs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = load_config(args.config)
+    model = QuadrotorModel(**config.get("model", {}))
+    ctrl = MPCController.from_config(config["mpc"], model=model)
+
+    reference = np.zeros(ctrl.nx)
+    reference[2] = config["hover"]["height"]
+    steps = int(round(config["hover"]["duration"] / ctrl.dt))
+    simulate(lambda x, k: ctrl.compute(x, reference), model, np.zeros(ctrl.nx), reference,
+             steps, ctrl.dt)
+
+    name = Path(args.config).stem
+    log_summary(ctrl.tick_log, name=name)
+    log_dir = Path(args.log_dir)
+    for path in (write_ticks(ctrl.tick_log, log_dir / f"{name}_mpc_ticks.csv"),
+                 write_histogram(ctrl.tick_log, log_dir / f"{name}_mpc_histogram.csv")):
+        logging.info("wrote %s", path)
+
+
+if __name__ == "__main__":
+    main()
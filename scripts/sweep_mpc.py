@@ -0,0 +1,71 @@
+"""
+Horizon, dt, weight and tolerance sweep of the MPC on the circle trajectory.
+
+Flies the trajectory from configs/trajectory.yaml with every combination of
+the swept values on top of its mpc section, one configuration per joblib
+worker, and prints the Pareto front of RMS position error against p99 tick
+time, followed by the cheapest configuration within --max-error. A swept
+horizon or dt is uniform (the config's non-uniform horizon and move
+blocking are dropped).
+
+Run from the repository root:
+
+    python -m scripts.sweep_mpc [--config trajectory] [--max-error 0.06] [--jobs N]
+        [--horizon 10 20 30] [--dt 0.02 0.04] [--q-scale 1] [--r-scale 0.5 1 2]
+        [--eps 1e-3 1e-5] [--all]
+"""
+
+import argparse
+
+from controllers import MPCController
+from controllers.parameter_sweep import DEFAULT_GRID, cheapest, pareto_front, sweep
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+
+
+def format_row(result, marker=""):
+    p = result.params
+    return (f"{marker:<2}{p['horizon']:>8}{p['dt']:>7.3f}{p['q_scale']:>8.2f}{p['r_scale']:>8.2f}"
+            f"{p['eps']:>8.0e}{result.rms_error:>15.4f}{1e3 * result.p50:>10.3f}"
+            f"{1e3 * result.p99:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="trajectory")
+    parser.add_argument("--max-error", type=float, default=0.06, help="RMS position error [m]")
+    parser.add_argument("--jobs", type=int, default=None, help="workers (default: physical cores)")
+    parser.add_argument("--horizon", type=int, nargs="+", default=DEFAULT_GRID["horizon"])
+    parser.add_argument("--dt", type=float, nargs="+", default=DEFAULT_GRID["dt"])
+    parser.add_argument("--q-scale", type=float, nargs="+", default=(1.0,))
+    parser.add_argument("--r-scale", type=float, nargs="+", default=DEFAULT_GRID["r_scale"])
+    parser.add_argument("--eps", type=float, nargs="+", default=DEFAULT_GRID["eps"])
+    parser.add_argument("--all", action="store_true", help="print every configuration")
+    args = parser.parse_args()
+    config = load_config(args.config)
+    base = {**MPCController.config_kwargs(config["mpc"]),
+            "model": QuadrotorModel(**config.get("model", {}))}
+    grid = {"horizon": args.horizon, "dt": args.dt, "q_scale": args.q_scale,
+            "r_scale": args.r_scale, "eps": args.eps}
+
+    results = sweep(grid, base, config.get("trajectory", "circle"), n_jobs=args.jobs)
+    front = pareto_front(results)
+    failed = sum(r.failed for r in results)
+
+    print(f"{len(results)} configurations, {failed} failed; * marks the Pareto front")
+    print(f"{'':<2}{'horizon':>8}{'dt':>7}{'q_scale':>8}{'r_scale':>8}{'eps':>8}"
+          f"{'rms error [m]':>15}{'p50 [ms]':>10}{'p99 [ms]':>10}")
+    shown = sorted((r for r in results if not r.failed), key=lambda r: r.p99) if args.all else front
+    for result in shown:
+        print(format_row(result, "*" if any(result is r for r in front) else ""))
+
+    best = cheapest(results, args.max_error)
+    if best is None:
+        print(f"no configuration tracks within {args.max_error} m")
+    else:
+        print(f"cheapest within {args.max_error} m:")
+        print(format_row(best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import numpy as np
+
+
+def hover_reference(z=0.5):
+    """Hover setpoint at height `z`: zero state except the altitude."""
+    ref = np.zeros(8)
+    ref[2] = z
+    return ref
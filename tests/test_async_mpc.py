@@ -0,0 +1,91 @@
+import time
+
+import numpy as np
+import pytest
+
+from controllers import AsyncMPCController, MPCController
+from controllers.async_mpc import Plan, plan_input
+
+from conftest import hover_reference
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail("timed out waiting for the solver thread")
+        time.sleep(0.001)
+
+
+def test_plan_input_is_indexed_by_time():
+    plan = Plan(t0=1.0, dt=0.1, u=np.arange(3.0)[:, None], x=None)
+    assert plan_input(plan, 0.5)[0] == 0.0
+    assert plan_input(plan, 1.15)[0] == 1.0
+    assert plan_input(plan, 9.0)[0] == 2.0
+
+
+def test_prediction_integrates_committed_inputs():
+    amc = AsyncMPCController(MPCController(horizon=10, backend="osqp-direct"))
+    state = np.zeros(8)
+    state[3] = 1.0
+    predicted = amc.predict(state, timestamp=0.0, latency=0.05)
+    assert predicted[0] == pytest.approx(0.05)
+    np.testing.assert_allclose(predicted[[1, 2, 4, 5, 6, 7]], 0.0, atol=1e-12)
+
+
+def test_worker_publishes_plan_for_latest_state():
+    ctrl = MPCController(horizon=10, backend="osqp-direct")
+    amc = AsyncMPCController(ctrl, link_latency=0.01)
+    np.testing.assert_array_equal(amc.get_input(), 0.0)
+
+    amc.update(np.zeros(8), hover_reference(0.3))
+    amc.update(np.zeros(8), hover_reference(0.5))
+    with amc:
+        wait_for(lambda: amc.solves == 1)
+    assert amc.dropped == 1
+
+    plan = amc.plan
+    assert plan.u.shape == (10, 3)
+    np.testing.assert_array_equal(amc.get_input(plan.t0), plan.u[0])
+    np.testing.assert_array_equal(amc.get_input(plan.t0 + 2.5 * ctrl.dt), plan.u[2])
+    assert plan.u[0][2] > 0.0
+
+
+def test_callable_reference_is_evaluated_at_plan_start():
+    seen = []
+
+    def reference(t):
+        seen.append(t)
+        return hover_reference()
+
+    amc = AsyncMPCController(MPCController(horizon=10, backend="osqp-direct"))
+    with amc:
+        stamp = time.monotonic()
+        amc.update(np.zeros(8), reference, timestamp=stamp)
+        wait_for(lambda: amc.solves == 1)
+    assert seen[0] == pytest.approx(amc.plan.t0)
+    assert amc.plan.t0 > stamp
+
+
+def test_failed_and_fallback_solves_keep_worker_and_plan():
+    bounds = np.array([np.inf, np.inf, np.inf, 1.0, 1.0, 1.0, 1.0, 1.0])
+    ctrl = MPCController(horizon=10, backend="osqp-direct", time_budget=0.05,
+                         x_min=-bounds, x_max=bounds)
+    amc = AsyncMPCController(ctrl)
+    falling = np.zeros(8)
+    falling[5] = 10.0  # outside the hard velocity bounds: infeasible, falls back
+    with amc:
+        amc.update(falling, hover_reference())
+        wait_for(lambda: amc.failures == 1)
+        assert amc.plan is None and amc.last_error is None
+
+        amc.update(np.zeros(8), np.zeros(5))  # bad reference shape
+        wait_for(lambda: amc.failures == 2)
+        assert isinstance(amc.last_error, ValueError)
+
+        amc.update(np.zeros(8), hover_reference())
+        wait_for(lambda: amc.solves == 1)
+        plan = amc.plan
+        amc.update(falling, hover_reference())
+        wait_for(lambda: amc.failures == 3)
+    assert amc.plan is plan
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from controllers import CascadedPIDController
+from controllers.autotune import (
+    SEARCH_SPACE, candidate_gains, default_episode, evaluate, params_from_gains,
+    sample_candidates, step_metrics, tune)
+
+GAINS = {"position": {"kp": [2.0, 2.0, 2.5]},
+         "velocity": {"kp": [4.0, 4.0, 6.0], "ki": [0.5, 0.5, 2.0], "integral_limit": 1.0,
+                      "schedule": {"variables": {}}},
+         "attitude": {"kp": 2.0}}
+
+
+def test_candidate_gains_round_trip():
+    names, params = sample_candidates(5, seed=0)
+    low, high = np.array([SEARCH_SPACE[name] for name in names]).T
+    assert params.shape == (5, len(names))
+    assert np.all((params >= low) & (params <= high))
+
+    gains = candidate_gains(names, params, GAINS)
+    assert "schedule" not in gains["velocity"]
+    assert gains["velocity"]["integral_limit"] == 1.0
+    assert gains["velocity"]["kp"].shape == (5, 3)
+    assert gains["attitude"]["kp"].shape == (5, 2)
+    np.testing.assert_allclose(gains["velocity"]["kp"][:, 0], gains["velocity"]["kp"][:, 1])
+    np.testing.assert_allclose(params_from_gains(names, {loop: {k: v[2] for k, v in g.items()
+                                                                if k != "integral_limit"}
+                                                         for loop, g in gains.items()}),
+                               params[2])
+    np.testing.assert_allclose(params_from_gains(names, GAINS), [2.0, 2.5, 4.0, 6.0, 0.5, 2.0, 2.0])
+
+
+def test_step_metrics_first_order_response():
+    dt, tau = 0.001, 0.2
+    t = dt * np.arange(3001)
+    target = np.array([0.5, 0.0, 1.0])
+    # Run 0: first-order responses; run 1: same with 20 % overshoot in z.
+    response = 1.0 - np.exp(-t / tau)
+    positions = np.zeros((len(t), 2, 3))
+    positions[:, :, 0] = 0.5 * response[:, None]
+    positions[:, 0, 2] = response
+    positions[:, 1, 2] = response + 0.2 * np.sin(np.pi * np.clip(t, 0, 1))
+    rise, overshoot, _ = step_metrics(positions, np.r_[target, np.zeros(5)], dt)
+    assert rise[0] == pytest.approx(tau * np.log(9.0), abs=2 * dt)
+    assert overshoot[0] == 0.0
+    assert overshoot[1] > 0.1
+
+
+def test_batched_evaluation_matches_single_controller():
+    names = list(SEARCH_SPACE)
+    params = np.vstack([params_from_gains(names, GAINS), sample_candidates(3, seed=1)[1]])
+    episode = {**default_episode(), "duration": 1.0}
+    rise, overshoot, rms, score = evaluate(names, params, {"gains": GAINS}, episode=episode)
+    assert score.shape == (4,)
+
+    ctrl = CascadedPIDController(gains={k: {g: v for g, v in gains.items() if g != "schedule"}
+                                        for k, gains in GAINS.items()})
+    target = episode["target"]
+    x, errors = np.zeros(8), [np.sum(target[:3] ** 2)]
+    for _ in range(int(round(1.0 / ctrl.dt))):
+        x = ctrl.model.step(x, ctrl.compute(x, target), ctrl.dt)
+        errors.append(np.sum((x[:3] - target[:3]) ** 2))
+    assert rms[0] == pytest.approx(np.sqrt(np.mean(errors)), rel=1e-9)
+
+
+def test_tune_ranks_candidates():
+    episode = {**default_episode(), "duration": 0.5}
+    results = tune(40, episode=episode, chunk_size=16, n_jobs=2, seed=0)
+    assert len(results) == 40
+    scores = [r.score for r in results]
+    assert scores == sorted(scores)
+    assert set(results[0].params) == set(SEARCH_SPACE)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from controllers import BatchMPCController, MPCController
+from controllers import batch_mpc
+
+
+def test_batch_matches_serial_controllers():
+    rng = np.random.default_rng(0)
+    states = rng.normal(scale=0.1, size=(3, 8))
+    references = np.zeros((3, 8))
+    references[:, 2] = [0.3, 0.5, 0.7]
+    kwargs = {"horizon": 10, "backend": "osqp-direct"}
+
+    with BatchMPCController(3, n_jobs=2, **kwargs) as batch:
+        for _ in range(2):
+            inputs = batch.compute(states, references)
+        assert batch.u_plans.shape == (3, 10, 3)
+
+    for state, reference, u in zip(states, references, inputs):
+        ctrl = MPCController(**kwargs)
+        np.testing.assert_allclose(u, ctrl.compute(state, reference), atol=1e-4)
+
+
+def test_shared_setpoint_and_shape_check():
+    with BatchMPCController(2, n_jobs=1, horizon=10, backend="osqp-direct") as batch:
+        reference = np.zeros(8)
+        reference[2] = 0.5
+        inputs = batch.compute(np.zeros((2, 8)), reference)
+        np.testing.assert_allclose(inputs[0], inputs[1])
+        with pytest.raises(ValueError):
+            batch.compute(np.zeros((3, 8)), reference)
+
+
+def test_batches_keep_their_own_controllers():
+    reference = np.zeros(8)
+    reference[2] = 0.5
+    for horizon in (10, 5):
+        with BatchMPCController(2, n_jobs=2, horizon=horizon, backend="osqp-direct") as batch:
+            batch.compute(np.zeros((2, 8)), reference)
+            assert batch.u_plans.shape == (2, horizon, 3)
+    assert batch._executors == []
+
+
+def held_drones():
+    return sorted(batch_mpc._WORKER_CONTROLLERS)
+
+
+def test_drones_are_pinned_to_their_workers():
+    reference = np.zeros(8)
+    reference[2] = 0.5
+    with BatchMPCController(4, n_jobs=2, horizon=10, backend="osqp-direct") as batch:
+        for _ in range(10):
+            batch.compute(np.zeros((4, 8)), reference)
+        held = [executor.submit(held_drones).result() for executor in batch._executors]
+    assert held == [[0, 1], [2, 3]]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from controllers import CascadedPIDController
+from utils.simulation import simulate
+
+from conftest import hover_reference
+
+
+def test_loops_run_at_their_rates():
+    ctrl = CascadedPIDController(rates={"position": 50.0, "velocity": 100.0, "attitude": 500.0})
+    assert ctrl.dt == pytest.approx(0.002)
+    for _ in range(100):
+        ctrl.compute(np.zeros(8), hover_reference())
+    stats = ctrl.timing_stats()
+    assert [stats[name]["calls"] for name in ("position", "velocity", "attitude")] == [10, 20, 100]
+    assert 0.0 < stats["attitude"]["p50"] <= stats["attitude"]["max"]
+    assert ctrl.stages["velocity"].pid.dt == pytest.approx(0.01)
+
+
+def test_velocity_setpoint_including_feed_forward_is_limited():
+    ctrl = CascadedPIDController(max_speed=1.0)
+    reference = hover_reference(z=3.0)
+    reference[3] = 0.8
+    ctrl.compute(np.zeros(8), reference)
+    np.testing.assert_allclose(ctrl._velocity_setpoint, [0.8, 0.0, 1.0])
+
+    ctrl.reset()
+    reference[3] = -2.0
+    ctrl.compute(np.zeros(8), reference)
+    assert ctrl._velocity_setpoint[0] == -1.0
+
+
+def test_rates_must_divide_scheduler_rate():
+    with pytest.raises(ValueError, match="velocity"):
+        CascadedPIDController(rates={"velocity": 300.0})
+
+
+def test_cascade_reaches_hover_setpoint():
+    ctrl = CascadedPIDController()
+    target = hover_reference(0.7)
+    target[0] = 0.3
+    states, inputs, errors = simulate(lambda x, k: ctrl.compute(x, target), ctrl.model,
+                                      np.zeros(8), target, int(4.0 / ctrl.dt), ctrl.dt)
+    assert np.abs(errors[-1, :3]).max() < 0.01
+    assert np.abs(inputs[:, :2]).max() <= ctrl.max_tilt + 1e-12
+
+
+def test_reset_restarts_scheduler():
+    ctrl = CascadedPIDController()
+    for _ in range(7):
+        ctrl.compute(np.zeros(8), hover_reference())
+    ctrl.reset()
+    assert ctrl.tick == 0
+    assert ctrl.timing_stats()["position"]["calls"] == 0
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+
+from conftest import hover_reference
+
+pytest.importorskip("pybind11")
+
+
+@pytest.fixture(scope="module")
+def codegen_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("codegen")
+    MPCController(horizon=10, backend="osqp-direct",
+                  slack_penalty=1e3).export_codegen(directory)
+    return directory
+
+
+def test_codegen_backend_matches_osqp_direct(codegen_dir):
+    kwargs = {"horizon": 10, "slack_penalty": 1e3}
+    generated = MPCController(backend="osqp-codegen", codegen_dir=codegen_dir, **kwargs)
+    direct = MPCController(backend="osqp-direct", **kwargs)
+    # The exported module was loaded, not rebuilt.
+    assert len(list(codegen_dir.iterdir())) == 1
+
+    model, x = QuadrotorModel(), np.zeros(8)
+    reference = hover_reference(0.7)
+    reference[0] = 0.5
+    for _ in range(50):
+        u = generated.compute(x, reference)
+        # Generated code has no solution polishing, hence the looser tolerance.
+        np.testing.assert_allclose(u, direct.compute(x, reference), atol=5e-3)
+        x = model.step(x, u, generated.dt)
+    assert generated.iterations > 0
+
+
+def test_codegen_backend_reports_failures(codegen_dir):
+    ctrl = MPCController(horizon=10, backend="osqp-codegen", codegen_dir=codegen_dir)
+    gust = hover_reference()
+    gust[5] = 10.0
+    with pytest.raises(RuntimeError):
+        ctrl.compute(gust, hover_reference())
+    np.testing.assert_allclose(ctrl.compute(hover_reference(), hover_reference()), 0.0,
+                               atol=1e-4)
+
+
+def test_codegen_configuration_is_validated():
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, backend="osqp-codegen")
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, backend="osqp-codegen", cache_dir="data/cache",
+                      time_budget=0.01)
+    with pytest.raises(ValueError):
+        MPCController(horizon=4).export_codegen("unused")
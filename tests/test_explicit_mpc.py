@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from controllers import MPCController
+from controllers.explicit_mpc import ExplicitLaw
+
+from conftest import hover_reference
+
+
+@pytest.fixture(scope="module")
+def explicit_path(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("explicit") / "hover.npz")
+
+
+@pytest.fixture(scope="module")
+def explicit(explicit_path):
+    return MPCController(horizon=6, backend="explicit", explicit_path=explicit_path)
+
+
+def test_hover_model_splits_into_three_axes(explicit):
+    assert len(explicit._backend.subsystems) == 3
+    assert all(n > 1 for n in explicit._backend.n_regions)
+
+
+def test_explicit_matches_online_solution(explicit):
+    online = MPCController(horizon=6, backend="osqp-direct",
+                           solver_options={"eps_abs": 1e-9, "eps_rel": 1e-9})
+    reference = hover_reference()
+    rng = np.random.default_rng(0)
+    scale = np.array([0.8, 0.8, 0.8, 1.0, 1.0, 1.0, 0.3, 0.3])
+    for _ in range(50):
+        x = reference + rng.uniform(-1, 1, 8) * scale
+        np.testing.assert_allclose(explicit.compute(x, reference), online.compute(x, reference),
+                                   atol=1e-6)
+        np.testing.assert_allclose(explicit.x_plan, online.x_plan, atol=1e-6)
+
+
+def test_law_is_loaded_from_disk(explicit, explicit_path):
+    loaded = MPCController(horizon=6, backend="explicit", explicit_path=explicit_path)
+    for (_, _, a), (_, _, b) in zip(explicit._backend.subsystems, loaded._backend.subsystems):
+        for name in ExplicitLaw.FIELDS:
+            np.testing.assert_array_equal(getattr(a, name), getattr(b, name))
+
+
+def test_tree_lookup_agrees_with_region_scan(explicit):
+    _, _, law = explicit._backend.subsystems[0]
+    rng = np.random.default_rng(1)
+    for theta in rng.uniform(law.theta_min, law.theta_max, size=(200, len(law.theta_min))):
+        found = law.locate(theta)
+        inside = [i for i in range(len(law)) if law.contains(i, theta)]
+        assert (found in inside) if inside else found == -1
+
+
+def test_explicit_rejects_bound_changes_and_trajectories(explicit):
+    with pytest.raises(ValueError):
+        explicit.set_bounds(u_max=[0.1, 0.1, 0.1])
+    trajectory = np.zeros((7, 8))
+    trajectory[:, 0] = np.linspace(0.0, 0.3, 7)
+    with pytest.raises(ValueError):
+        explicit.compute(np.zeros(8), trajectory)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from controllers import CascadedPIDController, PIDController
+from controllers.gain_schedule import GainSchedule
+from utils.config import load_config
+
+
+def bilinear_gains(points):
+    # Multilinear in the variables, so the table interpolates it exactly.
+    altitude, vbat = points[..., 0], points[..., 1]
+    kp = 1.0 + 0.5 * altitude - 0.2 * vbat + 0.1 * altitude * vbat
+    return np.stack([kp, 0.5 * kp, 0.1 * kp], axis=-1)
+
+
+def test_lookup_interpolates_table():
+    schedule = GainSchedule.from_function(bilinear_gains, {"altitude": (0.0, 2.0),
+                                                           "vbat": (3.0, 4.2)}, resolution=5)
+    assert schedule.table.shape == (5, 5, 3)
+    assert schedule.table.dtype == np.float32
+    points = np.random.default_rng(0).uniform([0.0, 3.0], [2.0, 4.2], size=(50, 2))
+    np.testing.assert_allclose(schedule.lookup(points), bilinear_gains(points), rtol=1e-5)
+    # Outside the grid the operating point is clamped.
+    np.testing.assert_allclose(schedule.lookup([5.0, 2.0]),
+                               bilinear_gains(np.array([2.0, 3.0])), rtol=1e-5)
+
+
+def test_from_config_scales_per_axis_gains():
+    config = {"resolution": 3, "variables": {
+        "altitude": {"breakpoints": [0.0, 2.0], "scale": [1.0, 2.0]},
+        "vbat": {"breakpoints": [3.0, 4.0], "scale": [[1.0, 1.0, 1.0], [0.5, 1.0, 2.0]],
+                 "default": 3.7},
+    }}
+    schedule = GainSchedule.from_config(config, kp=[4.0, 6.0], ki=1.0, kd=0.5)
+    assert schedule.variables == ("altitude", "vbat")
+    assert schedule.defaults == {"vbat": 3.7}
+    gains = schedule.lookup([[1.0, 4.0], [0.0, 3.0]])
+    assert gains.shape == (2, 2, 3)
+    np.testing.assert_allclose(gains[0], 1.5 * np.array([[2.0, 1.0, 1.0], [3.0, 1.0, 1.0]]),
+                               rtol=1e-6)
+    np.testing.assert_allclose(gains[1], [[4.0, 1.0, 0.5], [6.0, 1.0, 0.5]], rtol=1e-6)
+
+
+def test_pid_schedules_gains_per_vehicle():
+    schedule = GainSchedule.from_function(bilinear_gains, {"altitude": (0.0, 2.0),
+                                                           "vbat": (3.0, 4.2)}, resolution=5)
+    pid = PIDController(kp=1.0, shape=(3, 4), gain_schedule=schedule)
+    points = np.array([[0.0, 3.0], [1.0, 3.7], [2.0, 4.2]])
+    pid.set_operating_point(points[:, None, :])
+    np.testing.assert_allclose(pid.kp, np.repeat(bilinear_gains(points)[:, :1], 4, axis=1),
+                               rtol=1e-5)
+
+    scalar = PIDController(kp=1.0, gain_schedule=schedule)
+    scalar.set_operating_point([1.0, 3.7])
+    assert scalar.ki == pytest.approx(bilinear_gains(np.array([1.0, 3.7]))[1], rel=1e-5)
+
+
+def test_cascade_schedules_from_config():
+    ctrl = CascadedPIDController.from_config(load_config("hover")["cascade"])
+    pid = ctrl.stages["velocity"].pid
+    assert pid.gain_schedule.variables == ("altitude", "vbat")
+    state, reference = np.zeros(8), np.zeros(8)
+    ctrl.compute(state, reference)
+    low = pid.kp.copy()
+    state[2] = 1.0
+    ctrl.reset()
+    ctrl.compute(state, reference, operating_point={"vbat": 3.0})
+    # The 3.7 V breakpoint falls between grid points, so the default is only
+    # interpolated to within a fraction of a percent.
+    np.testing.assert_allclose(pid.kp, low / 0.8 * 1.2, rtol=5e-3)
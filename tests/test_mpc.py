@@ -0,0 +1,326 @@
+import numpy as np
+import cvxpy as cp
+import pytest
+
+from controllers import MPCController
+from controllers.quadrotor import QuadrotorModel
+from controllers.prediction import affine_stages
+from utils.config import load_config
+from utils.simulation import simulate
+from utils.trajectory import load_trajectory
+
+from conftest import hover_reference
+
+
+@pytest.fixture(scope="module")
+def mpc():
+    return MPCController(horizon=15)
+
+
+def test_problem_is_dpp_and_built_once(mpc):
+    problem = mpc.problem
+    assert problem.is_dpp()
+    mpc.compute(np.zeros(8), hover_reference())
+    mpc.compute(np.full(8, 0.01), hover_reference(0.3))
+    assert mpc.problem is problem
+
+
+def test_at_reference_returns_zero_input(mpc):
+    u = mpc.compute(hover_reference(), hover_reference())
+    np.testing.assert_allclose(u, 0.0, atol=1e-4)
+
+
+def test_climb_command_increases_thrust(mpc):
+    u = mpc.compute(np.zeros(8), hover_reference(1.0))
+    assert u[2] > 0.0
+
+
+def test_bounds_are_respected_and_updatable(mpc):
+    mpc.set_bounds(u_max=[0.1, 0.1, 0.05])
+    try:
+        mpc.compute(np.zeros(8), hover_reference(2.0))
+        assert np.all(mpc.u_plan <= np.array([0.1, 0.1, 0.05]) + 1e-4)
+    finally:
+        mpc.set_bounds(u_max=[0.35, 0.35, 0.3])
+
+
+def test_trajectory_reference_shape_is_checked(mpc):
+    with pytest.raises(ValueError):
+        mpc.compute(np.zeros(8), np.zeros((3, 8)))
+
+
+def test_closed_loop_hover_converges():
+    model = QuadrotorModel()
+    ctrl = MPCController(horizon=15)
+    x = np.zeros(8)
+    ref = hover_reference(0.5)
+    for _ in range(150):
+        u = ctrl.compute(x, ref)
+        for _ in range(10):
+            x = x + 0.002 * model.dynamics(x, u)
+    np.testing.assert_allclose(x, ref, atol=1e-2)
+
+
+def test_osqp_direct_matches_cvxpy():
+    reference = hover_reference(0.5)
+    cvx = MPCController(horizon=15)
+    direct = MPCController(horizon=15, backend="osqp-direct")
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        x = rng.normal(scale=0.2, size=8)
+        np.testing.assert_allclose(direct.compute(x, reference), cvx.compute(x, reference),
+                                   atol=1e-4)
+        np.testing.assert_allclose(direct.x_plan, cvx.x_plan, atol=1e-4)
+
+
+def test_osqp_direct_bounds_update():
+    direct = MPCController(horizon=15, backend="osqp-direct")
+    direct.set_bounds(u_max=[0.1, 0.1, 0.05])
+    direct.compute(np.zeros(8), hover_reference(2.0))
+    assert np.all(direct.u_plan <= np.array([0.1, 0.1, 0.05]) + 1e-4)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        MPCController(backend="gurobi")
+
+
+def test_shifted_warm_start_matches_cold_start_and_saves_iterations():
+    model = QuadrotorModel()
+    reference = hover_reference(0.5)
+    options = {"check_termination": 5}
+    warm = MPCController(horizon=15, backend="osqp-direct", solver_options=options)
+    cold = MPCController(horizon=15, backend="osqp-direct", solver_options=options,
+                         warm_start=False)
+    x = np.zeros(8)
+    warm_iters, cold_iters = [], []
+    for _ in range(100):
+        u = warm.compute(x, reference)
+        np.testing.assert_allclose(u, cold.compute(x, reference), atol=1e-4)
+        warm_iters.append(warm.iterations)
+        cold_iters.append(cold.iterations)
+        x = model.step(x, u, warm.dt)
+    assert np.mean(warm_iters[50:]) < 0.5 * np.mean(cold_iters[50:])
+
+
+def test_from_config_expands_diagonal_weights():
+    ctrl = MPCController.from_config({"horizon": 10, "Q": [1.0] * 8, "R": [2.0] * 3,
+                                      "backend": "osqp-direct"})
+    np.testing.assert_array_equal(ctrl.R, 2.0 * np.eye(3))
+    assert ctrl.horizon == 10
+
+
+def test_anytime_mode_falls_back_to_shifted_plan():
+    ctrl = MPCController(horizon=15, backend="osqp-direct", time_budget=0.05)
+    reference = hover_reference(0.5)
+    ctrl.compute(np.zeros(8), reference)
+    previous = ctrl.u_plan.copy()
+
+    # A vertical speed far outside the state bounds makes the QP infeasible.
+    state = np.zeros(8)
+    state[5] = 10.0
+    u = ctrl.compute(state, reference)
+    np.testing.assert_array_equal(u, previous[1])
+    np.testing.assert_array_equal(ctrl.compute(state, reference), previous[2])
+    assert (ctrl.ticks, ctrl.fallbacks, ctrl.infeasible_ticks) == (3, 2, 2)
+    assert ctrl.deadline_misses == 0 and ctrl.deadline_miss_rate == 0.0
+
+
+def test_anytime_mode_rejects_time_limited_inaccurate_solutions():
+    # SCS stopped by its time limit reports "optimal_inaccurate" with inputs
+    # far outside the bounds; anytime mode must not send those.
+    ctrl = MPCController(horizon=15, solver=cp.SCS, time_budget=0.05)
+    state = np.zeros(8)
+    state[5] = 10.0
+    u = ctrl.compute(state, hover_reference(1.0))
+    assert np.all(u >= ctrl.u_min) and np.all(u <= ctrl.u_max)
+    assert ctrl.fallbacks == 1
+    assert ctrl.deadline_misses + ctrl.infeasible_ticks == 1
+
+
+def test_anytime_mode_respects_solver_time_limit():
+    ctrl = MPCController(horizon=15, backend="osqp-direct", time_budget=1e-7)
+    for _ in range(3):
+        np.testing.assert_array_equal(ctrl.compute(np.zeros(8), hover_reference(1.0)), 0.0)
+    assert ctrl.fallbacks == 3 and ctrl.deadline_miss_rate == 1.0
+    ctrl.reset_counters()
+    assert ctrl.ticks == ctrl.fallbacks == ctrl.deadline_misses == 0
+
+
+def test_without_budget_failures_raise():
+    ctrl = MPCController(horizon=15, backend="osqp-direct")
+    state = np.zeros(8)
+    state[5] = 10.0
+    with pytest.raises(RuntimeError):
+        ctrl.compute(state, hover_reference())
+
+
+def test_uniform_step_durations_match_default():
+    x0 = np.full(8, 0.05)
+    default = MPCController(horizon=10, backend="osqp-direct")
+    explicit = MPCController(horizon=10, backend="osqp-direct",
+                             step_durations=[0.02] * 10, move_blocks=[1] * 10)
+    np.testing.assert_allclose(explicit.compute(x0, hover_reference()),
+                               default.compute(x0, hover_reference()), atol=1e-6)
+
+
+def test_move_blocking_and_variable_steps_agree_across_backends():
+    kwargs = {"horizon": 10, "step_durations": [0.02] * 4 + [0.1] * 6,
+              "move_blocks": [1, 1, 2, 6]}
+    x0 = np.full(8, 0.05)
+    direct = MPCController(backend="osqp-direct", **kwargs)
+    u = direct.compute(x0, hover_reference())
+    np.testing.assert_allclose(direct.step_times[-1], 0.68)
+    np.testing.assert_allclose(direct.u_plan[2], direct.u_plan[3])
+    np.testing.assert_allclose(direct.u_plan[4:], np.tile(direct.u_plan[4], (6, 1)))
+
+    ctrl = MPCController(**kwargs)
+    np.testing.assert_allclose(ctrl.compute(x0, hover_reference()), u, atol=1e-4)
+    np.testing.assert_allclose(ctrl.x_plan, direct.x_plan, atol=1e-3)
+
+
+def test_horizon_structure_is_validated():
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, step_durations=[0.05, 0.05, 0.05, 0.05])
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, move_blocks=[2, 1])
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, move_blocks=[2, 2], backend="explicit")
+
+
+def test_from_config_expands_step_duration_runs():
+    config = load_config("trajectory")
+    ctrl = MPCController.from_config(config["mpc"])
+    assert len(ctrl.step_durations) == ctrl.horizon
+    np.testing.assert_allclose(ctrl.step_times[-1], 2.0)
+    u = ctrl.compute(np.zeros(8), hover_reference())
+    assert u[2] > 0.0
+
+
+@pytest.mark.parametrize("backend", ["cvxpy", "osqp-direct"])
+def test_soft_constraints_survive_a_gust(backend):
+    gust = hover_reference()
+    gust[5] = -3.0  # vertical velocity beyond its 1.5 m/s bound
+    with pytest.raises(RuntimeError):
+        MPCController(horizon=15, backend=backend).compute(gust, hover_reference())
+
+    soft = MPCController(horizon=15, backend=backend, slack_penalty=1e3)
+    u = soft.compute(gust, hover_reference())
+    assert u[2] > 0.0
+    assert soft.constraint_violation > 0.5
+    assert np.all(soft.u_plan <= soft.u_max + 1e-4)
+
+
+def test_soft_constraints_are_exact_when_feasible():
+    x0 = np.zeros(8)
+    x0[5] = 1.4
+    reference = hover_reference(3.0)  # drives vz into its bound
+    hard = MPCController(horizon=15, backend="osqp-direct")
+    soft = MPCController(horizon=15, backend="osqp-direct", slack_penalty=1e3)
+    np.testing.assert_allclose(soft.compute(x0, reference), hard.compute(x0, reference),
+                               atol=1e-4)
+    assert soft.constraint_violation < 1e-4
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, backend="explicit", slack_penalty=1e3)
+
+
+def test_soft_constraints_keep_shifted_warm_start():
+    model = QuadrotorModel()
+    kwargs = {"horizon": 15, "backend": "osqp-direct", "slack_penalty": 1e3}
+    warm = MPCController(**kwargs)
+    cold = MPCController(warm_start=False, **kwargs)
+    x = np.zeros(8)
+    for _ in range(30):
+        u = warm.compute(x, hover_reference())
+        np.testing.assert_allclose(u, cold.compute(x, hover_reference()), atol=1e-4)
+        x = model.step(x, u, warm.dt)
+
+
+def test_lqr_fast_path_matches_solver_and_skips_hover_solves():
+    model = QuadrotorModel()
+    fast = MPCController(horizon=15, backend="osqp-direct", lqr_fast_path=True)
+    solver = MPCController(horizon=15, backend="osqp-direct")
+    x = np.full(8, 0.02)
+    for _ in range(100):
+        u = fast.compute(x, hover_reference())
+        np.testing.assert_allclose(u, solver.compute(x, hover_reference()), atol=1e-4)
+        x = model.step(x, u, fast.dt)
+    assert fast.fast_path_rate > 0.9
+    assert fast.iterations == 0
+
+
+def test_lqr_fast_path_defers_to_solver_when_constraints_bind():
+    fast = MPCController(horizon=15, backend="osqp-direct", lqr_fast_path=True)
+    fast.compute(np.zeros(8), hover_reference(3.0))  # vz and thrust saturate
+    assert fast.fast_path_ticks == 0
+    assert np.all(fast.u_plan <= fast.u_max + 1e-4)
+
+    moving = hover_reference()
+    moving[3] = 0.5  # not an equilibrium
+    fast.compute(np.zeros(8), moving)
+    assert fast.fast_path_ticks == 0
+
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, move_blocks=[2, 2], lqr_fast_path=True)
+
+
+def test_reference_linearization_reduces_to_hover_model_at_a_setpoint():
+    x0 = np.full(8, 0.05)
+    hover = MPCController(horizon=15, backend="osqp-direct")
+    ltv = MPCController(horizon=15, backend="osqp-direct", linearization="reference")
+    np.testing.assert_allclose(ltv.compute(x0, hover_reference()),
+                               hover.compute(x0, hover_reference()), atol=1e-5)
+    with pytest.raises(ValueError):
+        MPCController(horizon=4, linearization="reference")
+
+
+def test_reference_linearization_updates_the_qp_in_place():
+    ctrl = MPCController(horizon=15, backend="osqp-direct", linearization="reference",
+                         move_blocks=[1, 2, 4, 8])
+    solver = ctrl._backend._solver
+    circle = load_trajectory("circle")
+    for t in (0.0, 0.5):
+        ctrl.compute(circle.sample(t), circle.sample(t + ctrl.step_times))
+    assert ctrl._backend._solver is solver
+
+    # The plan follows the dynamics linearized along the completed reference.
+    X = circle.sample(0.5 + ctrl.step_times)
+    U = ctrl.model.trim_inputs(np.diff(X[:, 3:6], axis=0) / ctrl.dt)
+    X[:-1, 6:8] = U[:, :2]
+    A, B, c = affine_stages(ctrl.model, X[:-1], U, ctrl.step_durations)
+    predicted = (np.einsum("kij,kj->ki", A, ctrl.x_plan[:-1])
+                 + np.einsum("kij,kj->ki", B, ctrl.u_plan) + c)
+    np.testing.assert_allclose(ctrl.x_plan[1:], predicted, atol=1e-4)
+
+
+def test_reference_linearization_tracks_the_circle_more_closely():
+    circle = load_trajectory("circle")
+    rms = {}
+    for linearization in ("hover", "reference"):
+        ctrl = MPCController(backend="osqp-direct", linearization=linearization)
+
+        def policy(x, k):
+            return ctrl.compute(x, circle.sample(k * ctrl.dt + ctrl.step_times))
+
+        _, _, errors = simulate(policy, ctrl.model, circle.sample(0.0),
+                                lambda k: circle.sample(k * ctrl.dt), 120, ctrl.dt)
+        rms[linearization] = np.sqrt(np.mean(np.sum(errors[:, :3] ** 2, axis=1)))
+    assert rms["reference"] < 0.85 * rms["hover"]
+
+
+def test_ticks_are_logged_with_phase_times_and_status():
+    ctrl = MPCController(horizon=15, backend="osqp-direct", lqr_fast_path=True, tick_log_size=8)
+    ctrl.compute(np.zeros(8), hover_reference(3.0))  # constraints bind: solver
+    ctrl.compute(hover_reference(), hover_reference())  # fast path
+    ticks = ctrl.tick_log.ticks()
+    assert ticks["status"].tolist() == ["solved", "fast path"]
+    assert ticks["iterations"][0] > 0 and ticks["iterations"][1] == 0
+    phases = ticks["update"] + ticks["solve"] + ticks["extract"]
+    assert np.all(phases > 0.0) and np.all(phases <= ticks["total"])
+
+    anytime = MPCController(horizon=15, backend="osqp-direct", time_budget=0.01)
+    gust = hover_reference()
+    gust[5] = 10.0
+    anytime.compute(gust, hover_reference())
+    assert anytime.tick_log.ticks()["status"][0] == "fallback: primal infeasible"
+    assert MPCController(horizon=4, tick_log_size=None).tick_log is None
@@ -0,0 +1,57 @@
+import numpy as np
+
+from controllers import MPPIController
+from controllers.quadrotor import QuadrotorModel
+from utils.simulation import simulate
+
+from conftest import hover_reference
+
+
+def test_rollout_matches_model_steps():
+    ctrl = MPPIController(horizon=5, n_samples=4, seed=0)
+    inputs = np.random.default_rng(1).uniform(-0.1, 0.1, size=(4, 5, 3))
+    states = ctrl.rollout(np.zeros(8), inputs)
+    x = np.zeros(8)
+    for k in range(5):
+        x = ctrl.model.step(x, inputs[2, k], ctrl.dt)
+        np.testing.assert_allclose(states[2, k], x)
+
+
+def test_closed_loop_hover_converges_within_bounds():
+    ctrl = MPPIController(n_samples=500, seed=0)
+    states, inputs, errors = simulate(lambda x, k: ctrl.compute(x, hover_reference()),
+                                      QuadrotorModel(), np.zeros(8), hover_reference(),
+                                      steps=200, dt=0.02)
+    np.testing.assert_allclose(errors[-1, :3], 0.0, atol=0.02)
+    assert np.all(inputs >= ctrl.u_min) and np.all(inputs <= ctrl.u_max)
+
+
+def test_nonconvex_cost_keeps_rollouts_out_of_a_region():
+    # The target lies inside a penalized band |x| < 0.05 m; starting left of
+    # it, the drone should approach the band edge but never enter it.
+    def band(states, inputs):
+        return 1e3 * np.sum(np.abs(states[..., 0]) < 0.05, axis=1)
+
+    ctrl = MPPIController(n_samples=500, cost=band, seed=0)
+    x0 = hover_reference()
+    x0[0] = -0.2
+    states, _, _ = simulate(lambda x, k: ctrl.compute(x, hover_reference()), QuadrotorModel(),
+                            x0, hover_reference(), steps=100, dt=0.02)
+    assert np.all(states[:, 0] < -0.04)
+    assert states[-1, 0] > -0.12
+
+
+def test_seed_makes_ticks_reproducible():
+    u = [MPPIController(n_samples=100, seed=3).compute(np.zeros(8), hover_reference())
+         for _ in range(2)]
+    np.testing.assert_array_equal(u[0], u[1])
+
+
+def test_plan_starts_at_the_current_tick():
+    ctrl = MPPIController(horizon=10, n_samples=200, seed=0)
+    assert ctrl.u_plan is None
+    x0 = np.zeros(8)
+    u = ctrl.compute(x0, hover_reference())
+    np.testing.assert_array_equal(ctrl.u_plan[0], u)
+    np.testing.assert_array_equal(ctrl.x_plan[0], x0)
+    np.testing.assert_allclose(ctrl.x_plan[1], ctrl.model.step(x0, u, ctrl.dt))
@@ -0,0 +1,55 @@
+import numpy as np
+
+from controllers import MPCController, RTIMPCController
+from controllers.nmpc import rk4_sensitivities
+from controllers.quadrotor import QuadrotorModel
+from utils.config import load_config
+from utils.simulation import simulate
+from utils.trajectory import load_trajectory
+
+from conftest import hover_reference
+
+
+def test_rk4_sensitivities_match_finite_differences():
+    model = QuadrotorModel()
+    rng = np.random.default_rng(0)
+    X = rng.normal(scale=0.3, size=(4, 8))
+    U = rng.normal(scale=0.1, size=(4, 3))
+    X_next, A, B = rk4_sensitivities(model, X, U, 0.02)
+    np.testing.assert_allclose(X_next, model.step(X, U, 0.02))
+
+    eps = 1e-6
+    for j in range(8):
+        dx = eps * np.eye(8)[j]
+        fd = (model.step(X + dx, U, 0.02) - model.step(X - dx, U, 0.02)) / (2 * eps)
+        np.testing.assert_allclose(A[:, :, j], fd, atol=1e-8)
+    for j in range(3):
+        du = eps * np.eye(3)[j]
+        fd = (model.step(X, U + du, 0.02) - model.step(X, U - du, 0.02)) / (2 * eps)
+        np.testing.assert_allclose(B[:, :, j], fd, atol=1e-8)
+
+
+def test_near_hover_matches_linear_mpc():
+    x0 = np.zeros(8)
+    x0[2] = 0.49
+    rti = RTIMPCController(horizon=10, init_iterations=10)
+    linear = MPCController(horizon=10, backend="osqp-direct")
+    np.testing.assert_allclose(rti.compute(x0, hover_reference()),
+                               linear.compute(x0, hover_reference()), atol=1e-3)
+
+
+def test_rti_tracks_circle_better_than_linear_mpc():
+    config = load_config("trajectory")
+    trajectory = load_trajectory(config["trajectory"])
+    offsets = 0.02 * np.arange(21)
+    steps = 120
+
+    def rms_error(ctrl):
+        policy = lambda x, k: ctrl.compute(x, trajectory.sample(k * 0.02 + offsets))
+        _, _, errors = simulate(policy, ctrl.model, trajectory.sample(0.0),
+                                lambda k: trajectory.sample(k * 0.02), steps, 0.02)
+        return np.sqrt(np.mean(np.sum(errors[:, :3] ** 2, axis=1)))
+
+    rti = RTIMPCController.from_config(config["nmpc"])
+    assert rms_error(rti) < 0.9 * rms_error(MPCController(backend="osqp-direct"))
+    assert rti.iterations > 0 and rti.linearize_time > 0.0
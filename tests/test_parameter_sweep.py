@@ -0,0 +1,47 @@
+import numpy as np
+
+from controllers.mpc import DEFAULT_R
+from controllers.parameter_sweep import (
+    SweepResult, cheapest, configurations, controller_kwargs, pareto_front, sweep)
+
+
+def test_configurations_cover_grid():
+    configs = configurations({"horizon": (10, 20), "eps": (1e-3, 1e-5, 1e-7)})
+    assert len(configs) == 6
+    assert configs[0] == {"horizon": 10, "eps": 1e-3}
+    assert configs[-1] == {"horizon": 20, "eps": 1e-7}
+
+
+def test_controller_kwargs_overrides_base():
+    base = {"horizon": 20, "step_durations": [0.1] * 20, "move_blocks": [10, 10],
+            "solver_options": {"max_iter": 100}}
+    kwargs = controller_kwargs({"horizon": 10, "r_scale": 2.0, "eps": 1e-4}, base)
+    assert kwargs["horizon"] == 10
+    assert "step_durations" not in kwargs and "move_blocks" not in kwargs
+    np.testing.assert_allclose(kwargs["R"], 2.0 * DEFAULT_R)
+    assert kwargs["solver_options"] == {"max_iter": 100, "eps_abs": 1e-4, "eps_rel": 1e-4}
+    assert base["horizon"] == 20
+
+
+def test_sweep_runs_configurations_in_parallel():
+    results = sweep({"horizon": (5, 10)}, {"backend": "osqp-direct"}, duration=0.4, n_jobs=2)
+    assert [r.params["horizon"] for r in results] == [5, 10]
+    for r in results:
+        assert not r.failed
+        assert np.isfinite(r.rms_error)
+        assert 0.0 < r.p50 <= r.p99
+
+
+def test_pareto_front_and_cheapest():
+    results = [
+        SweepResult({"name": "slow accurate"}, 0.04, 1e-3, 3e-3, False),
+        SweepResult({"name": "dominated"}, 0.06, 1e-3, 2.5e-3, False),
+        SweepResult({"name": "balanced"}, 0.05, 1e-3, 2e-3, False),
+        SweepResult({"name": "fast sloppy"}, 0.10, 1e-3, 1e-3, False),
+        SweepResult({"name": "broken"}, np.inf, np.inf, np.inf, True),
+    ]
+    front = pareto_front(results)
+    assert [r.params["name"] for r in front] == ["fast sloppy", "balanced", "slow accurate"]
+    assert cheapest(results, 0.055).params["name"] == "balanced"
+    assert cheapest(results, 0.2).params["name"] == "fast sloppy"
+    assert cheapest(results, 0.01) is None
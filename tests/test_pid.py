@@ -0,0 +1,96 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from controllers import PIDController
+
+
+def test_scalar_pid_steps():
+    pid = PIDController(kp=2.0, ki=1.0, kd=0.5, dt=0.1)
+    # First step: no derivative yet.
+    assert pid.update(1.0, 0.0) == pytest.approx(2.0 * 1.0 + 1.0 * 0.1)
+    # Second step: error 0.5, integral 0.15, derivative -5.
+    out = pid.update(1.0, 0.5)
+    assert isinstance(out, float)
+    assert out == pytest.approx(2.0 * 0.5 + 1.0 * 0.15 + 0.5 * -5.0)
+
+
+def test_scalar_limits():
+    pid = PIDController(kp=1.0, ki=10.0, dt=1.0, output_limits=(-1.0, 2.0), integral_limit=0.5)
+    assert pid.update(5.0, 0.0) == 2.0
+    assert pid.integral == pytest.approx(0.5)
+    assert pid.update(-5.0, 0.0) == -1.0
+
+
+def test_batch_matches_per_channel_controllers():
+    rng = np.random.default_rng(0)
+    kp, ki, kd = np.array([1.0, 1.0, 2.0, 0.5]), np.array([0.1, 0.1, 0.5, 0.0]), 0.05
+    limits = (-np.array([1.0, 1.0, 2.0, 0.5]), np.array([1.0, 1.0, 2.0, 0.5]))
+    batch = PIDController(kp, ki, kd, dt=0.01, output_limits=limits, integral_limit=0.2,
+                          shape=(3, 4))
+    single = [[PIDController(kp[j], ki[j], kd, dt=0.01,
+                             output_limits=(limits[0][j], limits[1][j]), integral_limit=0.2)
+               for j in range(4)] for _ in range(3)]
+    setpoint = rng.normal(size=(3, 4))
+    for _ in range(20):
+        measurement = rng.normal(size=(3, 4))
+        out = batch.update(setpoint, measurement)
+        expected = [[single[i][j].update(setpoint[i, j], measurement[i, j]) for j in range(4)]
+                    for i in range(3)]
+        np.testing.assert_allclose(out, expected)
+
+
+def test_reset_single_vehicle():
+    pid = PIDController(kp=1.0, ki=1.0, kd=1.0, dt=0.1, shape=(2, 4))
+    pid.update(np.ones((2, 4)), 0.0)
+    pid.reset(1)
+    np.testing.assert_allclose(pid.integral[0], 0.1)
+    np.testing.assert_allclose(pid.integral[1], 0.0)
+    out = pid.update(np.ones((2, 4)), 0.0)
+    # Vehicle 0 has a (zero) derivative term; vehicle 1 starts over.
+    np.testing.assert_allclose(out[0], 1.0 + 0.2)
+    np.testing.assert_allclose(out[1], 1.0 + 0.1)
+
+
+def test_update_rejects_wrong_shape():
+    pid = PIDController(kp=np.ones(4))
+    with pytest.raises(ValueError):
+        pid.update(np.zeros(3), 0.0)
+
+
+def test_out_matches_returned_output():
+    kwargs = dict(kp=[1.0, 2.0], ki=0.5, kd=0.1, dt=0.01, output_limits=(-1.0, 1.0),
+                  integral_limit=0.2, shape=(3, 2))
+    a, b = PIDController(**kwargs), PIDController(**kwargs)
+    out = np.empty((3, 2))
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        setpoint, measurement = rng.normal(size=(2, 3, 2))
+        result = b.update(setpoint, measurement, dt=0.02, out=out)
+        assert result is out
+        np.testing.assert_allclose(out, a.update(setpoint, measurement, dt=0.02))
+
+
+def _peak_allocation(call, updates=200):
+    call()
+    tracemalloc.start()
+    call()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    for _ in range(updates):
+        call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak - base
+
+
+def test_update_does_not_allocate():
+    pid = PIDController(kp=np.ones(4), ki=0.1, kd=0.05, output_limits=(-1.0, 1.0),
+                        integral_limit=0.5, shape=(8, 4))
+    setpoint, measurement, out = np.ones((8, 4)), np.zeros((8, 4)), np.empty((8, 4))
+    scalar = PIDController(kp=1.0, ki=0.1, kd=0.05, output_limits=(-1.0, 1.0), integral_limit=0.5)
+    baseline = _peak_allocation(lambda: None)
+    assert _peak_allocation(lambda: pid.update(setpoint, measurement, out=out)) <= baseline
+    assert _peak_allocation(lambda: pid.update(setpoint, measurement, dt=0.01, out=out)) <= baseline
+    assert _peak_allocation(lambda: scalar.update(1.0, 0.3)) <= baseline
@@ -0,0 +1,100 @@
+import threading
+
+import numpy as np
+
+from controllers.mpc import DEFAULT_Q, DEFAULT_R, MPCController
+from controllers.prediction import (affine_stages, cache_key, clear_memory_cache,
+                                   prediction_data, save_npz)
+from controllers.quadrotor import QuadrotorModel
+
+
+def test_prediction_matrices_match_simulation():
+    data = prediction_data(QuadrotorModel(), 0.02, 5, DEFAULT_Q, DEFAULT_R)
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=8)
+    U = rng.normal(size=(5, 3))
+    predicted = data.Phi @ x + data.Gamma @ U.ravel()
+    for k in range(5):
+        x = data.A @ x + data.B @ U[k]
+        np.testing.assert_allclose(predicted[8 * k:8 * (k + 1)], x, atol=1e-12)
+
+
+def test_memory_and_disk_cache(tmp_path):
+    model = QuadrotorModel()
+    clear_memory_cache()
+    first = prediction_data(model, 0.02, 10, DEFAULT_Q, DEFAULT_R, tmp_path)
+    assert prediction_data(model, 0.02, 10, DEFAULT_Q, DEFAULT_R, tmp_path) is first
+    assert len(list(tmp_path.glob("prediction_*.npz"))) == 1
+
+    clear_memory_cache()
+    loaded = prediction_data(model, 0.02, 10, DEFAULT_Q, DEFAULT_R, tmp_path)
+    assert loaded is not first
+    for a, b in zip(first, loaded):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_controllers_reuse_cached_discretizations(tmp_path, monkeypatch):
+    model = QuadrotorModel()
+    durations = [0.02] * 5 + [0.04] * 5
+    clear_memory_cache()
+    MPCController(model=model, horizon=10, step_durations=durations, cache_dir=tmp_path)
+
+    clear_memory_cache()
+    calls = []
+    discretize = model.discretize
+    monkeypatch.setattr(model, "discretize", lambda dt: calls.append(dt) or discretize(dt))
+    for _ in range(3):
+        MPCController(model=model, horizon=10, step_durations=durations, cache_dir=tmp_path)
+    # dt comes with the prediction data from disk; only the coarse step is discretized.
+    assert calls == [0.04]
+
+
+def test_cache_files_are_replaced_atomically(tmp_path):
+    path = tmp_path / "data.npz"
+    save_npz(path, x=np.zeros(200_000))
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                with np.load(path) as data:
+                    assert data["x"].shape == (200_000,)
+            except Exception as error:
+                errors.append(error)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(20):
+        save_npz(path, x=np.full(200_000, float(i)))
+    done.set()
+    reader.join()
+    assert errors == []
+    assert [p.name for p in tmp_path.iterdir()] == ["data.npz"]
+
+
+def test_cache_key_depends_on_model_dt_and_horizon():
+    model = QuadrotorModel()
+    key = cache_key(model, 0.02, 10, DEFAULT_Q, DEFAULT_R)
+    assert key == cache_key(QuadrotorModel(), 0.02, 10, DEFAULT_Q, DEFAULT_R)
+    assert key != cache_key(QuadrotorModel(mass=0.03), 0.02, 10, DEFAULT_Q, DEFAULT_R)
+    assert key != cache_key(model, 0.01, 10, DEFAULT_Q, DEFAULT_R)
+    assert key != cache_key(model, 0.02, 11, DEFAULT_Q, DEFAULT_R)
+
+
+def test_affine_stages_match_hover_model_and_nonlinear_step():
+    model = QuadrotorModel()
+    A, B, c = affine_stages(model, np.zeros((2, 8)), np.zeros((2, 3)), [0.02, 0.1])
+    for k, dt in enumerate((0.02, 0.1)):
+        A_hover, B_hover = model.discretize(dt)
+        np.testing.assert_allclose(A[k], A_hover, atol=1e-12)
+        np.testing.assert_allclose(B[k], B_hover, atol=1e-12)
+    np.testing.assert_allclose(c, 0.0, atol=1e-12)
+
+    # Banked turn: trim inputs hold the acceleration, and the affine model
+    # reproduces the nonlinear step from the linearization point.
+    u = model.trim_inputs(np.array([2.0, -1.0, 0.5]))
+    x = np.zeros(8)
+    x[3:8] = [0.3, 0.2, 0.0, *u[:2]]
+    np.testing.assert_allclose(model.dynamics(x, u)[3:6], [2.0, -1.0, 0.5], atol=1e-12)
+    A, B, c = affine_stages(model, x[None], u[None], [0.02])
+    np.testing.assert_allclose(A[0] @ x + B[0] @ u + c[0], model.step(x, u, 0.02), atol=1e-9)
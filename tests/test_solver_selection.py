@@ -0,0 +1,41 @@
+import cvxpy as cp
+import numpy as np
+import pytest
+
+from controllers import MPCController
+from controllers.solver_selection import (
+    BenchmarkResult, benchmark_solvers, default_episode, select_solver)
+
+CANDIDATES = (
+    ("osqp-direct", {"backend": "osqp-direct"}),
+    ("cvxpy CLARABEL", {"backend": "cvxpy", "solver": cp.CLARABEL}),
+)
+
+
+def test_benchmark_reports_times_and_cost():
+    episode = {**default_episode(), "steps": 20}
+    results = benchmark_solvers(CANDIDATES, episode, horizon=10)
+    assert [r.name for r in results] == ["osqp-direct", "cvxpy CLARABEL"]
+    for r in results:
+        assert not r.failed
+        assert r.tick_times.shape == (20,)
+    assert results[0].cost == pytest.approx(results[1].cost, rel=1e-3)
+
+
+def test_select_fastest_within_accuracy():
+    results = [
+        BenchmarkResult("accurate", {"backend": "cvxpy"}, np.full(10, 2e-3), 100.0, False),
+        BenchmarkResult("fast", {"backend": "osqp-direct"}, np.full(10, 1e-3), 100.5, False),
+        BenchmarkResult("sloppy", {"backend": "osqp-direct"}, np.full(10, 1e-4), 110.0, False),
+        BenchmarkResult("broken", {}, np.full(3, 1e-5), np.inf, True),
+    ]
+    assert select_solver(results, accuracy=0.01).name == "fast"
+    assert select_solver(results, accuracy=0.2).name == "sloppy"
+    assert select_solver(results, accuracy=0.0).name == "accurate"
+
+
+def test_autoselect_returns_configured_controller():
+    episode = {**default_episode(), "steps": 10}
+    ctrl = MPCController.autoselect(candidates=CANDIDATES[:1], episode=episode, horizon=10)
+    assert ctrl.backend == "osqp-direct"
+    assert ctrl.horizon == 10
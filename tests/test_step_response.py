@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from utils.step_response import pad_runs, step_metrics, summarize
+
+DT = 0.01
+TIMES = DT * np.arange(400)
+
+
+def first_order(tau, samples=400):
+    return 1.0 - np.exp(-TIMES[:samples] / tau)
+
+
+def second_order(wn, zeta):
+    wd = wn * np.sqrt(1.0 - zeta ** 2)
+    phase = wd * TIMES
+    return 1.0 - np.exp(-zeta * wn * TIMES) * (np.cos(phase)
+                                               + zeta / np.sqrt(1.0 - zeta ** 2) * np.sin(phase))
+
+
+def test_first_order_metrics_match_analytic_values():
+    tau = 0.3
+    metrics = step_metrics(first_order(tau), 1.0, DT)
+    assert metrics.rise_time == pytest.approx(tau * np.log(9.0), abs=1e-3)
+    assert metrics.settling_time == pytest.approx(-tau * np.log(0.02), abs=DT)
+    assert metrics.overshoot == 0.0
+    assert metrics.steady_state_error == pytest.approx(0.0, abs=1e-4)
+    assert metrics.iae == pytest.approx(tau, rel=0.02)
+    assert metrics.ise == pytest.approx(tau / 2.0, rel=0.05)
+
+
+def test_second_order_overshoot():
+    zeta = 0.3
+    metrics = step_metrics(second_order(5.0, zeta), 1.0, DT)
+    assert metrics.overshoot == pytest.approx(np.exp(-np.pi * zeta / np.sqrt(1.0 - zeta ** 2)),
+                                              rel=1e-3)
+
+
+def test_batch_matches_single_runs():
+    runs = np.stack([first_order(tau) for tau in (0.1, 0.2, 0.4)]
+                    + [second_order(wn, 0.4) for wn in (4.0, 8.0)])
+    targets = np.array([1.0, 1.0, 1.0, 1.0, 1.0])
+    batch = step_metrics(runs, targets, DT)
+    for i, run in enumerate(runs):
+        single = step_metrics(run, targets[i], DT)
+        for name in batch._fields:
+            np.testing.assert_allclose(getattr(batch, name)[i], getattr(single, name))
+
+
+def test_ragged_runs_and_downward_steps():
+    down = 2.0 - first_order(0.2, samples=300)  # from 2 down to 1
+    runs = pad_runs([down, first_order(0.2, samples=250), np.zeros(100)])
+    assert runs.shape == (3, 300)
+    assert np.isnan(runs[1, 250:]).all()
+    metrics = step_metrics(runs, [1.0, 1.0, 1.0], DT)
+    # A downward step gives the same times as the upward one.
+    np.testing.assert_allclose(metrics.rise_time[0], metrics.rise_time[1])
+    np.testing.assert_allclose(metrics.settling_time[0], metrics.settling_time[1])
+    # The padding is not part of the run.
+    np.testing.assert_allclose(metrics.iae[1], step_metrics(runs[1, :250], 1.0, DT).iae)
+    # A run that never moves has no rise or settling time.
+    assert np.isnan(metrics.rise_time[2]) and np.isnan(metrics.settling_time[2])
+    assert metrics.steady_state_error[2] == pytest.approx(1.0)
+
+    summary = summarize(metrics)
+    assert summary["rise_time"]["missing"] == 1
+    assert summary["iae"]["missing"] == 0
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from controllers import MPCController, TubeMPCController
+from controllers.prediction import lqr_gain, prediction_data
+from controllers.quadrotor import QuadrotorModel
+from controllers.tube_mpc import cached_tube_margins, tube_margins
+
+from conftest import hover_reference
+
+DISTURBANCE = np.array([0.0, 0.0, 0.0, 0.02, 0.02, 0.03, 0.0, 0.0])
+X_MAX = np.array([np.inf, np.inf, np.inf, 0.6, 0.6, 0.6, 0.5, 0.5])
+
+
+@pytest.fixture(scope="module")
+def closed_loop():
+    model = QuadrotorModel()
+    data = prediction_data(model, 0.02, 20, np.diag([10.0, 10, 10, 1, 1, 1, 0.1, 0.1]),
+                           np.diag([1.0, 1, 50]))
+    K = lqr_gain(data.A, data.B, np.diag([1.0, 1, 50]), data.P)
+    return data.A, data.B, K
+
+
+def test_margins_bound_the_disturbed_error(closed_loop):
+    A, B, K = closed_loop
+    x_margin, u_margin = tube_margins(A, B, K, DISTURBANCE)
+    rng = np.random.default_rng(0)
+    e = np.zeros((500, 8))
+    for _ in range(300):
+        assert np.all(np.abs(e) <= x_margin + 1e-12)
+        assert np.all(np.abs(e @ K.T) <= u_margin + 1e-12)
+        e = e @ (A - B @ K).T + rng.choice([-1.0, 1.0], e.shape) * DISTURBANCE
+    # Worst-case sign sequences get close to the bound.
+    assert np.all(np.abs(e).max(axis=0)[3:6] > 0.5 * x_margin[3:6])
+
+
+def test_margins_are_cached_to_disk(closed_loop, tmp_path):
+    A, B, K = closed_loop
+    margins = cached_tube_margins(A, B, K, 2 * DISTURBANCE, cache_dir=tmp_path)
+    files = list(tmp_path.glob("tube_*.npz"))
+    assert len(files) == 1
+    with np.load(files[0]) as data:
+        np.testing.assert_allclose(data["x_margin"], margins[0])
+        np.testing.assert_allclose(data["u_margin"], margins[1])
+
+
+def test_nominal_qp_has_the_size_of_plain_mpc():
+    tube = TubeMPCController(DISTURBANCE, backend="osqp-direct", x_min=-X_MAX, x_max=X_MAX)
+    plain = MPCController(backend="osqp-direct", x_min=-X_MAX, x_max=X_MAX)
+    assert tube.controller._backend._n_xu == plain._backend._n_xu
+    np.testing.assert_allclose(tube.controller.x_max[3:], X_MAX[3:] - tube.x_margin[3:])
+    np.testing.assert_allclose(tube.controller.x_max[:3], plain.x_max[:3])
+
+
+def test_disturbed_flight_respects_the_original_bounds():
+    tube = TubeMPCController(DISTURBANCE, backend="osqp-direct", x_min=-X_MAX, x_max=X_MAX)
+    model, rng = QuadrotorModel(), np.random.default_rng(1)
+    ref = hover_reference(0.7)
+    ref[0] = 2.0
+    x = np.zeros(8)
+    for _ in range(400):
+        u = tube.compute(x, ref)
+        assert np.all(u >= tube.u_min) and np.all(u <= tube.u_max)
+        x = model.step(x, u, 0.02) + rng.uniform(-1.0, 1.0, 8) * DISTURBANCE
+        assert np.all(np.abs(x) <= X_MAX)
+    assert abs(x[0] - 2.0) < 0.1
+
+
+def test_too_large_disturbance_is_rejected():
+    with pytest.raises(ValueError):
+        TubeMPCController(20 * DISTURBANCE)
+
+
+def test_fallback_without_nominal_plan():
+    tube = TubeMPCController(DISTURBANCE, backend="osqp-direct", time_budget=0.05,
+                             x_min=-X_MAX, x_max=X_MAX)
+    x = np.zeros(8)
+    x[5] = 10.0  # far outside the hard velocity bounds: the nominal MPC falls back
+    u = tube.compute(x, hover_reference())
+    assert tube.controller.fallbacks == 1 and tube.x_plan is None
+    np.testing.assert_array_equal(u, 0.0)
+    np.testing.assert_array_equal(tube.nominal_state, x)
+
+    # Once the state is feasible the nominal plan restarts from the measurement.
+    u = tube.compute(np.zeros(8), hover_reference())
+    assert tube.x_plan is not None
+    np.testing.assert_allclose(tube.x_plan[0], 0.0, atol=1e-9)
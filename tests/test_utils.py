@@ -0,0 +1,101 @@
+import numpy as np
+
+from controllers.quadrotor import QuadrotorModel
+from utils.config import CONFIG_DIR, load_config, update_config
+from utils.logger import TickLog, log_summary, write_histogram, write_ticks
+from utils.simulation import simulate
+from utils.trajectory import load_trajectory
+
+
+def test_load_config_by_name_and_path():
+    by_name = load_config("hover")
+    assert by_name == load_config(CONFIG_DIR / "hover.yaml")
+    assert "mpc" in by_name
+
+
+def test_simulate_hover_stays_put():
+    model = QuadrotorModel()
+    states, inputs, errors = simulate(lambda x, k: np.zeros(3), model, np.zeros(8),
+                                      np.zeros(8), steps=20, dt=0.02)
+    assert states.shape == (21, 8) and inputs.shape == (20, 3)
+    np.testing.assert_allclose(errors, 0.0, atol=1e-12)
+
+
+def test_load_trajectory_interpolates_and_holds_last_sample():
+    trajectory = load_trajectory("circle")
+    assert trajectory.duration > 0.0
+    np.testing.assert_allclose(trajectory.sample(0.0)[:3], [0.6, 0.0, 0.7])
+    samples = trajectory.sample([0.01, trajectory.t[-1] + 1.0])
+    assert samples.shape == (2, 8)
+    np.testing.assert_allclose(samples[0, :3], 0.5 * (trajectory.states[0, :3]
+                                                      + trajectory.states[1, :3]))
+    np.testing.assert_allclose(samples[1, :6], trajectory.states[-1])
+
+
+def test_tick_log_keeps_the_latest_ticks_in_order():
+    log = TickLog(capacity=4)
+    for k in range(6):
+        log.record(1e-4, 1e-3 * (k + 1), 1e-5, 2e-3 * (k + 1), k, "solved", timestamp=float(k))
+    assert log.count == 6 and len(log) == 4
+    ticks = log.ticks()
+    np.testing.assert_array_equal(ticks["timestamp"], [2.0, 3.0, 4.0, 5.0])
+    np.testing.assert_array_equal(ticks["iterations"], [2, 3, 4, 5])
+
+    summary = log.summary()
+    assert summary["solve"]["max"] == 6e-3
+    np.testing.assert_allclose(summary["total"]["p50"], 9e-3)
+    assert summary["status"] == {"solved": 4}
+    edges, counts = log.histogram()
+    assert all(c.sum() == 4 for c in counts.values())
+
+
+def test_tick_log_keeps_long_statuses_whole():
+    log = TickLog(capacity=3)
+    long_status = "fallback: " + "primal infeasible inaccurate"
+    other = "fallback: " + "primal infeasible"
+    for status in (long_status, other, long_status, "solved"):
+        log.record(1e-4, 1e-3, 1e-5, 2e-3, 10, status)
+    assert log.ticks()["status"].tolist() == [other, long_status, "solved"]
+    assert log.summary()["status"] == {other: 1, long_status: 1, "solved": 1}
+
+
+def test_tick_log_export(tmp_path, caplog):
+    log = TickLog()
+    log.record(1e-4, 5e-4, 1e-5, 7e-4, 12, "solved", timestamp=100.0)
+    log.record(1e-4, 0.2, 1e-5, 0.3, 4000, "maximum iterations reached", timestamp=100.02)
+    rows = (tmp_path / "ticks.csv", tmp_path / "histogram.csv")
+    write_ticks(log, rows[0])
+    write_histogram(log, rows[1])
+    lines = rows[0].read_text().splitlines()
+    assert lines[0] == "timestamp,update_ms,solve_ms,extract_ms,total_ms,iterations,status"
+    assert lines[2].endswith("300.0000,4000,maximum iterations reached")
+    histogram = np.loadtxt(rows[1], delimiter=",", skiprows=1)
+    assert histogram[:, 2:].sum(axis=0).tolist() == [2, 2, 2, 2]  # beyond 100 ms still counted
+
+    with caplog.at_level("INFO"):
+        log_summary(log, name="hover")
+    assert "hover total" in caplog.text and "maximum iterations reached: 1" in caplog.text
+
+
+def test_update_config_keeps_comments(tmp_path):
+    path = tmp_path / "test.yaml"
+    path.write_text("# header\n"
+                    "cascade:\n"
+                    "  gains:\n"
+                    "    velocity:\n"
+                    "      kp: [4.0, 4.0, 6.0]   # lateral, vertical\n"
+                    "      schedule:\n"
+                    "        resolution: 16\n"
+                    "    attitude:\n"
+                    "      kp: 2.0\n"
+                    "other: 1\n")
+    update_config(path, ("cascade", "gains", "velocity"), {"kp": np.array([1.5, 1.5, 7.0]),
+                                                           "ki": [0.1, 0.1, 0.2]})
+    update_config(path, ("cascade", "gains", "attitude"), {"kp": np.float64(3.0)})
+    text = path.read_text()
+    assert "# header" in text and "kp: [1.5, 1.5, 7.0]   # lateral, vertical" in text
+    config = load_config(path)
+    assert config["cascade"]["gains"] == {
+        "velocity": {"kp": [1.5, 1.5, 7.0], "schedule": {"resolution": 16}, "ki": [0.1, 0.1, 0.2]},
+        "attitude": {"kp": 3.0}}
+    assert config["other"] == 1
@@ -0,0 +1,102 @@
+"""
+Loading of the YAML experiment configurations in configs/, and in-place
+updates of their values.
+"""
+
+import re
+from pathlib import Path
+
+import yaml
+
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "configs"
+
+
+def config_path(name_or_path):
+    """Path of a config given by file path or by bare name from configs/."""
+    path = Path(name_or_path)
+    if not path.suffix:
+        path = CONFIG_DIR / f"{path.name}.yaml"
+    return path
+
+
+def load_config(name_or_path):
+    """
+    Load a YAML config by file path or by bare name from configs/.
+
+    `load_config("hover")` and `load_config("configs/hover.yaml")` are
+    equivalent. An empty file yields an empty dict.
+    """
+    with open(config_path(name_or_path)) as f:
+        return yaml.safe_load(f) or {}
+
+
+def _format_value(value):
+    if isinstance(value, (list, tuple)) or getattr(value, "ndim", 0) > 0:
+        return "[" + ", ".join(_format_value(item) for item in value) + "]"
+    if hasattr(value, "item"):
+        value = value.item()
+    return yaml.safe_dump(value).splitlines()[0]
+
+
+def _key_line(lines, key, start, end, indent):
+    """Index of the ``key:`` line at indentation `indent` in lines[start:end], or None."""
+    pattern = re.compile(rf"^ {{{indent}}}{re.escape(key)}:(\s|$)")
+    for i in range(start, end):
+        if pattern.match(lines[i]):
+            return i
+    return None
+
+
+def _content_lines(lines, start, end):
+    """Indices and indentation of the non-blank, non-comment lines in lines[start:end]."""
+    for i in range(start, end):
+        stripped = lines[i].strip()
+        if stripped and not stripped.startswith("#"):
+            yield i, len(lines[i]) - len(stripped)
+
+
+def _block_end(lines, start, indent):
+    """End of the block opened at `start`: the first later content line indented <= `indent`."""
+    return next((i for i, depth in _content_lines(lines, start + 1, len(lines))
+                 if depth <= indent), len(lines))
+
+
+def _child_indent(lines, start, end, default):
+    """Indentation of the first child in the block lines[start + 1:end]."""
+    return next((depth for _, depth in _content_lines(lines, start + 1, end)), default)
+
+
+def update_config(name_or_path, section, values):
+    """
+    Set `values` (a dict of plain values or lists) in the mapping at the key
+    path `section` (e.g. ``("cascade", "gains", "velocity")``), in place.
+
+    The file is edited line by line so comments and layout survive: an
+    existing key gets its value replaced (flow style, inline comment kept),
+    a missing one is appended to the mapping. The mapping must exist in
+    block style. Returns the config path.
+    """
+    path = config_path(name_or_path)
+    lines = path.read_text().splitlines()
+    start, end, indent = -1, len(lines), -2
+    for key in section:
+        child_indent = _child_indent(lines, start, end, indent + 2)
+        line = _key_line(lines, key, start + 1, end, child_indent)
+        if line is None:
+            raise KeyError(f"no mapping {'.'.join(section)} in {path}")
+        start, indent = line, child_indent
+        end = _block_end(lines, start, indent)
+
+    child_indent = _child_indent(lines, start, end, indent + 2)
+    for key, value in values.items():
+        text = f"{' ' * child_indent}{key}: {_format_value(value)}"
+        line = _key_line(lines, key, start + 1, end, child_indent)
+        if line is None:
+            last = max([i for i in range(start, end) if lines[i].strip()], default=start)
+            lines.insert(last + 1, text)
+            end += 1
+        else:
+            comment = re.search(r"\s+#.*$", lines[line])
+            lines[line] = text + (comment.group(0) if comment else "")
+    path.write_text("\n".join(lines) + "\n")
+    return path
@@ -0,0 +1,177 @@
+"""
+Per-tick controller telemetry in a fixed-size ring buffer, and its export.
+
+A `TickLog` keeps the last `capacity` control ticks: a wall-clock timestamp,
+the time spent in each phase of the tick (parameter update, solve, solution
+extraction) and in total, the solver iteration count and a status string.
+Memory is allocated once, so recording a tick allocates nothing.
+
+`write_ticks` and `write_histogram` export the buffer as CSV files next to
+the flight logs: the ticks with their timestamps to line latency spikes up
+with flight events, the histogram for the overall latency distribution.
+`log_summary` reports the p50/p95/p99/max table through `logging`.
+"""
+
+import csv
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+PHASES = ("update", "solve", "extract")
+
+PERCENTILES = (50, 95, 99)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TickLog:
+    """
+    Ring buffer of the most recent `capacity` ticks.
+
+    Times are in seconds. `count` is the number of ticks recorded since
+    creation or `clear`; only the last `capacity` of them are kept, and
+    `ticks` returns those in chronological order.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = int(capacity)
+        if self.capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._timestamps = np.zeros(self.capacity)
+        # Columns: the PHASES, then the total tick time.
+        self._times = np.zeros((self.capacity, len(PHASES) + 1))
+        self._iterations = np.zeros(self.capacity, dtype=int)
+        # Statuses as indices into _status_names, so no string is ever cut
+        # to a fixed width and recording a known status stores one int.
+        self._status = np.zeros(self.capacity, dtype=int)
+        self._status_names = []
+        self._status_codes = {}
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    def record(self, update, solve, extract, total, iterations, status, timestamp=None):
+        """Append one tick, overwriting the oldest one once the buffer is full."""
+        i = self.count % self.capacity
+        self._timestamps[i] = time.time() if timestamp is None else timestamp
+        row = self._times[i]
+        row[0], row[1], row[2], row[3] = update, solve, extract, total
+        self._iterations[i] = iterations
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self._status_names)
+            self._status_names.append(status)
+        self._status[i] = code
+        self.count += 1
+
+    def _order(self):
+        n = len(self)
+        if self.count <= self.capacity:
+            return np.arange(n)
+        return (np.arange(n) + self.count) % self.capacity
+
+    def ticks(self):
+        """
+        Kept ticks, oldest first, as a dict of arrays: ``timestamp``, one
+        entry per phase, ``total``, ``iterations`` and ``status``.
+        """
+        order = self._order()
+        columns = {"timestamp": self._timestamps[order]}
+        for j, name in enumerate(PHASES + ("total",)):
+            columns[name] = self._times[order, j]
+        columns["iterations"] = self._iterations[order]
+        columns["status"] = self._names(self._status[order])
+        return columns
+
+    def _names(self, codes):
+        return np.array(self._status_names or [""])[codes]
+
+    def summary(self):
+        """
+        {phase or "total": {"p50", "p95", "p99", "max"}} in seconds over the
+        kept ticks, plus "iterations" (same keys) and "status" (counts).
+        """
+        n = len(self)
+        if n == 0:
+            return {}
+        result = {}
+        columns = [(name, self._times[:n, j]) for j, name in enumerate(PHASES + ("total",))]
+        columns.append(("iterations", self._iterations[:n]))
+        for name, values in columns:
+            stats = dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(values, PERCENTILES)))
+            stats["max"] = values.max()
+            result[name] = stats
+        codes, counts = np.unique(self._status[:n], return_counts=True)
+        result["status"] = dict(zip(self._names(codes).tolist(), counts.tolist()))
+        return result
+
+    def histogram(self, bins=None):
+        """
+        Counts of the kept ticks per time bin for every phase and the total.
+
+        `bins` are the bin edges in seconds; by default 40 log-spaced edges
+        from 10 us to 100 ms, with the outer bins open-ended so every tick
+        is counted. Returns (edges, {name: counts}).
+        """
+        edges = np.logspace(-5, -1, 41) if bins is None else np.asarray(bins, dtype=float)
+        n = len(self)
+        counts = {}
+        for j, name in enumerate(PHASES + ("total",)):
+            clipped = np.clip(self._times[:n, j], edges[0], np.nextafter(edges[-1], 0.0))
+            counts[name] = np.histogram(clipped, edges)[0]
+        return edges, counts
+
+
+def write_ticks(tick_log, path):
+    """Write the kept ticks as CSV: timestamp [s], phase times [ms], iterations, status."""
+    columns = tick_log.ticks()
+    names = PHASES + ("total",)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp"] + [f"{name}_ms" for name in names] + ["iterations", "status"])
+        for k in range(len(columns["timestamp"])):
+            writer.writerow([f"{columns['timestamp'][k]:.6f}"]
+                            + [f"{1e3 * columns[name][k]:.4f}" for name in names]
+                            + [int(columns["iterations"][k]), columns["status"][k]])
+    return path
+
+
+def write_histogram(tick_log, path, bins=None):
+    """Write `TickLog.histogram` as CSV: bin edges [ms], then one count column per phase."""
+    edges, counts = tick_log.histogram(bins)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["lower_ms", "upper_ms"] + list(counts))
+        for k in range(len(edges) - 1):
+            writer.writerow([f"{1e3 * edges[k]:.4f}", f"{1e3 * edges[k + 1]:.4f}"]
+                            + [int(c[k]) for c in counts.values()])
+    return path
+
+
+def log_summary(tick_log, logger=None, name="mpc"):
+    """Log one line per phase with p50/p95/p99/max in ms, and the status counts."""
+    logger = _LOGGER if logger is None else logger
+    summary = tick_log.summary()
+    if not summary:
+        logger.info("%s: no ticks recorded", name)
+        return
+    logger.info("%s: %d ticks (%d kept)", name, tick_log.count, len(tick_log))
+    for phase in PHASES + ("total",):
+        stats = summary[phase]
+        logger.info("%s %-8s p50 %.3f  p95 %.3f  p99 %.3f  max %.3f ms", name, phase,
+                    *(1e3 * stats[key] for key in ("p50", "p95", "p99", "max")))
+    stats = summary["iterations"]
+    logger.info("%s %-8s p50 %.0f  p95 %.0f  p99 %.0f  max %.0f", name, "iter",
+                *(stats[key] for key in ("p50", "p95", "p99", "max")))
+    logger.info("%s status %s", name, ", ".join(f"{key}: {value}"
+                                                for key, value in summary["status"].items()))
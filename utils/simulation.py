@@ -0,0 +1,33 @@
+"""
+Closed-loop simulation of a controller against the quadrotor model.
+"""
+
+import numpy as np
+
+
+def simulate(policy, model, x0, reference, steps, dt, substeps=5):
+    """
+    Run `policy(state, k)` for `steps` control ticks of length `dt`.
+
+    The plant is integrated with `substeps` RK4 steps per tick and the input
+    is held constant in between (zero-order hold). `reference` is a callable
+    `reference(k)` or a fixed target state and is only used to compute the
+    tracking error. Returns (states, inputs, errors) with `steps + 1`,
+    `steps` and `steps + 1` rows.
+    """
+    ref_fn = reference if callable(reference) else (lambda k: reference)
+    x = np.asarray(x0, dtype=float).copy()
+    h = dt / substeps
+
+    states = [x.copy()]
+    inputs = []
+    for k in range(steps):
+        u = np.asarray(policy(x, k), dtype=float)
+        for _ in range(substeps):
+            x = model.step(x, u, h)
+        states.append(x.copy())
+        inputs.append(u)
+
+    states = np.array(states)
+    errors = states - np.array([ref_fn(k) for k in range(steps + 1)])
+    return states, np.array(inputs), errors
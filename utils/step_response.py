@@ -0,0 +1,109 @@
+"""
+Step-response metrics for large collections of runs at once.
+
+Runs are the last axis of an array (..., samples) sampled every `dt`, with
+any leading axes (runs, axes, gain sets, ...). Runs of different lengths are
+padded at the end with NaN; `pad_runs` builds such an array from a list of
+logs. Every metric is computed for all runs with array operations along the
+sample axis, without a loop over runs:
+
+- rise time: from the first crossing of 10 % of the step to the first
+  crossing of 90 % (linearly interpolated between samples),
+- settling time: from the start until the response enters the band of
+  +-2 % of the step around the target for good,
+- overshoot: largest excursion beyond the target, as a fraction of the step,
+- steady-state error: target minus the mean response over the final window,
+- IAE and ISE: integral of the absolute and squared error over the run.
+
+Responses are normalized by the step (target minus initial value), so steps
+in either direction are handled alike. Metrics that are not reached within
+a run (no rise, never settled) are NaN.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+StepMetrics = namedtuple("StepMetrics", ["rise_time", "settling_time", "overshoot",
+                                         "steady_state_error", "iae", "ise"])
+
+
+def pad_runs(runs, fill=np.nan):
+    """Stack 1-D runs of different lengths into (len(runs), longest), padded with `fill`."""
+    lengths = np.array([len(run) for run in runs], dtype=int)
+    padded = np.full((len(runs), lengths.max(initial=0)), fill, dtype=float)
+    for row, run in zip(padded, runs):
+        row[:len(run)] = run
+    return padded
+
+
+def _first_crossing(progress, level, dt):
+    """Time of the first sample at or above `level`, interpolated; NaN if never reached."""
+    index = (progress >= level).argmax(axis=-1)
+    after = np.take_along_axis(progress, index[..., None], axis=-1)[..., 0]
+    before = np.take_along_axis(progress, np.maximum(index - 1, 0)[..., None], axis=-1)[..., 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.where(index > 0, (level - before) / (after - before), 1.0)
+    # argmax is 0 when no sample reaches the level; the first sample tells which.
+    return np.where(after >= level, dt * (index - 1 + fraction), np.nan)
+
+
+def step_metrics(response, target, dt, initial=None, rise_levels=(0.1, 0.9), settling_band=0.02,
+                 steady_window=0.5):
+    """
+    StepMetrics of every run in `response` (..., samples), each an array of
+    the leading shape.
+
+    `target` and `initial` broadcast to the leading shape; `initial`
+    defaults to the first sample of each run. `settling_band` is a fraction
+    of the step and `steady_window` the length in seconds of the final
+    stretch of each run averaged for the steady-state error.
+    """
+    response = np.asarray(response, dtype=float)
+    target = np.asarray(target, dtype=float)
+    initial = response[..., 0] if initial is None else np.asarray(initial, dtype=float)
+    samples = response.shape[-1]
+    valid = ~np.isnan(response)
+    lengths = valid.sum(axis=-1)
+
+    step = target - initial
+    with np.errstate(invalid="ignore", divide="ignore"):
+        progress = (response - initial[..., None]) / step[..., None]
+    # NaN padding never counts as reached or as outside the band.
+    progress_or_low = np.where(valid, progress, -np.inf)
+
+    rise_time = (_first_crossing(progress_or_low, rise_levels[1], dt)
+                 - _first_crossing(progress_or_low, rise_levels[0], dt))
+    overshoot = np.maximum(progress_or_low.max(axis=-1) - 1.0, 0.0)
+
+    outside = valid & ~(np.abs(progress - 1.0) <= settling_band)
+    last_outside = samples - 1 - outside[..., ::-1].argmax(axis=-1)
+    ever_outside = np.take_along_axis(outside, last_outside[..., None], axis=-1)[..., 0]
+    settling_time = np.where(~ever_outside, 0.0,
+                             np.where(last_outside < lengths - 1, dt * (last_outside + 1), np.nan))
+
+    error = np.where(valid, target[..., None] - response, 0.0)
+    window = max(int(round(steady_window / dt)), 1)
+    # Mean error over the last `window` samples of each run, from cumulative sums.
+    cumulative = np.cumsum(error, axis=-1)
+    end = np.take_along_axis(cumulative, np.maximum(lengths - 1, 0)[..., None], axis=-1)[..., 0]
+    start = lengths - window - 1
+    before = np.take_along_axis(cumulative, np.maximum(start, 0)[..., None], axis=-1)[..., 0]
+    steady_state_error = (end - np.where(start >= 0, before, 0.0)) / np.clip(lengths, 1, window)
+    iae = dt * np.abs(error).sum(axis=-1)
+    ise = dt * np.einsum("...i,...i->...", error, error)
+    return StepMetrics(rise_time, settling_time, overshoot, steady_state_error, iae, ise)
+
+
+def summarize(metrics, percentiles=(50, 95)):
+    """{metric: {"p50": ..., "p95": ..., "missing": count}} over all runs, ignoring NaN."""
+    summary = {}
+    for name, values in metrics._asdict().items():
+        values = np.ravel(values)
+        finite = values[np.isfinite(values)]
+        stats = dict(zip((f"p{p}" for p in percentiles),
+                         np.percentile(finite, percentiles) if len(finite)
+                         else [np.nan] * len(percentiles)))
+        stats["missing"] = int(len(values) - len(finite))
+        summary[name] = stats
+    return summary
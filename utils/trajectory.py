@@ -0,0 +1,46 @@
+"""
+Time-parametrized reference trajectories stored as CSV files in data/.
+
+A trajectory file has a header row and the columns ``t, x, y, z, vx, vy,
+vz``. Attitude references are left at zero; the controllers work out the
+tilt they need.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+COLUMNS = ("t", "x", "y", "z", "vx", "vy", "vz")
+
+
+class Trajectory:
+    """Reference states interpolated linearly in time, held at the last sample."""
+
+    def __init__(self, t, states):
+        self.t = np.asarray(t, dtype=float)
+        self.states = np.asarray(states, dtype=float)
+
+    @property
+    def duration(self):
+        return self.t[-1] - self.t[0]
+
+    def sample(self, times, nx=8):
+        """Reference states at `times` (scalar or array), shape (..., nx)."""
+        times = np.asarray(times, dtype=float)
+        ref = np.zeros(times.shape + (nx,))
+        for i in range(self.states.shape[1]):
+            ref[..., i] = np.interp(times, self.t, self.states[:, i])
+        return ref
+
+
+def load_trajectory(name_or_path):
+    """Load a trajectory CSV by path or by bare name from data/ (e.g. "circle")."""
+    path = Path(name_or_path)
+    if not path.suffix:
+        path = DATA_DIR / f"{path.name}.csv"
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    if data.shape[1] != len(COLUMNS):
+        raise ValueError(f"{path}: expected columns {', '.join(COLUMNS)}")
+    return Trajectory(data[:, 0], data[:, 1:])